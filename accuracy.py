@@ -0,0 +1,227 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import cache_manifest
+from utils import LOG_FILE, atomic_write, file_lock
+
+DATA_DIR = "stock_data"
+ACCURACY_STATE_FILE = os.path.join(DATA_DIR, "accuracy_state.json")
+
+# Jumlah yang diakumulasi per (symbol, model, window); metrik diturunkan dari sini
+_SUM_FIELDS = [
+    "n", "abs_err_open", "abs_err_close", "sq_err_close", "ape_close",
+    "covered_open", "covered_close", "hits",
+]
+
+
+def _bar_dates(index):
+    """Tanggal bar tanpa timezone (ambil bagian tanggal dari string aslinya)."""
+    return pd.to_datetime(pd.Index(index).astype(str).str[:10])
+
+
+# ============================================================
+#   LOG → KOLOM
+# ============================================================
+def load_log_frame(logs, start=0, positions=None):
+    """Prediksi dari log sebagai DataFrame kolom; `log_pos` = posisi entry di log."""
+    if positions is None:
+        positions = range(start, len(logs))
+
+    rows = []
+    for pos in positions:
+        entry = logs[pos]
+        pred = entry.get("prediction") or {}
+        hist = entry.get("last_3_days") or []
+        if not hist or "predicted_close" not in pred:
+            continue
+        # Realisasi dicocokkan dengan bar harian; prediksi intraday dilewati
+        if pred.get("interval", "1d") != "1d":
+            continue
+        open_lo, open_hi = pred.get("open_range") or (np.nan, np.nan)
+        close_lo, close_hi = pred.get("close_range") or (np.nan, np.nan)
+        rows.append({
+            "log_pos": pos,
+            "symbol": entry.get("symbol"),
+            "model_type": pred.get("model_type", "unknown"),
+            "base_date": hist[-1]["date"],
+            "current_price": pred.get("current_price"),
+            "predicted_open": pred.get("predicted_open"),
+            "predicted_close": pred.get("predicted_close"),
+            "open_lo": open_lo, "open_hi": open_hi,
+            "close_lo": close_lo, "close_hi": close_hi,
+        })
+
+    df = pd.DataFrame(rows, columns=[
+        "log_pos", "symbol", "model_type", "base_date", "current_price",
+        "predicted_open", "predicted_close", "open_lo", "open_hi", "close_lo", "close_hi"
+    ])
+    df["base_date"] = pd.to_datetime(df["base_date"])
+    return df
+
+
+def load_price_frame(symbols):
+    """Harga Open/Close dari cache lokal (tanpa fetch) dalam format panjang."""
+    frames = []
+    for sym in symbols:
+        entry = cache_manifest.lookup(sym, "price")
+        if entry is None or not os.path.exists(entry["path"]):
+            continue
+        try:
+            px = pd.read_csv(entry["path"], index_col=0)[["Open", "Close"]]
+        except:
+            continue
+        frames.append(pd.DataFrame({
+            "symbol": sym,
+            "target_date": _bar_dates(px.index),
+            "actual_open": px["Open"].to_numpy(),
+            "actual_close": px["Close"].to_numpy(),
+        }))
+    if not frames:
+        # Kolom bertipe sama dengan frame berisi: merge_asof butuh target_date datetime64
+        return pd.DataFrame({
+            "symbol": pd.Series(dtype=str),
+            "target_date": pd.Series(dtype="datetime64[ns]"),
+            "actual_open": pd.Series(dtype=float),
+            "actual_close": pd.Series(dtype=float),
+        })
+    return pd.concat(frames, ignore_index=True)
+
+
+# ============================================================
+#   AS-OF JOIN + METRIK PER PREDIKSI
+# ============================================================
+def evaluate_predictions(preds, prices, as_of=None):
+    """
+    Gabungkan tiap prediksi dengan bar pertama SETELAH base_date (as-of forward join).
+    Hanya bar bertanggal sebelum `as_of` (default: hari ini) yang dianggap final; bar
+    hari ini masih berjalan, jadi prediksi yang jatuh ke sana tetap actual_* = NaN (pending)
+    seperti prediksi yang belum punya bar realisasi.
+    """
+    if preds.empty:
+        return preds.assign(target_date=pd.NaT, actual_open=np.nan, actual_close=np.nan)
+
+    as_of = pd.Timestamp.today().normalize() if as_of is None else pd.Timestamp(as_of)
+    left = preds.sort_values("base_date")
+    right = prices[prices["target_date"] < as_of].sort_values("target_date")
+    # Resolusi datetime bisa beda (ns vs us dari to_datetime), merge_asof butuh tipe sama
+    right = right.assign(join_date=right["target_date"].astype("datetime64[ns]"))
+    left = left.assign(join_date=left["base_date"].astype("datetime64[ns]"))
+
+    out = pd.merge_asof(
+        left, right, on="join_date", by="symbol",
+        direction="forward", allow_exact_matches=False
+    ).drop(columns="join_date")
+
+    err_open = out["actual_open"] - out["predicted_open"]
+    err_close = out["actual_close"] - out["predicted_close"]
+    out["abs_err_open"] = err_open.abs()
+    out["abs_err_close"] = err_close.abs()
+    out["sq_err_close"] = err_close ** 2
+    out["ape_close"] = (err_close / out["actual_close"]).abs()
+    out["covered_open"] = out["actual_open"].between(out["open_lo"], out["open_hi"]).astype(float)
+    out["covered_close"] = out["actual_close"].between(out["close_lo"], out["close_hi"]).astype(float)
+    out["hits"] = (
+        np.sign(out["predicted_close"] - out["current_price"])
+        == np.sign(out["actual_close"] - out["current_price"])
+    ).astype(float)
+    return out
+
+
+# ============================================================
+#   STATE INKREMENTAL
+# ============================================================
+def _empty_state():
+    return {"log_offset": 0, "log_head": None, "pending": [], "aggregates": {}}
+
+
+def _load_state():
+    if not os.path.exists(ACCURACY_STATE_FILE):
+        return _empty_state()
+    try:
+        with open(ACCURACY_STATE_FILE) as f:
+            return json.load(f)
+    except:
+        return _empty_state()
+
+
+def _accumulate(aggregates, resolved):
+    resolved = resolved.assign(
+        n=1.0,
+        window=resolved["target_date"].dt.strftime("%Y-%m"),
+    )
+    for window_col in ["window", None]:
+        keys = ["symbol", "model_type"] + ([window_col] if window_col else [])
+        sums = resolved.groupby(keys)[_SUM_FIELDS].sum()
+        for key, row in sums.iterrows():
+            key = key if window_col else key + ("all",)
+            agg = aggregates.setdefault("|".join(key), dict.fromkeys(_SUM_FIELDS, 0.0))
+            for field in _SUM_FIELDS:
+                agg[field] += float(row[field])
+
+
+def update_accuracy(log_file=LOG_FILE):
+    """
+    Evaluasi hanya entry log baru + entry yang kemarin belum punya bar realisasi,
+    lalu tambahkan ke agregat yang tersimpan.
+    """
+    if not os.path.exists(log_file):
+        return _load_state()
+    try:
+        with open(log_file) as f:
+            logs = json.load(f)
+    except:
+        return _load_state()
+
+    with file_lock("accuracy"):
+        state = _load_state()
+        # Log dihapus / ditulis ulang → mulai dari awal
+        head = logs[0].get("timestamp") if logs else None
+        if len(logs) < state["log_offset"] or head != state["log_head"]:
+            state = _empty_state()
+            state["log_head"] = head
+
+        positions = state["pending"] + list(range(state["log_offset"], len(logs)))
+        preds = load_log_frame(logs, positions=positions)
+        evaluated = evaluate_predictions(preds, load_price_frame(preds["symbol"].unique()))
+
+        done = evaluated["actual_close"].notna()
+        if done.any():
+            _accumulate(state["aggregates"], evaluated[done])
+
+        state["pending"] = sorted(int(p) for p in evaluated.loc[~done, "log_pos"])
+        state["log_offset"] = len(logs)
+        atomic_write(ACCURACY_STATE_FILE, lambda f: json.dump(state, f, indent=2))
+    return state
+
+
+def accuracy_summary(state=None, window="all"):
+    """Metrik per symbol/model untuk satu window ('all' atau 'YYYY-MM')."""
+    state = state or _load_state()
+    rows = []
+    for key, agg in state["aggregates"].items():
+        symbol, model_type, win = key.split("|")
+        if win != window or agg["n"] == 0:
+            continue
+        n = agg["n"]
+        rows.append({
+            "symbol": symbol,
+            "model_type": model_type,
+            "window": win,
+            "n": int(n),
+            "mae_open": agg["abs_err_open"] / n,
+            "mae_close": agg["abs_err_close"] / n,
+            "rmse_close": (agg["sq_err_close"] / n) ** 0.5,
+            "mape_close": agg["ape_close"] / n * 100,
+            "coverage_open": agg["covered_open"] / n * 100,
+            "coverage_close": agg["covered_close"] / n * 100,
+            "hit_rate": agg["hits"] / n * 100,
+        })
+    return pd.DataFrame(rows).sort_values(["symbol", "model_type"]) if rows else pd.DataFrame()
+
+
+def accuracy_windows(state=None):
+    state = state or _load_state()
+    return sorted({k.split("|")[2] for k in state["aggregates"]} - {"all"}, reverse=True)
@@ -0,0 +1,404 @@
+import argparse
+import json
+import os
+import re
+import time
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import numpy as np
+from scipy import sparse
+
+from panel_indicators import build_panel_indicators, frames_to_panel, own_bars, pack
+from technical_analysis import _score_arrays
+from utils import atomic_write, to_serializable
+
+DATA_DIR = "stock_data"
+ALERT_RULES_FILE = os.path.join(DATA_DIR, "alert_rules.json")
+ALERT_LOG_FILE = os.path.join(DATA_DIR, "alerts.jsonl")
+
+# Bar terakhir yang dipakai untuk menghitung indikator (MA_200 + cadangan lag)
+TAIL_BARS = 300
+MAX_LAG = 5
+SYMBOL_CHUNK = 256
+
+OPS = {">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal,
+       "==": np.equal, "!=": np.not_equal}
+_OP_ALIASES = {"≥": ">=", "≤": "<=", "=": "=="}
+# a crosses above b  ⇔  a > b sekarang  dan  a <= b di bar sebelumnya
+_CROSS = {"above": (">", "<="), "below": ("<", ">=")}
+
+
+# ============================================================
+#   DSL: "RSI_14 crosses below 30", "Close > Resistance_20[1] and volume_ratio > 1.5"
+# ============================================================
+_TOKEN = re.compile(r"""
+    \s*(?:
+      (?P<cross>crosses\s+(?:above|below))
+    | (?P<and>and)\b
+    | (?P<op>>=|<=|==|!=|≥|≤|>|<|=)
+    | (?P<num>-?\d+(?:\.\d+)?)
+    | (?P<name>[A-Za-z_][A-Za-z0-9_]*)(?:\[(?P<lag>\d+)\])?
+    )""", re.VERBOSE | re.IGNORECASE)
+
+
+def _known_columns():
+    """Nama indikator yang boleh dipakai di rule (case-insensitive)."""
+    names = ["Open", "High", "Low", "Close", "Volume", "volume_ratio", "technical_score"]
+    probe = np.ones((2, 1))
+    names += list(build_panel_indicators(probe, probe, probe, probe, probe))
+    return {n.lower(): n for n in names}
+
+
+KNOWN_COLUMNS = _known_columns()
+
+
+def _tokenize(text):
+    pos, tokens = 0, []
+    text = text.strip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"rule tidak valid di posisi {pos}: {text!r}")
+        kind = m.lastgroup if m.lastgroup != "lag" else "name"
+        tokens.append((kind, m))
+        pos = m.end()
+    return tokens
+
+
+def _operand(kind, m, text):
+    if kind == "num":
+        return float(m.group("num"))
+    if kind == "name":
+        name = KNOWN_COLUMNS.get(m.group("name").lower())
+        if name is None:
+            raise ValueError(f"indikator tidak dikenal '{m.group('name')}' di rule {text!r}")
+        lag = int(m.group("lag") or 0)
+        if lag > MAX_LAG - 1:
+            raise ValueError(f"lag maksimum {MAX_LAG - 1}: {text!r}")
+        return (name, lag)
+    raise ValueError(f"operand diharapkan di rule {text!r}")
+
+
+def _shift(operand, lag):
+    return operand if isinstance(operand, float) else (operand[0], operand[1] + lag)
+
+
+def parse_rule(text):
+    """
+    Rule → daftar atom (lhs, op, rhs) yang di-AND-kan.
+    lhs selalu (kolom, lag); rhs (kolom, lag) atau konstanta float.
+    """
+    tokens = _tokenize(text)
+    atoms, i = [], 0
+    while True:
+        if i + 2 >= len(tokens):
+            raise ValueError(f"kondisi tidak lengkap di rule {text!r}")
+        lhs = _operand(*tokens[i], text)
+        kind, m = tokens[i + 1]
+        rhs = _operand(*tokens[i + 2], text)
+        if isinstance(lhs, float):
+            raise ValueError(f"sisi kiri kondisi harus indikator: {text!r}")
+
+        if kind == "cross":
+            if max(lhs[1], 0 if isinstance(rhs, float) else rhs[1]) + 1 > MAX_LAG - 1:
+                raise ValueError(f"lag maksimum {MAX_LAG - 1}: {text!r}")
+            now, before = _CROSS[m.group("cross").split()[-1].lower()]
+            atoms += [(lhs, now, rhs), (_shift(lhs, 1), before, _shift(rhs, 1))]
+        elif kind == "op":
+            op = m.group("op")
+            atoms.append((lhs, _OP_ALIASES.get(op, op), rhs))
+        else:
+            raise ValueError(f"operator diharapkan di rule {text!r}")
+
+        i += 3
+        if i == len(tokens):
+            return atoms
+        if tokens[i][0] != "and":
+            raise ValueError(f"'and' diharapkan di rule {text!r}")
+        i += 1
+
+
+# ============================================================
+#   KOMPILASI: ATOM UNIK → PREDIKAT VEKTORISASI
+# ============================================================
+class CompiledRules:
+    """
+    Semua rule dikompilasi sekali:
+      - atom identik di banyak rule dievaluasi sekali
+      - atom `kolom op konstanta` digrup per (kolom, lag, op): satu broadcast
+        nilai (S, 1) vs semua threshold (1, K)
+      - rule = AND atom → matriks sparse atom × rule; rule terpenuhi jika
+        jumlah atom yang benar == jumlah atom rule
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.ids = [r["id"] for r in rules]
+        atom_index = {}
+        rows, cols = [], []
+        for j, rule in enumerate(rules):
+            for atom in set(parse_rule(rule["rule"])):
+                rows.append(atom_index.setdefault(atom, len(atom_index)))
+                cols.append(j)
+        self.atoms = list(atom_index)
+        self.n_atoms = len(self.atoms)
+        # (R × A): baris rule, kolom atom
+        self.matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (cols, rows)), shape=(len(rules), self.n_atoms)
+        )
+        self.sizes = np.asarray(self.matrix.sum(axis=1)).ravel()
+
+        # Grup atom konstanta: (kolom, lag, op) → (index atom, threshold)
+        groups = {}
+        self.pair_atoms = []
+        for a, (lhs, op, rhs) in enumerate(self.atoms):
+            if isinstance(rhs, float):
+                groups.setdefault((lhs, op), ([], []))
+                groups[(lhs, op)][0].append(a)
+                groups[(lhs, op)][1].append(rhs)
+            else:
+                self.pair_atoms.append((a, lhs, op, rhs))
+        self.const_groups = [(lhs, op, np.array(idx), np.array(th))
+                             for (lhs, op), (idx, th) in groups.items()]
+
+        self.columns = sorted({lhs[0] for lhs, _, _ in self.atoms}
+                              | {rhs[0] for _, _, rhs in self.atoms if not isinstance(rhs, float)})
+
+        # Rule dengan daftar simbol: mask (R,) untuk rule global + scope per simbol
+        self.is_global = np.array([not r.get("symbols") for r in rules])
+        self.scoped = {}
+        for j, rule in enumerate(rules):
+            for sym in rule.get("symbols") or []:
+                self.scoped.setdefault(sym, []).append(j)
+
+    def atom_values(self, values):
+        """values: {(kolom, lag): array (S,)} → bool (S, A)."""
+        n = len(next(iter(values.values())))
+        out = np.zeros((n, self.n_atoms), dtype=bool)
+        with np.errstate(invalid="ignore"):
+            for lhs, op, idx, thresholds in self.const_groups:
+                v = values[lhs][:, None]
+                out[:, idx] = OPS[op](v, thresholds[None, :]) & ~np.isnan(v)
+            for a, lhs, op, rhs in self.pair_atoms:
+                left, right = values[lhs], values[rhs]
+                out[:, a] = OPS[op](left, right) & ~np.isnan(left) & ~np.isnan(right)
+        return out
+
+    def evaluate(self, values, symbols):
+        """Bool (S, R): rule mana yang terpenuhi untuk tiap simbol."""
+        atoms = self.atom_values(values)
+        # (R × A) @ (A × S) → jumlah atom benar per (rule, simbol)
+        counts = (self.matrix @ atoms.T.astype(np.float32)).T
+        hits = counts == self.sizes[None, :]
+        scope = np.tile(self.is_global, (len(symbols), 1))
+        for i, sym in enumerate(symbols):
+            if sym in self.scoped:
+                scope[i, self.scoped[sym]] = True
+        return hits & scope
+
+
+# ============================================================
+#   NILAI INDIKATOR TERAKHIR (PANEL, HANYA SIMBOL YANG BERUBAH)
+# ============================================================
+def latest_values(frames, columns, max_lag=MAX_LAG):
+    """
+    Hitung indikator untuk semua simbol sekaligus (panel) dan ambil `max_lag` bar terakhir
+    tiap simbol. Return (symbols, {(kolom, lag): array (S,)}).
+    Indikator dan lag dihitung atas bar milik tiap simbol (layout packed), jadi hasilnya
+    tidak bergantung pada simbol lain di chunk yang sama (kalender/hari libur berbeda).
+    """
+    frames = {s: df.tail(TAIL_BARS) for s, df in frames.items() if df is not None and len(df)}
+    dates, symbols, p = frames_to_panel(frames)
+    ind = build_panel_indicators(p["Open"], p["High"], p["Low"], p["Close"], p["Volume"], aligned=False)
+    layout = own_bars(*p.values())
+    p = {col: pack(arr, layout) for col, arr in p.items()}
+    ind.update(p)
+
+    if "technical_score" in columns or "volume_ratio" in columns:
+        ma = [ind[f"MA_{w}"] for w in [5, 10, 20, 50]]
+        parts = _score_arrays(p["Close"], ma, ind["RSI_14"], p["Volume"], ind["Volume_MA_20"],
+                              ind["MACD"], ind["MACD_Signal"])
+        # Sama seperti analyze_technical: skor hanya berlaku setelah semua indikator tersedia
+        warm = np.isnan(ind["MA_200"])
+        ind["technical_score"] = np.where(warm, np.nan, parts["technical_score"])
+        ind["volume_ratio"] = np.where(warm, np.nan, parts["volume_ratio"])
+
+    # Layout packed: baris terakhir = bar terakhir tiap simbol, lag k = baris T-1-k
+    values = {}
+    for col in columns:
+        arr = ind[col]
+        for lag in range(max_lag):
+            values[(col, lag)] = arr[len(dates) - 1 - lag] if lag < len(dates) else np.full(len(symbols), np.nan)
+    return symbols, values
+
+
+def _fingerprint(df):
+    """Berubah jika ada bar baru atau bar terakhir (parsial/intraday) di-update."""
+    tail = df.iloc[-1]
+    return (str(df.index[-1]), len(df), float(tail["Close"]), float(tail["Volume"]))
+
+
+# ============================================================
+#   SINK: LOG & WEBHOOK
+# ============================================================
+class LogSink:
+    def __init__(self, path=ALERT_LOG_FILE):
+        self.path = path
+
+    def send(self, alerts):
+        with open(self.path, "a") as f:
+            for alert in alerts:
+                f.write(json.dumps(to_serializable(alert)) + "\n")
+
+
+class WebhookSink:
+    """POST JSON {"alerts": [...]} ke URL (mis. stand-in lokal dari `python alerts.py receive`)."""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alerts):
+        body = json.dumps({"alerts": to_serializable(alerts)}).encode()
+        req = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+
+# ============================================================
+#   ENGINE (INKREMENTAL, EDGE-TRIGGERED)
+# ============================================================
+class AlertEngine:
+    """
+    Evaluasi rule untuk watchlist. Setiap `update(frames)`:
+      1. simbol yang bar terakhirnya tidak berubah dilewati
+      2. indikator simbol yang berubah dihitung dalam satu panel
+      3. rule dievaluasi hanya untuk simbol tersebut
+      4. alert dikirim saat rule BERUBAH menjadi true (tidak diulang tiap refresh)
+    """
+
+    def __init__(self, rules, sinks=None):
+        self.compiled = CompiledRules(rules)
+        self.sinks = sinks if sinks is not None else [LogSink()]
+        self._fingerprints = {}
+        self._active = {}  # symbol → bool (R,) hasil evaluasi terakhir
+        self.stats = {}
+
+    def changed_symbols(self, frames):
+        return [s for s, df in frames.items()
+                if df is not None and len(df) and self._fingerprints.get(s) != _fingerprint(df)]
+
+    def update(self, frames):
+        start = time.perf_counter()
+        changed = self.changed_symbols(frames)
+        alerts = []
+        for i in range(0, len(changed), SYMBOL_CHUNK):
+            chunk = {s: frames[s] for s in changed[i:i + SYMBOL_CHUNK]}
+            alerts += self._evaluate(chunk)
+        for s in changed:
+            self._fingerprints[s] = _fingerprint(frames[s])
+
+        if alerts:
+            for sink in self.sinks:
+                sink.send(alerts)
+        self.stats = {"symbols": len(frames), "changed": len(changed), "alerts": len(alerts),
+                      "rules": len(self.compiled.rules), "seconds": time.perf_counter() - start}
+        return alerts
+
+    def _evaluate(self, frames):
+        symbols, values = latest_values(frames, self.compiled.columns)
+        hits = self.compiled.evaluate(values, symbols)
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        alerts = []
+        rules = self.compiled.rules
+        for i, sym in enumerate(symbols):
+            prev = self._active.get(sym)
+            new = hits[i] if prev is None else hits[i] & ~prev
+            self._active[sym] = hits[i]
+            fired = np.flatnonzero(new)
+            if not fired.size:
+                continue
+            bar, close = str(frames[sym].index[-1]), float(frames[sym]["Close"].iloc[-1])
+            alerts += [{"timestamp": now, "symbol": sym, "rule_id": rules[j]["id"],
+                        "rule": rules[j]["rule"], "bar": bar, "close": close} for j in fired]
+        return alerts
+
+
+# ============================================================
+#   RULE STORE & CLI
+# ============================================================
+def load_rules(path=ALERT_RULES_FILE):
+    """[{"id": ..., "rule": "...", "symbols": [...] (opsional)}]"""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_rules(rules, path=ALERT_RULES_FILE):
+    CompiledRules(rules)  # validasi sebelum disimpan
+    atomic_write(path, lambda f: json.dump(rules, f, indent=2))
+
+
+def serve_webhook(port=8765, out_file=None):
+    """Stand-in webhook lokal: cetak (dan opsional simpan) alert yang diterima."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            for alert in payload.get("alerts", []):
+                print(f"[{alert['timestamp']}] {alert['symbol']}: {alert['rule']} (close {alert['close']})")
+                if out_file:
+                    with open(out_file, "a") as f:
+                        f.write(json.dumps(alert) + "\n")
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    print(f"webhook stand-in di http://127.0.0.1:{port}/")
+    HTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alert engine untuk watchlist")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    check = sub.add_parser("check", help="evaluasi rule untuk watchlist (loop jika --every)")
+    check.add_argument("symbols", nargs="+")
+    check.add_argument("--webhook", default=None, help="URL webhook (selain log)")
+    check.add_argument("--every", type=int, default=0, help="ulang tiap N detik")
+
+    add = sub.add_parser("add", help="tambah rule")
+    add.add_argument("rule")
+    add.add_argument("--symbols", nargs="*", default=None)
+
+    receive = sub.add_parser("receive", help="jalankan webhook stand-in lokal")
+    receive.add_argument("--port", type=int, default=8765)
+    receive.add_argument("--out", default=None)
+
+    args = parser.parse_args()
+    if args.cmd == "add":
+        rules = load_rules()
+        rules.append({"id": f"r{len(rules) + 1}", "rule": args.rule, "symbols": args.symbols})
+        save_rules(rules)
+        print(f"rule {rules[-1]['id']} disimpan")
+    elif args.cmd == "receive":
+        serve_webhook(args.port, args.out)
+    else:
+        from data_loader import get_cached_stock_data
+
+        sinks = [LogSink()] + ([WebhookSink(args.webhook)] if args.webhook else [])
+        engine = AlertEngine(load_rules(), sinks)
+        while True:
+            frames = {s.upper(): get_cached_stock_data(s.upper(), '2y') for s in args.symbols}
+            for alert in engine.update(frames):
+                print(f"{alert['symbol']}: {alert['rule']}")
+            print(engine.stats)
+            if not args.every:
+                break
+            time.sleep(args.every)
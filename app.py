@@ -1,10 +1,9 @@
 import streamlit as st
-import pandas as pd
 
-from data_loader import get_cached_stock_data
-from prediction import basic_predict_stock_price, advanced_predict_stock_price
-from technical_analysis import analyze_technical, build_technical_indicators
-from visualization import build_full_chart
+# Modul berat (sklearn, plotly, yfinance) di-import saat pertama dipakai,
+# supaya halaman sudah tampil sebelum library tersebut selesai di-load.
+from warmup import start_warmup
+from accuracy import update_accuracy, accuracy_summary, accuracy_windows
 from utils import (
     write_prediction_log, 
     read_prediction_log, 
@@ -36,6 +35,10 @@ st.markdown("""
 
 symbol = st.text_input("Masukkan simbol saham (contoh: AAPL, BBRI.JK, TSLA)", value="BBRI.JK").upper()
 model_choice = st.selectbox("Pilih Model Prediksi:", ["Basic Prediction", "Advanced Prediction"])
+interval = st.selectbox("Interval:", ["1d", "60m", "15m", "5m", "1m"],
+                        help="Intraday memprediksi bar berikutnya, bukan hari berikutnya")
+chart_range = st.selectbox("Rentang grafik candlestick:", ["Data model", "1 tahun", "5 tahun", "Semua"],
+                           help="Rentang panjang memakai agregat mingguan/bulanan (OHLC pyramid)")
 
 col_run, col_clear = st.columns([2,1])
 run_predict = col_run.button("🚀 Jalankan Prediksi")
@@ -54,10 +57,15 @@ if clear_log_btn:
 #   RUN PREDICTION
 # ============================================================
 if run_predict and symbol:
+    from prediction import basic_predict_stock_price, advanced_predict_stock_price
+    from technical_analysis import analyze_technical, build_technical_indicators, technical_score_series
+    from visualization import build_full_chart
+    from ohlc_pyramid import load_pyramid
+    import pandas as pd
 
     # ---------- BASIC -----------
     if model_choice == "Basic Prediction":
-        result, hist3, df = basic_predict_stock_price(symbol)
+        result, hist3, df = basic_predict_stock_price(symbol, interval=interval)
 
         if result is None:
             st.error("Data tidak cukup untuk prediksi model basic.")
@@ -70,7 +78,7 @@ if run_predict and symbol:
 
     # ---------- ADVANCED -------
     else:
-        result, hist3, fundamental, df = advanced_predict_stock_price(symbol)
+        result, hist3, fundamental, df = advanced_predict_stock_price(symbol, interval=interval)
 
         if result is None:
             st.error("Data tidak cukup untuk prediksi model advanced.")
@@ -89,6 +97,7 @@ if run_predict and symbol:
 
     df_ta = build_technical_indicators(df.copy())
     ta = analyze_technical(symbol, df)
+    score_hist = technical_score_series(df)
 
     col1, col2, col3 = st.columns(3)
     col1.metric("Technical Score", f"{ta['technical_score']}/100")
@@ -103,13 +112,24 @@ if run_predict and symbol:
     # ============================================================
     st.subheader("📉 Grafik Harga & Indikator")
 
-    charts = build_full_chart(df_ta, symbol)
+    # Streamlit tidak meneruskan event zoom ke server: level dipilih sekali
+    # untuk rentang yang dipilih dan hanya level itu yang dikirim ke browser
+    pyramid = None
+    start = None
+    if chart_range != "Data model":
+        pyramid = load_pyramid(symbol, interval)
+        years = {"1 tahun": 1, "5 tahun": 5}.get(chart_range)
+        if years and pyramid:
+            start = max(level.index[-1] for level in pyramid.values()) - pd.DateOffset(years=years)
+    charts = build_full_chart(df_ta, symbol, score_hist, pyramid=pyramid, start=start, all_levels=False,
+                              interval=interval)
 
     st.plotly_chart(charts["candlestick"], use_container_width=True)
     st.plotly_chart(charts["rsi"], use_container_width=True)
     st.plotly_chart(charts["macd"], use_container_width=True)
     st.plotly_chart(charts["volume"], use_container_width=True)
     st.plotly_chart(charts["bollinger"], use_container_width=True)
+    st.plotly_chart(charts["technical_score"], use_container_width=True)
 
 
 # ============================================================
@@ -124,10 +144,82 @@ else:
     st.info("Belum ada log prediksi.")
 
 
+# ============================================================
+#   AKURASI PREDIKSI (LOG vs HARGA REALISASI)
+# ============================================================
+st.subheader("🎯 Akurasi Prediksi")
+
+acc_state = update_accuracy()
+acc_window = st.selectbox("Window", ["all"] + accuracy_windows(acc_state))
+acc = accuracy_summary(acc_state, acc_window)
+if not acc.empty:
+    st.dataframe(acc.round(3), use_container_width=True)
+    st.caption(f"{len(acc_state['pending'])} prediksi masih menunggu bar realisasi.")
+else:
+    st.info("Belum ada prediksi yang bisa dievaluasi.")
+
+
+# ============================================================
+#   RISIKO PORTOFOLIO (SIMBOL DI CACHE)
+# ============================================================
+st.subheader("📐 Risiko & Korelasi Portofolio")
+
+cached = list_cached_symbols()
+portfolio_symbols = st.multiselect("Simbol portofolio (dari cache):", cached,
+                                   default=cached[:10])
+weights_text = st.text_input("Bobot (opsional, dipisah koma, urutan sama dengan simbol):", value="")
+
+if len(portfolio_symbols) >= 2 and st.button("🔍 Hitung Risiko Portofolio"):
+    import pandas as pd
+    from portfolio import portfolio_summary, portfolio_volatility, update_ew_covariance
+    from visualization import plot_correlation_heatmap
+
+    weights = None
+    if weights_text.strip():
+        try:
+            weights = dict(zip(portfolio_symbols, [float(w) for w in weights_text.split(",")]))
+        except ValueError:
+            st.warning("Bobot tidak valid — memakai bobot sama rata.")
+
+    with st.spinner("Menghitung kovarians..."):
+        try:
+            summary, prices, returns, cov = portfolio_summary(portfolio_symbols, weights)
+            # State EW tersimpan: render berikutnya hanya menambahkan bar baru
+            ew = update_ew_covariance("app", summary["symbols"], returns=returns)
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
+
+    if len(summary["symbols"]) < 2:
+        st.error("Minimal dua simbol dengan data cache diperlukan.")
+    else:
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Volatilitas tahunan", f"{summary['volatility']:.2%}")
+        col2.metric(f"Volatilitas EW (halflife {ew.halflife:g} bar)", f"{portfolio_volatility(ew.covariance(), weights):.2%}")
+        col3.metric("Max drawdown", f"{summary['max_drawdown']:.2%}")
+        if "portfolio_beta" in summary:
+            col4.metric(f"Beta vs {summary['index']}", f"{summary['portfolio_beta']:.2f}")
+
+        st.caption("Korelasi exponentially weighted (bar terbaru berbobot lebih besar)")
+        st.plotly_chart(plot_correlation_heatmap(ew.correlation()), use_container_width=True)
+        per_symbol = {
+            "Volatilitas": summary["symbol_volatility"],
+            "Max Drawdown": summary["symbol_max_drawdown"],
+        }
+        if "beta" in summary:
+            per_symbol["Beta"] = summary["beta"]
+        st.dataframe(pd.DataFrame(per_symbol).round(3), use_container_width=True)
+
+
 # ============================================================
 #   CACHE LIST
 # ============================================================
 st.subheader("📦 Cache Symbols")
 
-cached = list_cached_symbols()
 st.write(cached)
+
+
+# ============================================================
+#   WARM-UP (SETELAH HALAMAN TAMPIL)
+# ============================================================
+start_warmup()
@@ -0,0 +1,101 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from alerts import AlertEngine, CompiledRules, latest_values
+from bench_shared_store import synthetic_universe
+from technical_analysis import analyze_technical
+
+_TEMPLATES = [
+    "RSI_14 crosses below {lo}",
+    "RSI_14 crosses above {hi}",
+    "technical_score >= {score}",
+    "Close > Resistance_20[1] and volume_ratio > {ratio}",
+    "MACD crosses above MACD_Signal and RSI_14 < {hi}",
+    "Close < BB_Lower and RSI_14 < {lo}",
+    "Close crosses above MA_{ma}",
+    "Vol_20 > {vol} and Close < MA_50",
+]
+
+
+def random_rules(n_rules, seed=0):
+    rng = np.random.default_rng(seed)
+    rules = []
+    for i in range(n_rules):
+        template = _TEMPLATES[i % len(_TEMPLATES)]
+        rules.append({"id": f"r{i}", "rule": template.format(
+            lo=int(rng.integers(20, 40)), hi=int(rng.integers(60, 80)),
+            score=int(rng.integers(12, 18)) * 5, ratio=round(float(rng.uniform(1.2, 2.5)), 1),
+            ma=int(rng.choice([20, 50, 100, 200])), vol=round(float(rng.uniform(0.01, 0.03)), 3),
+        )})
+    return rules
+
+
+class CountingSink:
+    def __init__(self):
+        self.count = 0
+
+    def send(self, alerts):
+        self.count += len(alerts)
+
+
+def _append_bar(df):
+    step = df.index[-1] + pd.offsets.BDay(1)
+    bar = df.iloc[[-1]].set_axis([step]) * [1.01, 1.01, 1.01, 1.01, 1.0]
+    return pd.concat([df, bar])
+
+
+# ============================================================
+#   BENCHMARK: ALERT ENGINE (10K RULE × 1K SIMBOL)
+# ============================================================
+def run_bench(n_symbols=1000, n_rules=10000, changed_frac=0.05):
+    frames = synthetic_universe(n_symbols, 300, seed=1)
+    rules = random_rules(n_rules)
+
+    start = time.perf_counter()
+    compiled = CompiledRules(rules)
+    print(f"compile {n_rules} rule → {compiled.n_atoms} atom unik, "
+          f"{len(compiled.const_groups)} grup threshold: {time.perf_counter() - start:.3f}s")
+
+    # Komponen: indikator panel vs evaluasi rule
+    start = time.perf_counter()
+    symbols, values = latest_values(frames, compiled.columns)
+    t_ind = time.perf_counter() - start
+    start = time.perf_counter()
+    hits = compiled.evaluate(values, symbols)
+    t_eval = time.perf_counter() - start
+    pairs = n_symbols * n_rules
+    print(f"indikator panel {n_symbols} simbol: {t_ind:.3f}s")
+    print(f"evaluasi {n_rules} rule × {n_symbols} simbol: {t_eval:.3f}s "
+          f"({pairs / t_eval / 1e6:.1f} juta pasangan rule×simbol/detik, {hits.sum()} true)")
+
+    # Engine: refresh pertama, tanpa perubahan, lalu sebagian kecil simbol dapat bar baru
+    sink = CountingSink()
+    engine = AlertEngine(rules, sinks=[sink])
+    engine.update(frames)
+    print(f"refresh awal       : {engine.stats['seconds']:.3f}s, {engine.stats['alerts']} alert")
+    engine.update(frames)
+    print(f"refresh tanpa bar baru: {engine.stats['seconds']:.3f}s, {engine.stats['changed']} simbol dievaluasi")
+    n_changed = int(n_symbols * changed_frac)
+    for sym in list(frames)[:n_changed]:
+        frames[sym] = _append_bar(frames[sym])
+    engine.update(frames)
+    print(f"refresh {n_changed} simbol berubah: {engine.stats['seconds']:.3f}s, {engine.stats['alerts']} alert baru")
+
+    # Pembanding: analyze_technical per simbol setiap refresh
+    sample = list(frames)[:50]
+    start = time.perf_counter()
+    for sym in sample:
+        analyze_technical(sym, frames[sym])
+    t_loop = (time.perf_counter() - start) / len(sample) * n_symbols
+    print(f"analyze_technical per simbol (estimasi {n_symbols} simbol): {t_loop:.2f}s per refresh")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput alert engine")
+    parser.add_argument("--symbols", type=int, default=1000)
+    parser.add_argument("--rules", type=int, default=10000)
+    args = parser.parse_args()
+    run_bench(args.symbols, args.rules)
@@ -0,0 +1,94 @@
+import argparse
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error
+from sklearn.preprocessing import RobustScaler
+
+from data_loader import get_cached_stock_data, get_cached_fundamental_data
+from feature_selection import select_features
+from features import build_advanced_dataset, calculate_fundamental_score
+from prediction import ADVANCED_MODEL_PARAMS
+
+
+# ============================================================
+#   BENCHMARK: SEMUA FITUR vs FITUR TERPILIH (MODEL ADVANCED)
+# ============================================================
+def _fit_eval(X, y_open, y_close):
+    """Train open+close forest pada 80% awal, MAE close pada 20% akhir."""
+    split = int(len(X) * 0.8)
+    scaler = RobustScaler()
+    X_train = scaler.fit_transform(X.iloc[:split])
+    X_test = scaler.transform(X.iloc[split:])
+
+    start = time.perf_counter()
+    model_open = RandomForestRegressor(**ADVANCED_MODEL_PARAMS).fit(X_train, y_open.iloc[:split])
+    model_close = RandomForestRegressor(**ADVANCED_MODEL_PARAMS).fit(X_train, y_close.iloc[:split])
+    fit_time = time.perf_counter() - start
+
+    mae_open = mean_absolute_error(y_open.iloc[split:], model_open.predict(X_test))
+    mae_close = mean_absolute_error(y_close.iloc[split:], model_close.predict(X_test))
+    return fit_time, mae_open, mae_close
+
+
+def bench_symbol(symbol, top_k=None, method="impurity"):
+    data = get_cached_stock_data(symbol, '3y')
+    if data is None or len(data) < 150:
+        return None
+    fundamental = get_cached_fundamental_data(symbol)
+    fund_score = calculate_fundamental_score(fundamental)
+
+    start = time.perf_counter()
+    X, y_open, y_close = build_advanced_dataset(data, fundamental, fund_score)
+    build_full = time.perf_counter() - start
+
+    # Seleksi pakai 80% awal saja supaya evaluasi holdout tetap jujur
+    split = int(len(X) * 0.8)
+    kwargs = {"method": method}
+    if top_k is not None:
+        kwargs["top_k"] = top_k
+    start = time.perf_counter()
+    selected = select_features(X.iloc[:split], y_close.iloc[:split], **kwargs)
+    select_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    Xs, ys_open, ys_close = build_advanced_dataset(data, fundamental, fund_score, columns=selected)
+    build_sel = time.perf_counter() - start
+    # Baris sama dengan full supaya MAE sebanding
+    Xs, ys_open, ys_close = Xs.loc[X.index], ys_open.loc[X.index], ys_close.loc[X.index]
+
+    fit_full, mae_open_full, mae_close_full = _fit_eval(X, y_open, y_close)
+    fit_sel, mae_open_sel, mae_close_sel = _fit_eval(Xs, ys_open, ys_close)
+
+    return {
+        "symbol": symbol,
+        "n_full": X.shape[1], "n_selected": len(selected),
+        "build_full_s": build_full, "build_sel_s": build_sel, "select_s": select_time,
+        "fit_full_s": fit_full, "fit_sel_s": fit_sel,
+        "mae_close_full": mae_close_full, "mae_close_sel": mae_close_sel,
+        "mae_open_full": mae_open_full, "mae_open_sel": mae_open_sel,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Feature selection benchmark")
+    parser.add_argument("symbols", nargs="*", default=["BBRI.JK", "BBCA.JK", "TLKM.JK", "AAPL"])
+    parser.add_argument("--top-k", type=int, default=None)
+    parser.add_argument("--method", choices=["impurity", "permutation"], default="impurity")
+    args = parser.parse_args()
+
+    rows = [r for r in (bench_symbol(s.upper(), args.top_k, args.method) for s in args.symbols) if r]
+    for r in rows:
+        print(f"{r['symbol']:10s} features {r['n_full']:3d} -> {r['n_selected']:3d} | "
+              f"build {r['build_full_s']:.3f}s -> {r['build_sel_s']:.3f}s | "
+              f"fit {r['fit_full_s']:.2f}s -> {r['fit_sel_s']:.2f}s | "
+              f"MAE close {r['mae_close_full']:.4f} -> {r['mae_close_sel']:.4f} | "
+              f"MAE open {r['mae_open_full']:.4f} -> {r['mae_open_sel']:.4f}")
+
+    if rows:
+        fit_full = sum(r["fit_full_s"] for r in rows)
+        fit_sel = sum(r["fit_sel_s"] for r in rows)
+        d_mae = np.mean([r["mae_close_sel"] / r["mae_close_full"] - 1 for r in rows]) * 100
+        print(f"TOTAL fit {fit_full:.2f}s -> {fit_sel:.2f}s "
+              f"({(1 - fit_sel / fit_full) * 100:.1f}% lebih cepat), MAE close {d_mae:+.1f}%")
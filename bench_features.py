@@ -0,0 +1,53 @@
+import argparse
+import os
+import tempfile
+import time
+
+from bench_pyramid import synthetic_history
+
+
+def _timeit(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# ============================================================
+#   BENCHMARK: FITUR DARI AWAL vs FEATURE STORE (TAIL-ONLY)
+# ============================================================
+def run_bench(lengths=(750, 2500, 5000, 10000, 20000)):
+    from features import compute_technical_features
+    import feature_store
+
+    # Feature store ditulis di folder sementara, bukan stock_data/ milik repo
+    os.chdir(tempfile.mkdtemp(prefix="bench_features_"))
+    os.makedirs(feature_store.DATA_DIR, exist_ok=True)
+
+    print(f"{'bar':>6} {'trend apply':>12} {'dari awal':>10} {'store +1 bar':>13} {'store tanpa bar baru':>21}")
+    for n in lengths:
+        df = synthetic_history(n + 1, "D", seed=n)
+        close = df['Close']
+
+        # Trend_5/Trend_20 versi lama: callback Python per baris
+        t_apply = _timeit(lambda: [close.rolling(w).apply(lambda x: 1 if x[-1] > x[0] else -1, raw=True)
+                                   for w in (5, 20)], repeat=1)
+        t_full = _timeit(lambda: compute_technical_features(df))
+
+        # Refresh harian: store berisi n bar, lalu satu bar baru masuk
+        def refresh():
+            feature_store._write("BENCH", "1d", *feature_store.build(df.iloc[:n]))
+            start = time.perf_counter()
+            feature_store.load_features("BENCH", df)
+            return time.perf_counter() - start
+        t_tail = min(refresh() for _ in range(5))
+        t_hit = _timeit(lambda: feature_store.load_features("BENCH", df))
+        print(f"{n:>6} {t_apply * 1000:>9.0f} ms {t_full * 1000:>7.1f} ms {t_tail * 1000:>10.1f} ms "
+              f"{t_hit * 1000:>18.1f} ms")
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description="Waktu build fitur: dari awal vs feature store").parse_args()
+    run_bench()
@@ -0,0 +1,86 @@
+import argparse
+import os
+import pickle
+import tempfile
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+from forest_export import CompactForest, export_forest
+from prediction import ADVANCED_MODEL_PARAMS
+
+
+# ============================================================
+#   BENCHMARK: SKLEARN FOREST vs COMPACT FOREST
+# ============================================================
+def _timeit(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_bench(n_train=700, n_features=44, batch_sizes=(1, 100, 1000, 20000), seed=0):
+    """Ukuran training mirip model advanced (3 tahun data, ~44 fitur)."""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_train, n_features))
+    y = X[:, 0] * 3 + X[:, 1] - X[:, 2] ** 2 + rng.normal(size=n_train)
+
+    model = RandomForestRegressor(**ADVANCED_MODEL_PARAMS).fit(X, y)
+    forest = export_forest(model)
+    forest32 = export_forest(model, compact=True)
+
+    X_test = rng.normal(size=(max(batch_sizes), n_features))
+    ref = model.predict(X_test)
+    print(f"exact match (float64 leaves) : {np.array_equal(ref, forest.predict(X_test))}")
+    print(f"max abs diff (float32 leaves): {np.abs(ref - forest32.predict(X_test)).max():.3e}")
+    per_tree_ref = np.array([est.predict(X_test[:10]) for est in model.estimators_])
+    print(f"per-tree exact match         : {np.array_equal(per_tree_ref, forest.predict_per_tree(X_test[:10]))}")
+
+    # Ukuran & waktu load
+    tmp = tempfile.mkdtemp(prefix="bench_forest_")
+    pkl_path = os.path.join(tmp, "forest.pkl")
+    with open(pkl_path, "wb") as f:
+        pickle.dump(model, f)
+    npz_path = os.path.join(tmp, "forest.npz")
+    np.savez(npz_path, **forest.to_arrays())
+    npz32_path = os.path.join(tmp, "forest32.npz")
+    np.savez(npz32_path, **forest32.to_arrays())
+
+    def load_pickle():
+        with open(pkl_path, "rb") as f:
+            pickle.load(f)
+
+    def load_npz(path):
+        with np.load(path) as arrays:
+            CompactForest.from_arrays(arrays)
+
+    print(f"\n{'format':18s} {'size (KB)':>10s} {'load (ms)':>10s}")
+    for name, path, loader in [
+        ("pickle sklearn", pkl_path, load_pickle),
+        ("npz compact", npz_path, lambda: load_npz(npz_path)),
+        ("npz compact f32", npz32_path, lambda: load_npz(npz32_path)),
+    ]:
+        print(f"{name:18s} {os.path.getsize(path) / 1024:10.1f} {_timeit(loader) * 1000:10.2f}")
+
+    # Throughput
+    print(f"\n{'rows':>6s} {'sklearn predict':>16s} {'compact predict':>16s} "
+          f"{'sklearn per-tree':>17s} {'compact per-tree':>17s}   (rows/s)")
+    for n in batch_sizes:
+        Xb = X_test[:n]
+        t_sk = _timeit(lambda: model.predict(Xb))
+        t_cf = _timeit(lambda: forest.predict(Xb))
+        t_skt = _timeit(lambda: [est.predict(Xb) for est in model.estimators_], repeat=1)
+        t_cft = _timeit(lambda: forest.predict_per_tree(Xb))
+        print(f"{n:6d} {n / t_sk:16.0f} {n / t_cf:16.0f} {n / t_skt:17.0f} {n / t_cft:17.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact forest benchmark")
+    parser.add_argument("--train-rows", type=int, default=700)
+    parser.add_argument("--features", type=int, default=44)
+    args = parser.parse_args()
+    run_bench(args.train_rows, args.features)
@@ -0,0 +1,98 @@
+import argparse
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from bench_shared_store import synthetic_universe
+from features import naive_index
+from panel_indicators import build_panel_indicators, frames_to_panel, indicators_for_symbol
+from technical_analysis import build_technical_indicators
+
+
+# ============================================================
+#   BENCHMARK: LOOP PER SIMBOL vs PANEL (TIME × SYMBOL)
+# ============================================================
+def mixed_universe(n_symbols, n_days=1260, seed=0):
+    """
+    Separuh simbol US (America/New_York, melewati DST), separuh JK (Asia/Jakarta), masing-
+    masing dengan hari libur bursa sendiri. Sebagian frame US lewat CSV → index str dengan
+    offset campuran, seperti cache yang dibaca ulang data_loader.
+    """
+    rng = np.random.default_rng(seed)
+    frames = synthetic_universe(n_symbols, n_days, seed=seed)
+    dates = next(iter(frames.values())).index
+    holidays = {tz: dates[rng.choice(len(dates), len(dates) // 40, replace=False)]
+                for tz in ("America/New_York", "Asia/Jakarta")}
+    mixed = {}
+    for i, (sym, df) in enumerate(frames.items()):
+        tz = "America/New_York" if i % 2 == 0 else "Asia/Jakarta"
+        df = df.drop(holidays[tz], errors="ignore").tz_localize(tz)
+        if tz == "Asia/Jakarta":
+            sym += ".JK"
+        elif i % 10 == 0:
+            buf = io.StringIO()
+            df.to_csv(buf)
+            buf.seek(0)
+            df = pd.read_csv(buf, index_col=0, parse_dates=True)
+        mixed[sym] = df
+    return mixed
+
+
+def per_symbol(frames):
+    out = {}
+    for sym, df in frames.items():
+        ind = build_technical_indicators(df.copy())
+        ind['EMA_12'] = df['Close'].ewm(span=12).mean()
+        ind['EMA_26'] = df['Close'].ewm(span=26).mean()
+        returns = df['Close'].pct_change()
+        for win in [5, 20, 50]:
+            ind[f'Vol_{win}'] = returns.rolling(win).std()
+        out[sym] = ind
+    return out
+
+
+def panel(frames):
+    dates, symbols, p = frames_to_panel(frames)
+    return dates, symbols, build_panel_indicators(p['Open'], p['High'], p['Low'], p['Close'], p['Volume'])
+
+
+def max_rel_diff(frames, ref, result):
+    """Bandingkan panel vs per-simbol di baris yang dikembalikan versi per-simbol (setelah dropna)."""
+    dates, symbols, indicators = result
+    worst = 0.0
+    for sym in list(frames)[:50]:
+        got = indicators_for_symbol(indicators, dates, symbols, sym).reindex(naive_index(ref[sym].index))
+        for col in got.columns:
+            a, b = ref[sym][col].to_numpy(), got[col].to_numpy()
+            worst = max(worst, np.nanmax(np.abs(a - b) / np.maximum(np.abs(a), 1e-12)))
+            if np.isnan(b).any():
+                raise AssertionError(f"{sym} {col}: NaN di baris yang valid")
+    return worst
+
+
+def run_bench(sizes=(10, 100, 1000), n_days=1260, repeat=3, mixed=False):
+    print(f"{'symbols':>8} {'per-simbol':>11} {'panel':>8} {'speedup':>8} {'max rel diff':>13}")
+    for n in sizes:
+        frames = mixed_universe(n, n_days, seed=n) if mixed else synthetic_universe(n, n_days, seed=n)
+        t_loop = t_panel = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ref = per_symbol(frames)
+            t_loop = min(t_loop, time.perf_counter() - start)
+            start = time.perf_counter()
+            result = panel(frames)
+            t_panel = min(t_panel, time.perf_counter() - start)
+        diff = max_rel_diff(frames, ref, result)
+        print(f"{n:>8} {t_loop:>10.3f}s {t_panel:>7.3f}s {t_loop / t_panel:>7.1f}x {diff:>13.1e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-symbol vs panel indicator computation")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--days", type=int, default=1260)
+    parser.add_argument("--mixed", action="store_true",
+                        help="Universe campuran US/JK (timezone & hari libur berbeda)")
+    args = parser.parse_args()
+    run_bench(args.sizes, args.days, mixed=args.mixed)
@@ -0,0 +1,97 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+
+# ============================================================
+#   BENCHMARK: CANDLESTICK PENUH vs OHLC PYRAMID
+# ============================================================
+def synthetic_history(n_bars, freq, seed=0, session=None):
+    rng = np.random.default_rng(seed)
+    if session:
+        days = pd.bdate_range(end="2025-12-31", periods=n_bars // session + 1)
+        index = pd.DatetimeIndex(np.concatenate([
+            pd.date_range(d + pd.Timedelta(hours=9, minutes=30), periods=session, freq=freq)
+            for d in days
+        ]))[-n_bars:]
+    else:
+        index = pd.bdate_range(end="2025-12-31", periods=n_bars)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    return pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.002, n_bars)),
+        "High": close * 1.01, "Low": close * 0.99, "Close": close,
+        "Volume": rng.integers(1e4, 1e6, n_bars).astype(float),
+    }, index=index)
+
+
+def _timeit(fn, repeat=3):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def _render(fig):
+    # Serialisasi JSON = payload yang dikirim ke browser (Streamlit / HTML)
+    return len(fig.to_json())
+
+
+def run_case(label, df, base, ranges):
+    from ohlc_pyramid import update_pyramid, pyramid_levels, choose_level
+    from visualization import plot_candlestick, plot_candlestick_pyramid
+
+    symbol = f"BENCH_{base}"
+    t_build, pyramid = _timeit(lambda: update_pyramid(symbol, df, base, rebuild=True), repeat=1)
+    # Update inkremental: satu bar baru ditambahkan ke histori
+    step = df.index[-1] - df.index[-2]
+    nxt = df.iloc[[-1]].set_axis([df.index[-1] + step])
+    t_incr, _ = _timeit(lambda: update_pyramid(symbol, pd.concat([df, nxt]), base), repeat=1)
+    print(f"\n{label}: {len(df)} bar dasar, levels "
+          + ", ".join(f"{k}={len(v)}" for k, v in pyramid.items()))
+    print(f"  build pyramid {t_build * 1000:.0f} ms, update inkremental (1 bar) {t_incr * 1000:.0f} ms")
+
+    levels = pyramid_levels(df, pyramid, base)
+    print(f"  {'rentang':<10} {'level':>6} {'candle':>7} {'payload penuh':>14} {'payload':>9} "
+          f"{'render penuh':>13} {'render':>8}")
+    with_ma = df.assign(**{f"MA_{w}": df["Close"].rolling(w).mean() for w in [5, 20, 50]})
+    for name, start in ranges:
+        visible = with_ma.loc[start:]
+        t_full, full = _timeit(lambda: _render(plot_candlestick(visible, symbol)))
+        t_pyr, small = _timeit(lambda: _render(
+            plot_candlestick_pyramid(levels, symbol, start=start, all_levels=False)))
+        level, level_df = choose_level(levels, start)
+        print(f"  {name:<10} {level:>6} {len(level_df.loc[start:]):>7} {full / 1e3:>11.0f} KB "
+              f"{small / 1e3:>6.0f} KB {t_full * 1000:>10.0f} ms {t_pyr * 1000:>5.0f} ms")
+
+    t_all, all_payload = _timeit(lambda: _render(plot_candlestick_pyramid(levels, symbol)))
+    print(f"  HTML semua level + zoom callback: {all_payload / 1e3:.0f} KB, {t_all * 1000:.0f} ms")
+
+
+def run_bench():
+    # Cache pyramid ditulis di folder sementara, bukan stock_data/ milik repo
+    os.chdir(tempfile.mkdtemp(prefix="bench_pyramid_"))
+
+    daily = synthetic_history(252 * 20, "D")
+    end = daily.index[-1]
+    run_case("Harian 20 tahun", daily, "1d", [
+        ("semua", None), ("5 tahun", end - pd.DateOffset(years=5)),
+        ("1 tahun", end - pd.DateOffset(years=1)), ("3 bulan", end - pd.DateOffset(months=3)),
+    ])
+
+    intraday = synthetic_history(78 * 120, "5min", session=78)
+    end = intraday.index[-1]
+    run_case("Intraday 5m, 6 bulan", intraday, "5m", [
+        ("semua", None), ("1 bulan", end - pd.DateOffset(months=1)),
+        ("1 minggu", end - pd.DateOffset(weeks=1)), ("1 hari", end - pd.DateOffset(days=1)),
+    ])
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description="Payload & render time: candlestick penuh vs OHLC pyramid").parse_args()
+    run_bench()
@@ -0,0 +1,94 @@
+import argparse
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from shared_store import SharedPriceStore, init_worker, worker_store
+
+
+# ============================================================
+#   BENCHMARK: PICKLE DISPATCH vs SHARED PRICE STORE
+# ============================================================
+def synthetic_universe(n_symbols=500, n_days=1260, seed=0):
+    """~5 tahun bar harian per simbol; sebagian simbol listing belakangan."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2025-12-31", periods=n_days)
+    frames = {}
+    for i in range(n_symbols):
+        start = rng.integers(0, n_days // 4) if i % 10 == 0 else 0
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days - start)))
+        frames[f"S{i:04d}"] = pd.DataFrame({
+            "Open": close * (1 + rng.normal(0, 0.005, len(close))),
+            "High": close * 1.01, "Low": close * 0.99, "Close": close,
+            "Volume": rng.integers(1e5, 1e7, len(close)).astype(float),
+        }, index=dates[start:])
+    return frames
+
+
+def _screen(df):
+    """Kerja per simbol yang ringan (seperti screening): momentum, volatilitas, jarak ke MA200."""
+    close = df["Close"].to_numpy()
+    ret = np.diff(np.log(close))
+    return (close[-1] / close[-126] - 1, ret[-252:].std() * np.sqrt(252),
+            close[-1] / close[-200:].mean() - 1)
+
+
+def _screen_pickled(df):
+    return _screen(df)
+
+
+def _screen_shared(symbol):
+    return _screen(worker_store().frame(symbol))
+
+
+def run_bench(n_symbols=500, n_days=1260, n_jobs=4, repeat=3):
+    frames = synthetic_universe(n_symbols, n_days)
+    symbols = list(frames)
+    payload = sum(len(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)) for df in frames.values())
+    print(f"universe: {n_symbols} simbol × {n_days} bar, pickle payload {payload / 1e6:.1f} MB")
+
+    start = time.perf_counter()
+    store = SharedPriceStore.create(frames)
+    print(f"create store            : {time.perf_counter() - start:.3f}s "
+          f"({store.nbytes / 1e6:.1f} MB di {store.path})")
+
+    try:
+        ref = [_screen(frames[s]) for s in symbols]
+        results = {}
+        for label in ["pickle dispatch", "shared store"]:
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                if label == "pickle dispatch":
+                    with ProcessPoolExecutor(n_jobs) as pool:
+                        out = list(pool.map(_screen_pickled, [frames[s] for s in symbols],
+                                            chunksize=16))
+                else:
+                    with ProcessPoolExecutor(n_jobs, initializer=init_worker,
+                                             initargs=(store.path,)) as pool:
+                        out = list(pool.map(_screen_shared, symbols, chunksize=16))
+                best = min(best, time.perf_counter() - start)
+            assert np.allclose(out, ref)
+            results[label] = best
+            print(f"{label:<24}: {best:.3f}s (pool start + {n_symbols} task)")
+
+        print(f"speedup                 : {results['pickle dispatch'] / results['shared store']:.1f}x")
+
+        # Refresh: generasi baru, worker lama pindah lewat sync()
+        start = time.perf_counter()
+        store.refresh(frames)
+        print(f"refresh (generasi {store.generation})    : {time.perf_counter() - start:.3f}s")
+    finally:
+        store.unlink()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pickle dispatch vs shared-memory price store")
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--days", type=int, default=1260)
+    parser.add_argument("--jobs", type=int, default=4)
+    args = parser.parse_args()
+    run_bench(args.symbols, args.days, args.jobs)
@@ -0,0 +1,90 @@
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HISTORY_FILE = os.path.join(HERE, "startup_bench.jsonl")
+
+# Import yang dulu terjadi di top-level app.py sebelum halaman tampil
+EAGER_IMPORTS = [
+    "import streamlit",
+    "import pandas",
+    "import data_loader",
+    "import prediction",
+    "import technical_analysis",
+    "import visualization",
+    "import accuracy",
+    "import utils",
+]
+
+
+# ============================================================
+#   STARTUP BENCHMARK (python -X importtime)
+# ============================================================
+def first_render_imports(app_file=os.path.join(HERE, "app.py")):
+    """Import top-level app.py (yang dieksekusi sebelum render pertama)."""
+    with open(app_file) as f:
+        tree = ast.parse(f.read())
+    stmts = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            stmts += [f"import {a.name}" for a in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            stmts.append(f"import {node.module}")
+    return stmts
+
+
+def measure(imports):
+    """Return (wall_s, total_import_s, top-level modules sorted by cumulative time)."""
+    code = "; ".join(imports)
+    # cwd sementara supaya import modul tidak membuat stock_data/ di repo
+    env = dict(os.environ, PYTHONPATH=HERE)
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=tmp, env=env, capture_output=True, text=True
+        )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    top = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = [p for p in line.split(":", 1)[1].split("|")]
+        # Module top-level: nama tanpa indentasi tambahan
+        if not name.startswith("  "):
+            top.append((name.strip(), int(cumulative) / 1e6))
+    total = sum(t for _, t in top)
+    return wall, total, sorted(top, key=lambda t: t[1], reverse=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time-to-first-render import benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--record", action="store_true", help=f"append hasil ke {HISTORY_FILE}")
+    args = parser.parse_args()
+
+    results = {}
+    for label, imports in [("eager (semua modul)", EAGER_IMPORTS),
+                           ("first render (app.py)", first_render_imports())]:
+        runs = [measure(imports) for _ in range(args.repeat)]
+        wall, total, top = min(runs, key=lambda r: r[0])
+        results[label] = {"wall_s": wall, "import_s": total}
+        print(f"\n{label}: wall {wall:.3f}s, import {total:.3f}s")
+        for name, t in top[:args.top]:
+            print(f"    {t:7.3f}s  {name}")
+
+    if args.record:
+        with open(HISTORY_FILE, "a") as f:
+            f.write(json.dumps({"timestamp": datetime.now().isoformat(timespec="seconds"),
+                                **results}) + "\n")
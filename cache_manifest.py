@@ -0,0 +1,256 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+from datetime import timedelta
+
+DATA_DIR = "stock_data"
+MANIFEST_FILE = os.path.join(DATA_DIR, "manifest.sqlite")
+
+# Budget disk total cache (bytes), bisa di-override lewat env
+CACHE_MAX_BYTES = int(os.environ.get("STOCK_CACHE_MAX_BYTES", 500 * 1024 * 1024))
+
+# TTL per jenis data
+KIND_TTL = {
+    "price": timedelta(hours=24),
+    "fundamental": timedelta(days=7),
+    "technical": timedelta(hours=24),
+    "model": timedelta(days=7),
+    # Intraday: partisi terbaru di-refresh setelah kurang lebih satu bar
+    "intraday_1m": timedelta(minutes=1),
+    "intraday_5m": timedelta(minutes=5),
+    "intraday_15m": timedelta(minutes=15),
+    "intraday_60m": timedelta(minutes=60),
+    # Agregat OHLC (pyramid_{base}_{level}) di-update inkremental, jarang perlu dibuang
+    "pyramid": timedelta(days=30),
+    # Feature store (features / features_{interval}) divalidasi terhadap harga saat dibaca
+    "features": timedelta(days=30),
+}
+DEFAULT_TTL = timedelta(hours=24)
+
+os.makedirs(DATA_DIR, exist_ok=True)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    path        TEXT PRIMARY KEY,
+    symbol      TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    rows        INTEGER,
+    first_date  TEXT,
+    last_date   TEXT,
+    bytes       INTEGER NOT NULL,
+    fetched_at  REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cache_symbol_kind ON cache_entries(symbol, kind);
+CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache_entries(last_access);
+"""
+
+_COLUMNS = ["path", "symbol", "kind", "rows", "first_date", "last_date",
+            "bytes", "fetched_at", "last_access"]
+
+
+# Versi schema di PRAGMA user_version; 1 = cache harga CSV lama sudah di-backfill
+_SCHEMA_VERSION = 1
+
+# Manifest yang schema-nya sudah disiapkan di proses ini
+_INITIALIZED = set()
+
+
+def _connect():
+    conn = sqlite3.connect(MANIFEST_FILE, timeout=30)
+    # Key absolut: MANIFEST_FILE relatif ke cwd, chdir → database lain
+    key = os.path.abspath(MANIFEST_FILE)
+    if key not in _INITIALIZED:
+        _initialize(conn)
+        _INITIALIZED.add(key)
+    return conn
+
+
+def _initialize(conn):
+    # journal_mode=WAL tersimpan di file database, cukup sekali per proses
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    with conn:
+        if conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+            _backfill_price_csv(conn)
+            conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+
+def _known_symbols(conn):
+    """Simbol yang pasti ada: sudah di manifest (jenis apa pun) atau pernah diprediksi."""
+    symbols = {r[0] for r in conn.execute("SELECT DISTINCT symbol FROM cache_entries")}
+    try:
+        from utils import read_full_prediction_log
+        symbols.update(e["symbol"] for e in read_full_prediction_log() if e.get("symbol"))
+    except:
+        pass
+    return symbols
+
+
+def _backfill_price_csv(conn):
+    """
+    Cache harga {SYMBOL}.csv dari sebelum ada manifest → dicatat sebagai "price" dengan
+    fetched_at = mtime file, supaya tetap muncul di list_symbols dan ikut TTL/eviction.
+    Nama file tidak dipetakan balik ke simbol ('_' bisa berasal dari '.' atau bukan):
+    hanya file yang persis sama dengan nama cache simbol yang dikenal yang dicatat,
+    sisanya tercatat saat get_cached_stock_data menulis ulang cache-nya.
+    """
+    directory = os.path.dirname(MANIFEST_FILE)
+    for symbol in _known_symbols(conn):
+        path = os.path.join(directory, f"{symbol.replace('.', '_')}.csv")
+        if not os.path.isfile(path):
+            continue
+        mtime = os.path.getmtime(path)
+        conn.execute(
+            "INSERT OR IGNORE INTO cache_entries (path, symbol, kind, bytes, fetched_at, last_access) "
+            "VALUES (?, ?, 'price', ?, ?, ?)",
+            (path, symbol, os.path.getsize(path), mtime, mtime)
+        )
+
+
+def _ttl(kind):
+    return KIND_TTL.get(kind) or KIND_TTL.get(kind.split("_")[0], DEFAULT_TTL)
+
+
+# ============================================================
+#   RECORD & LOOKUP
+# ============================================================
+def record(symbol, kind, path, df=None, evict_after=True):
+    """Register (or refresh) a cache file after it has been written."""
+    now = time.time()
+    rows = first_date = last_date = None
+    if df is not None and len(df):
+        rows = len(df)
+        first_date = str(df.index[0])
+        last_date = str(df.index[-1])
+
+    with closing(_connect()) as conn, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, symbol, kind, rows, first_date, last_date,
+             os.path.getsize(path), now, now)
+        )
+
+    if evict_after:
+        evict(protect=[path])
+
+
+def lookup(symbol, kind):
+    """Latest manifest entry for (symbol, kind) as a dict, or None."""
+    with closing(_connect()) as conn:
+        row = conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM cache_entries "
+            "WHERE symbol = ? AND kind = ? ORDER BY fetched_at DESC LIMIT 1",
+            (symbol, kind)
+        ).fetchone()
+    return dict(zip(_COLUMNS, row)) if row else None
+
+
+def is_fresh(symbol, kind, since=None):
+    """True jika entry masih dalam TTL (atau di-fetch setelah `since`) dan filenya ada."""
+    entry = lookup(symbol, kind)
+    if entry is None or not os.path.exists(entry["path"]):
+        return False
+    if since is not None:
+        return entry["fetched_at"] >= since
+    return time.time() - entry["fetched_at"] < _ttl(kind).total_seconds()
+
+
+def touch(symbol, kind):
+    with closing(_connect()) as conn, conn:
+        conn.execute(
+            "UPDATE cache_entries SET last_access = ? WHERE symbol = ? AND kind = ?",
+            (time.time(), symbol, kind)
+        )
+
+
+def entries(symbol=None, kind=None):
+    query = f"SELECT {', '.join(_COLUMNS)} FROM cache_entries WHERE 1=1"
+    params = []
+    if symbol is not None:
+        query += " AND symbol = ?"
+        params.append(symbol)
+    if kind is not None:
+        query += " AND kind = ?"
+        params.append(kind)
+    with closing(_connect()) as conn:
+        rows = conn.execute(query + " ORDER BY symbol, kind", params).fetchall()
+    return [dict(zip(_COLUMNS, r)) for r in rows]
+
+
+def list_symbols(kind=None):
+    query = "SELECT DISTINCT symbol FROM cache_entries"
+    params = []
+    if kind is not None:
+        query += " WHERE kind = ?"
+        params.append(kind)
+    with closing(_connect()) as conn:
+        return sorted(r[0] for r in conn.execute(query, params))
+
+
+def total_bytes():
+    with closing(_connect()) as conn:
+        return conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM cache_entries").fetchone()[0]
+
+
+# ============================================================
+#   REMOVE & EVICTION
+# ============================================================
+COVERAGE_MARKER = "_coverage.json"
+
+
+def _delete(conn, paths):
+    removed = []
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+            removed.append(path)
+        conn.execute("DELETE FROM cache_entries WHERE path = ?", (path,))
+
+        # Cache berpartisi (intraday): partisi hilang → marker coverage tidak valid lagi
+        marker = os.path.join(os.path.dirname(path), COVERAGE_MARKER)
+        if os.path.exists(marker):
+            os.remove(marker)
+    return removed
+
+
+def remove(symbol=None):
+    """Delete cache files (and their manifest rows) for one symbol, or everything."""
+    with closing(_connect()) as conn, conn:
+        if symbol is None:
+            paths = [r[0] for r in conn.execute("SELECT path FROM cache_entries")]
+        else:
+            paths = [r[0] for r in conn.execute(
+                "SELECT path FROM cache_entries WHERE symbol = ?", (symbol,))]
+        return _delete(conn, paths)
+
+
+def evict(max_bytes=None, protect=()):
+    """Evict entries until the cache fits in `max_bytes`.
+
+    Entries past their TTL go first, then least recently accessed.
+    """
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    now = time.time()
+
+    with closing(_connect()) as conn, conn:
+        total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM cache_entries").fetchone()[0]
+        if total <= max_bytes:
+            return []
+
+        rows = conn.execute(
+            "SELECT path, kind, bytes, fetched_at, last_access FROM cache_entries"
+        ).fetchall()
+        rows.sort(key=lambda r: (now - r[3] < _ttl(r[1]).total_seconds(), r[4]))
+
+        victims = []
+        for path, _, size, _, _ in rows:
+            if total <= max_bytes:
+                break
+            if path in protect:
+                continue
+            victims.append(path)
+            total -= size
+
+        return _delete(conn, victims)
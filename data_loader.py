@@ -1,84 +1,275 @@
 import os
 import json
+import time
+from datetime import date, timedelta
 import pandas as pd
-from datetime import datetime, timedelta
-import yfinance as yf
+
+import cache_manifest
+import ohlc_pyramid
+from utils import atomic_write, file_lock
 
 DATA_DIR = "stock_data"
+INTRADAY_DIR = os.path.join(DATA_DIR, "intraday")
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# Interval intraday yang didukung → rentang maksimum (hari) yang disediakan yfinance
+INTRADAY_MAX_DAYS = {"1m": 7, "5m": 60, "15m": 60, "60m": 730}
+
+
 # ===============================
-# LOAD DATA SAHAM (DENGAN CACHE)
+# FETCH MENTAH DARI YFINANCE
 # ===============================
-def get_cached_stock_data(symbol, period='2y', force_update=False):
-    cache_file = os.path.join(DATA_DIR, f"{symbol.replace('.', '_')}.csv")
+# yfinance di-import saat fetch pertama (import-nya lambat)
+def _fetch_history(symbol, period):
+    import yfinance as yf
+    return yf.Ticker(symbol).history(period=period)
 
-    # Cek cache masih fresh < 24 jam
-    if not force_update and os.path.exists(cache_file):
-        file_time = datetime.fromtimestamp(os.path.getmtime(cache_file))
-        if datetime.now() - file_time < timedelta(hours=24):
-            try:
-                df = pd.read_csv(cache_file, index_col=0, parse_dates=True)
-                return df
-            except:
-                pass
 
-    # Ambil dari yfinance
+def _fetch_info(symbol):
+    import yfinance as yf
+    return yf.Ticker(symbol).info
+
+
+def _fetch_intraday(symbol, interval, start, end):
+    import yfinance as yf
+    return yf.Ticker(symbol).history(interval=interval, start=start, end=end)
+
+
+# Memo DataFrame per proses, key (path, mtime): file yang ditulis ulang otomatis tidak dipakai
+_FRAME_MEMO = {}
+_FRAME_MEMO_MAX = 64
+
+
+def _read_csv(path):
     try:
-        stock = yf.Ticker(symbol)
-        df = stock.history(period=period)
-        if not df.empty:
-            df.to_csv(cache_file)
-            return df
+        key = (path, os.path.getmtime(path))
+        df = _FRAME_MEMO.get(key)
+        if df is None:
+            df = pd.read_csv(path, index_col=0, parse_dates=True)
+            if len(_FRAME_MEMO) >= _FRAME_MEMO_MAX:
+                _FRAME_MEMO.pop(next(iter(_FRAME_MEMO)))
+            _FRAME_MEMO[key] = df
+        return df.copy()
+    except:
         return None
+
+
+def _read_json(path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
     except:
-        if os.path.exists(cache_file):
-            return pd.read_csv(cache_file, index_col=0, parse_dates=True)
         return None
 
 
+def _update_pyramid(symbol, df, base):
+    # Agregat chart (mingguan/bulanan, jam/harian) ikut di-update saat bar baru masuk;
+    # gagal di sini tidak boleh menggagalkan load harga
+    try:
+        ohlc_pyramid.update_pyramid(symbol, df, base)
+    except:
+        pass
+
+
+# ===============================
+# LOAD DATA SAHAM (DENGAN CACHE)
+# ===============================
+def get_cached_stock_data(symbol, period='2y', force_update=False, interval='1d'):
+    if interval != '1d':
+        return get_cached_intraday_data(symbol, interval, period, force_update)
+
+    key = symbol.replace('.', '_')
+    cache_file = os.path.join(DATA_DIR, f"{key}.csv")
+    requested_at = time.time()
+
+    # Cek cache masih fresh (TTL dari manifest, tanpa lock)
+    if not force_update and cache_manifest.is_fresh(symbol, "price"):
+        df = _read_csv(cache_file)
+        if df is not None:
+            cache_manifest.touch(symbol, "price")
+            return df
+
+    # Single-flight antar proses: hanya pemegang lock yang fetch,
+    # proses lain menunggu lalu membaca hasilnya.
+    with file_lock(key):
+        fresh = cache_manifest.is_fresh(symbol, "price", since=requested_at if force_update else None)
+        if fresh:
+            df = _read_csv(cache_file)
+            if df is not None:
+                return df
+
+        # Ambil dari yfinance
+        try:
+            df = _fetch_history(symbol, period)
+            if not df.empty:
+                atomic_write(cache_file, df.to_csv)
+                cache_manifest.record(symbol, "price", cache_file, df)
+                _update_pyramid(symbol, df, '1d')
+                return df
+            return None
+        except:
+            if os.path.exists(cache_file):
+                return _read_csv(cache_file)
+            return None
+
+
+# ==========================================
+# DATA INTRADAY (PARTISI PER SIMBOL/INTERVAL/TANGGAL)
+# ==========================================
+def _period_days(period):
+    """'5d' → 5, '1mo' → 30, '1y' → 365."""
+    units = {"d": 1, "wk": 7, "mo": 30, "y": 365}
+    for unit, days in sorted(units.items(), key=lambda u: -len(u[0])):
+        if period.endswith(unit):
+            return int(period[:-len(unit)]) * days
+    raise ValueError(f"period tidak dikenal: {period}")
+
+
+def _partition_dir(symbol, interval):
+    return os.path.join(INTRADAY_DIR, symbol.replace('.', '_'), interval)
+
+
+def _partition_dates(part_dir):
+    if not os.path.isdir(part_dir):
+        return []
+    return sorted(f[:-4] for f in os.listdir(part_dir) if f.endswith(".csv"))
+
+
+def _write_partitions(symbol, interval, part_dir, df):
+    """Pecah bar per tanggal sesi (waktu lokal bursa) dan tulis tiap partisi secara atomic."""
+    os.makedirs(part_dir, exist_ok=True)
+    if df.index.tz is not None:
+        df = df.tz_localize(None)
+    df.index.name = "Datetime"
+    for day, part in df.groupby(df.index.date):
+        path = os.path.join(part_dir, f"{day.isoformat()}.csv")
+        atomic_write(path, part.to_csv)
+        cache_manifest.record(symbol, f"intraday_{interval}", path, part, evict_after=False)
+    cache_manifest.evict()
+    # Fetch selalu mulai di awal tanggal sesi → bar terakhir yang direvisi hanya menghitung
+    # ulang bucket yang tercakup `df`, histori pyramid sebelumnya tetap
+    _update_pyramid(symbol, df, interval)
+
+
+def iter_intraday_partitions(symbol, interval, start_date, end_date, newest_first=False):
+    """Yield DataFrame per tanggal sesi; hanya partisi dalam [start_date, end_date] yang dibaca."""
+    part_dir = _partition_dir(symbol, interval)
+    days = _partition_dates(part_dir)
+    for day in (reversed(days) if newest_first else days):
+        if start_date.isoformat() <= day <= end_date.isoformat():
+            df = _read_csv(os.path.join(part_dir, f"{day}.csv"))
+            if df is not None and not df.empty:
+                yield df
+
+
+def load_intraday_window(symbol, interval, start_date, end_date, max_bars=None):
+    """
+    Gabungan partisi dalam window. `max_bars` → partisi dibaca dari yang terbaru dan
+    berhenti setelah cukup bar; hanya `max_bars` bar terakhir yang dikembalikan.
+    """
+    if max_bars is None:
+        parts = list(iter_intraday_partitions(symbol, interval, start_date, end_date))
+    else:
+        parts, n_bars = [], 0
+        for part in iter_intraday_partitions(symbol, interval, start_date, end_date, newest_first=True):
+            parts.append(part)
+            n_bars += len(part)
+            if n_bars >= max_bars:
+                break
+    if not parts:
+        return None
+    df = pd.concat(parts).sort_index()
+    return df if max_bars is None else df.tail(max_bars)
+
+
+def get_cached_intraday_data(symbol, interval='5m', period='5d', force_update=False, max_bars=None):
+    if interval not in INTRADAY_MAX_DAYS:
+        raise ValueError(f"interval tidak didukung: {interval}")
+
+    kind = f"intraday_{interval}"
+    part_dir = _partition_dir(symbol, interval)
+    end_date = date.today()
+    start_date = end_date - timedelta(days=min(_period_days(period), INTRADAY_MAX_DAYS[interval]))
+    coverage_file = os.path.join(part_dir, cache_manifest.COVERAGE_MARKER)
+    requested_at = time.time()
+
+    def covered():
+        cov = _read_json(coverage_file)
+        return cov is not None and cov["start"] <= start_date.isoformat()
+
+    # Partisi hari-hari lalu tidak berubah; hanya partisi terbaru yang perlu refresh
+    if not force_update and cache_manifest.is_fresh(symbol, kind) and covered():
+        cache_manifest.touch(symbol, kind)
+        return load_intraday_window(symbol, interval, start_date, end_date, max_bars)
+
+    with file_lock(f"{symbol.replace('.', '_')}_{interval}"):
+        fresh = cache_manifest.is_fresh(symbol, kind, since=requested_at if force_update else None)
+        if not (fresh and covered()):
+            days = _partition_dates(part_dir)
+            if covered() and days:
+                fetch_start = date.fromisoformat(days[-1])
+            else:
+                fetch_start = start_date
+            try:
+                df = _fetch_intraday(symbol, interval, fetch_start, end_date + timedelta(days=1))
+                if not df.empty:
+                    _write_partitions(symbol, interval, part_dir, df)
+                    cov = _read_json(coverage_file) or {}
+                    new_start = min(cov.get("start", fetch_start.isoformat()), fetch_start.isoformat())
+                    atomic_write(coverage_file, lambda f: json.dump({"start": new_start}, f))
+            except:
+                pass
+
+        return load_intraday_window(symbol, interval, start_date, end_date, max_bars)
+
+
 # ==================================
 # LOAD DATA FUNDAMENTAL (DENGAN CACHE)
 # ==================================
 def get_cached_fundamental_data(symbol, force_update=False):
-    cache_file = os.path.join(DATA_DIR, f"{symbol.replace('.', '_')}_fundamental.json")
+    key = symbol.replace('.', '_')
+    cache_file = os.path.join(DATA_DIR, f"{key}_fundamental.json")
+    requested_at = time.time()
 
-    # Cek cache < 7 hari
-    if not force_update and os.path.exists(cache_file):
-        file_time = datetime.fromtimestamp(os.path.getmtime(cache_file))
-        if datetime.now() - file_time < timedelta(days=7):
-            try:
-                with open(cache_file, "r") as f:
-                    return json.load(f)
-            except:
-                pass
+    # Cek cache masih dalam TTL (7 hari)
+    if not force_update and cache_manifest.is_fresh(symbol, "fundamental"):
+        cached = _read_json(cache_file)
+        if cached is not None:
+            cache_manifest.touch(symbol, "fundamental")
+            return cached
 
-    # Ambil dari yfinance
-    try:
-        info = yf.Ticker(symbol).info
-
-        fundamental = {
-            'trailingPE': info.get('trailingPE', 0),
-            'forwardPE': info.get('forwardPE', 0),
-            'priceToBook': info.get('priceToBook', 0),
-            'priceToSales': info.get('priceToSalesTrailing12Months', 0),
-            'profitMargins': info.get('profitMargins', 0),
-            'returnOnEquity': info.get('returnOnEquity', 0),
-            'debtToEquity': info.get('debtToEquity', 0),
-            'currentRatio': info.get('currentRatio', 0),
-            'earningsGrowth': info.get('earningsGrowth', 0),
-            'revenueGrowth': info.get('revenueGrowth', 0),
-            'dividendYield': info.get('dividendYield', 0),
-            'marketCap': info.get('marketCap', 0),
-            'beta': info.get('beta', 0)
-        }
-
-        with open(cache_file, "w") as f:
-            json.dump(fundamental, f, indent=2)
-
-        return fundamental
-    except:
-        if os.path.exists(cache_file):
-            with open(cache_file, "r") as f:
-                return json.load(f)
-        return {}
+    with file_lock(f"{key}_fundamental"):
+        fresh = cache_manifest.is_fresh(symbol, "fundamental", since=requested_at if force_update else None)
+        if fresh:
+            cached = _read_json(cache_file)
+            if cached is not None:
+                return cached
+
+        # Ambil dari yfinance
+        try:
+            info = _fetch_info(symbol)
+
+            fundamental = {
+                'trailingPE': info.get('trailingPE', 0),
+                'forwardPE': info.get('forwardPE', 0),
+                'priceToBook': info.get('priceToBook', 0),
+                'priceToSales': info.get('priceToSalesTrailing12Months', 0),
+                'profitMargins': info.get('profitMargins', 0),
+                'returnOnEquity': info.get('returnOnEquity', 0),
+                'debtToEquity': info.get('debtToEquity', 0),
+                'currentRatio': info.get('currentRatio', 0),
+                'earningsGrowth': info.get('earningsGrowth', 0),
+                'revenueGrowth': info.get('revenueGrowth', 0),
+                'dividendYield': info.get('dividendYield', 0),
+                'marketCap': info.get('marketCap', 0),
+                'beta': info.get('beta', 0)
+            }
+
+            atomic_write(cache_file, lambda f: json.dump(fundamental, f, indent=2))
+            cache_manifest.record(symbol, "fundamental", cache_file)
+
+            return fundamental
+        except:
+            if os.path.exists(cache_file):
+                return _read_json(cache_file) or {}
+            return {}
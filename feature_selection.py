@@ -0,0 +1,120 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.inspection import permutation_importance
+
+from features import FEATURE_VERSION
+from utils import atomic_write, file_lock
+
+DATA_DIR = "stock_data"
+SELECTION_FILE = os.path.join(DATA_DIR, "feature_selection.json")
+
+CORR_THRESHOLD = 0.9999         # |korelasi| di atas ini dianggap duplikat (MA_20 = BB_Mid, dst.)
+TOP_K = None                    # opsional: simpan hanya k fitur terpenting
+SELECTION_MAX_AGE = timedelta(days=30)
+
+
+# ============================================================
+#   FILTER: KONSTAN & SANGAT BERKORELASI
+# ============================================================
+def drop_constant(X):
+    """Kolom yang nilainya sama di semua baris (mis. fundamental) tidak bisa di-split."""
+    return [c for c in X.columns if X[c].nunique(dropna=True) > 1]
+
+
+def drop_correlated(X, threshold=CORR_THRESHOLD):
+    """Greedy sesuai urutan kolom: simpan kolom, buang kolom berikutnya yang |r| > threshold."""
+    corr = np.abs(np.nan_to_num(np.corrcoef(X.to_numpy(dtype=float), rowvar=False)))
+    keep = []
+    for j in range(corr.shape[0]):
+        if all(corr[j, k] <= threshold for k in keep):
+            keep.append(j)
+    return [X.columns[j] for j in keep]
+
+
+def rank_by_importance(X, y, method="impurity", random_state=42, n_jobs=1):
+    """
+    Urutkan kolom dari importance tertinggi (impurity atau permutation).
+    n_jobs=1: seleksi jalan di dalam worker pool (service, jobs, tuning) yang sudah
+    memakai semua core; -1 di sini membuat thread per core di tiap worker.
+    """
+    split = int(len(X) * 0.8)
+    model = RandomForestRegressor(
+        n_estimators=100, max_depth=12, min_samples_leaf=4,
+        max_features='sqrt', n_jobs=n_jobs, random_state=random_state
+    )
+    model.fit(X.iloc[:split], y.iloc[:split])
+
+    if method == "permutation":
+        scores = permutation_importance(
+            model, X.iloc[split:], y.iloc[split:],
+            n_repeats=5, random_state=random_state, n_jobs=n_jobs
+        ).importances_mean
+    else:
+        scores = model.feature_importances_
+
+    order = np.argsort(scores)[::-1]
+    return [X.columns[i] for i in order]
+
+
+def select_features(X, y, top_k=TOP_K, method="impurity", corr_threshold=CORR_THRESHOLD):
+    """
+    Buang kolom konstan, urutkan sisanya berdasarkan importance, lalu buang
+    duplikat berkorelasi tinggi (yang lebih penting dipertahankan) dan ambil top-k.
+    """
+    cols = drop_constant(X)
+    ranked = rank_by_importance(X[cols], y, method)
+    keep = drop_correlated(X[ranked], corr_threshold)
+    if top_k:
+        keep = keep[:top_k]
+    keep = set(keep)
+    return [c for c in X.columns if c in keep]
+
+
+# ============================================================
+#   CACHE SELEKSI PER SIMBOL + FEATURE VERSION
+# ============================================================
+def _load_store():
+    if not os.path.exists(SELECTION_FILE):
+        return {}
+    try:
+        with open(SELECTION_FILE) as f:
+            return json.load(f)
+    except:
+        return {}
+
+
+def get_selected_features(symbol, model_type="advanced"):
+    """Kolom terpilih yang masih valid (versi fitur sama & belum kadaluarsa), atau None."""
+    entry = _load_store().get(f"{symbol}|{model_type}")
+    if not entry or entry.get("feature_version") != FEATURE_VERSION:
+        return None
+    selected_at = datetime.strptime(entry["selected_at"], "%Y-%m-%d %H:%M:%S")
+    if datetime.now() - selected_at > SELECTION_MAX_AGE:
+        return None
+    return entry["columns"]
+
+
+def save_selected_features(symbol, columns, model_type="advanced", n_candidates=None):
+    with file_lock("feature_selection"):
+        store = _load_store()
+        store[f"{symbol}|{model_type}"] = {
+            "feature_version": FEATURE_VERSION,
+            "columns": list(columns),
+            "n_candidates": n_candidates,
+            "selected_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        atomic_write(SELECTION_FILE, lambda f: json.dump(store, f, indent=2))
+
+
+def clear_selected_features(symbol=None):
+    with file_lock("feature_selection"):
+        store = _load_store()
+        if symbol is None:
+            store = {}
+        else:
+            store = {k: v for k, v in store.items() if not k.startswith(f"{symbol}|")}
+        atomic_write(SELECTION_FILE, lambda f: json.dump(store, f, indent=2))
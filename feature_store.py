@@ -0,0 +1,187 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+import cache_manifest
+from features import FEATURE_VERSION, OHLCV_COLS, compute_technical_features, is_intraday
+from panel_indicators import ewm_mean_state
+from utils import atomic_write, file_lock
+
+DATA_DIR = "stock_data"
+
+# Naikkan jika format file / state yang disimpan berubah
+STORE_VERSION = 2
+
+# Lookback terpanjang fitur teknikal (MA_100): cukup untuk menghitung ulang baris baru
+TAIL_LOOKBACK = 100
+
+# Chunk ekor yang di-append sebelum file ditulis ulang jadi satu record (compaction)
+MAX_CHUNKS = 64
+
+# ============================================================
+#   FEATURE STORE (FITUR TEKNIKAL PER SIMBOL, DI SAMPING CACHE HARGA)
+# ============================================================
+# File berisi urutan record pickle (meta, frame): record pertama = compute_technical_features
+# (data) lengkap (tanpa fundamental, tanpa dropna), berikutnya = baris ekor yang di-append
+# (mode "ab", histori lama tidak ditulis ulang). meta record terakhir = versi dan state EWM
+# setelah baris terakhir. Histori lama yang berubah (split/dividen, data direvisi) →
+# dibangun ulang; terlalu banyak chunk / baris lama yang sudah keluar window → compaction.
+# Biaya append ≈ overhead tetap pandas compute_technical_features di window ekor (~100 bar,
+# belasan ms): lebih cepat dari build dari awal hanya untuk histori panjang (puluhan ribu
+# bar, intraday). Versi NumPy per kolom untuk ekor tidak dibuat.
+def _path(symbol, interval):
+    key = symbol.replace('.', '_')
+    suffix = "" if interval == '1d' else f"_{interval}"
+    return os.path.join(DATA_DIR, f"{key}{suffix}_features.pkl")
+
+
+def _kind(interval):
+    return "features" if interval == '1d' else f"features_{interval}"
+
+
+def _read(path):
+    """
+    (meta, frame, n_chunks, clean) dari record base + semua chunk ekor, atau None.
+    Record terakhir yang terpotong (proses mati saat append) dilewati; clean=False →
+    file perlu ditulis ulang sebelum di-append lagi.
+    """
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    with f:
+        try:
+            meta, frame = pickle.load(f)
+        except:
+            return None
+        if meta.get("version") != FEATURE_VERSION or meta.get("store_version") != STORE_VERSION:
+            return None
+        frames, clean = [frame], True
+        while True:
+            try:
+                chunk_meta, chunk = pickle.load(f)
+            except EOFError:
+                break
+            except:
+                clean = False
+                break
+            meta = chunk_meta
+            frames.append(chunk)
+    frame = pd.concat(frames) if len(frames) > 1 else frames[0]
+    return meta, frame, len(frames) - 1, clean
+
+
+def _write(symbol, interval, meta, frame):
+    """Tulis ulang file sebagai satu record (build dari awal / compaction)."""
+    path = _path(symbol, interval)
+    atomic_write(path, lambda f: pickle.dump((meta, frame), f, protocol=pickle.HIGHEST_PROTOCOL), mode="wb")
+    cache_manifest.record(symbol, _kind(interval), path, frame, evict_after=False)
+
+
+def _append(symbol, interval, meta, tail, frame):
+    """Append baris ekor + meta terbaru sebagai record baru; `frame` = isi lengkap untuk manifest."""
+    path = _path(symbol, interval)
+    with open(path, "ab") as f:
+        pickle.dump((meta, tail), f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    cache_manifest.record(symbol, _kind(interval), path, frame, evict_after=False)
+
+
+def _ewm_states(frame):
+    # Kolom EWM bergantung pada seluruh histori → dilanjutkan dari state, bukan dari window ekor
+    close = frame['Close'].to_numpy(dtype=np.float64)[:, None]
+    return {
+        "ema_12": ewm_mean_state(close, 12)[1],
+        "ema_26": ewm_mean_state(close, 26)[1],
+        "signal": ewm_mean_state(frame['MACD'].to_numpy(dtype=np.float64)[:, None], 9)[1],
+    }
+
+
+def build(data):
+    """Hitung semua fitur teknikal dari awal; return (meta, frame)."""
+    frame = compute_technical_features(data)
+    meta = {
+        "version": FEATURE_VERSION,
+        "store_version": STORE_VERSION,
+        "ewm": _ewm_states(frame),
+    }
+    return meta, frame
+
+
+_EWM_COLS = {"EMA_12", "EMA_26", "MACD", "MACD_Signal", "MACD_Hist"}
+
+
+def _tail_features(meta, columns, data, n_old):
+    """Fitur untuk data.iloc[n_old:] dari window ekor + state EWM tersimpan (meta di-update)."""
+    begin = max(0, n_old - TAIL_LOOKBACK)
+    if is_intraday(data.index):
+        # Fitur sesi (Bars_Since_Open) butuh sesi bar baru pertama secara utuh
+        session = data.index.normalize()
+        begin = min(begin, int(session.searchsorted(session[n_old])))
+    # Kolom EWM tidak dihitung di window ekor (warm-up-nya salah), diganti dari state di bawah
+    window_cols = [c for c in columns if c not in _EWM_COLS]
+    tail = compute_technical_features(data.iloc[begin:], window_cols).iloc[n_old - begin:]
+
+    close = tail['Close'].to_numpy(dtype=np.float64)[:, None]
+    ema_12, meta["ewm"]["ema_12"] = ewm_mean_state(close, 12, meta["ewm"]["ema_12"])
+    ema_26, meta["ewm"]["ema_26"] = ewm_mean_state(close, 26, meta["ewm"]["ema_26"])
+    macd = ema_12 - ema_26
+    signal, meta["ewm"]["signal"] = ewm_mean_state(macd, 9, meta["ewm"]["signal"])
+    tail = tail.assign(EMA_12=ema_12[:, 0], EMA_26=ema_26[:, 0], MACD=macd[:, 0],
+                       MACD_Signal=signal[:, 0], MACD_Hist=(macd - signal)[:, 0])
+    return tail[columns]
+
+
+def _matching_rows(frame, data):
+    """
+    Posisi awal `data` di frame tersimpan dan jumlah baris yang sama persis, atau None
+    jika histori berbeda (revisi harga, index bergeser, data mulai lebih awal).
+    """
+    start = frame.index.searchsorted(data.index[0])
+    if start >= len(frame) or frame.index[start] != data.index[0]:
+        return None
+    n_common = len(frame) - start
+    if len(data) < n_common or not frame.index[start:].equals(data.index[:n_common]):
+        return None
+    stored = frame[OHLCV_COLS].to_numpy(dtype=np.float64)[start:]
+    fresh = data[OHLCV_COLS].to_numpy(dtype=np.float64)[:n_common]
+    if not np.array_equal(stored, fresh, equal_nan=True):
+        return None
+    return start, n_common
+
+
+def load_features(symbol, data, interval='1d'):
+    """
+    Fitur teknikal untuk `data` (sejajar dengan data.index), sama dengan
+    compute_technical_features atas seluruh histori yang pernah tersimpan (sampai
+    pembulatan floating point). Jika window histori bergeser (baris tertua hilang),
+    baris awal tetap memakai nilai dari histori yang lebih panjang: tidak ada warm-up
+    EWM/rolling baru di awal window.
+    """
+    # Read → append harus serial antar proses: dua append yang sama menggandakan baris
+    with file_lock(f"{symbol.replace('.', '_')}_{_kind(interval)}"):
+        cached = _read(_path(symbol, interval))
+        match = _matching_rows(cached[1], data) if cached is not None and len(data) else None
+
+        if match is None:
+            meta, frame = build(data)
+            _write(symbol, interval, meta, frame)
+            return frame
+
+        meta, frame, n_chunks, clean = cached
+        start, n_common = match
+        if len(data) > n_common:
+            tail = _tail_features(meta, frame.columns, data, n_common)
+            frame = pd.concat([frame, tail])
+            # Baris yang sudah keluar dari window tidak dibutuhkan lagi untuk ekor berikutnya
+            if not clean or n_chunks + 1 > MAX_CHUNKS or start > len(frame) // 2:
+                _write(symbol, interval, meta, frame.iloc[start:])
+            else:
+                _append(symbol, interval, meta, tail, frame)
+            return frame.iloc[start:]
+
+    cache_manifest.touch(symbol, _kind(interval))
+    return frame.iloc[start:]
@@ -1,6 +1,48 @@
 import numpy as np
 import pandas as pd
 
+# Naikkan jika definisi fitur berubah (invalidasi cache seleksi fitur)
+FEATURE_VERSION = 1
+
+OHLCV_COLS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# ======================================
+# 0. HELPER INTRADAY (SESI & GAP)
+# ======================================
+def is_intraday(index):
+    """True jika index berisi bar di dalam hari (bukan bar harian jam 00:00)."""
+    return isinstance(index, pd.DatetimeIndex) and len(index) > 1 and not (index.normalize() == index).all()
+
+
+def naive_index(index):
+    """
+    Index datetime tanpa timezone (waktu lokal bursa, = tanggal sesi untuk bar harian),
+    apa pun format cache-nya: DatetimeIndex ber-tz, atau str/objek dengan offset campuran
+    (CSV ticker US yang melewati pergantian DST dibaca ulang sebagai str).
+    """
+    if isinstance(index, pd.DatetimeIndex):
+        return index.tz_localize(None) if index.tz is not None else index
+    return pd.DatetimeIndex(pd.to_datetime(pd.Index(index).astype(str).str[:19]))
+
+
+def add_session_features(df):
+    """Penanda awal sesi, posisi bar dalam sesi, dan gap overnight (0 di tengah sesi)."""
+    session = df.index.normalize()
+    start = pd.Series(session, index=df.index).ne(pd.Series(session, index=df.index).shift())
+    df['Session_Start'] = start.astype(int)
+    df['Bars_Since_Open'] = df.groupby(session).cumcount()
+    df['Overnight_Gap'] = np.where(start, df['Open'] / df['Close'].shift(1) - 1, 0.0)
+    return df
+
+
+def annualization_factor(index):
+    """sqrt(bar per tahun): 252 untuk harian, 252 × bar per sesi untuk intraday."""
+    if not is_intraday(index):
+        return np.sqrt(252)
+    bars_per_session = pd.Series(1, index=index).groupby(index.normalize()).size().median()
+    return np.sqrt(252 * bars_per_session)
+
+
 # ======================================
 # 1. FITUR DASAR UNTUK PREDIKSI SIMPLE
 # ======================================
@@ -38,80 +80,177 @@ def create_basic_features(data):
 # ==================================================
 # 2. FITUR KOMPREHENSIF UNTUK MODEL ADVANCED
 # ==================================================
-def create_comprehensive_features(data, fundamental_data=None, fundamental_score=50):
+def create_comprehensive_features(data, fundamental_data=None, fundamental_score=50, columns=None,
+                                  technical=None):
+    """
+    `columns`: subset fitur yang dibutuhkan (hasil feature selection).
+    Grup fitur yang tidak diminta tidak dihitung sama sekali.
+    `technical`: frame hasil `compute_technical_features` (mis. dari feature_store)
+    untuk `data` yang sama → tidak dihitung ulang.
+    """
+    df = technical.copy() if technical is not None else compute_technical_features(data, columns)
+
+    # Tambahkan Fundamental (konstan)
+    if fundamental_data and _needs(columns, 'Fundamental_Score', 'PE', 'PB', 'ProfitMargin', 'ROE'):
+        df['Fundamental_Score'] = fundamental_score
+        df['PE'] = fundamental_data.get('trailingPE', 0)
+        df['PB'] = fundamental_data.get('priceToBook', 0)
+        df['ProfitMargin'] = fundamental_data.get('profitMargins', 0)
+        df['ROE'] = fundamental_data.get('returnOnEquity', 0)
+
+    if columns is not None:
+        df = df[OHLCV_COLS + [c for c in columns if c in df.columns]]
+
+    return df.dropna()
+
+
+def _needs(columns, *names):
+    return columns is None or any(n in columns for n in names)
+
+
+def trend(close, window):
+    """+1 jika Close naik dibanding `window - 1` bar sebelumnya, -1 jika tidak (NaN saat warm-up)."""
+    prev = close.shift(window - 1)
+    return pd.Series(np.where(close > prev, 1.0, -1.0), index=close.index).where(prev.notna() & close.notna())
+
+
+def compute_technical_features(data, columns=None):
+    """Fitur teknikal (tanpa fundamental, tanpa dropna); baris warm-up tetap NaN."""
     df = data.copy()
+    close = df['Close']
+    # Kolom dikumpulkan dulu lalu digabung sekali: insert kolom satu per satu ke
+    # DataFrame mahal (overhead tetap per kolom, lebih besar dari hitungannya sendiri)
+    out = {}
+
+    def need(*names):
+        return _needs(columns, *names)
+
+    # Intraday: fitur sesi supaya model tahu bar mana yang melewati gap overnight
+    if is_intraday(df.index) and need('Session_Start', 'Bars_Since_Open', 'Overnight_Gap'):
+        df = add_session_features(df)
 
     # Rolling mean sebagai baseline
-    df['Price_Rolling_Mean_20'] = df['Close'].rolling(20).mean()
-    df['Price_Normalized'] = df['Close'] / df['Price_Rolling_Mean_20']
+    if need('Price_Rolling_Mean_20', 'Price_Normalized'):
+        out['Price_Rolling_Mean_20'] = close.rolling(20).mean()
+        out['Price_Normalized'] = close / out['Price_Rolling_Mean_20']
 
     # Lag & returns
     for lag in [1, 2, 3, 5, 10]:
-        df[f'Close_Lag_{lag}'] = df['Close'].shift(lag)
-        df[f'Return_{lag}'] = df['Close'].pct_change(lag)
+        if need(f'Close_Lag_{lag}'):
+            out[f'Close_Lag_{lag}'] = close.shift(lag)
+        if need(f'Return_{lag}'):
+            out[f'Return_{lag}'] = close.pct_change(lag)
 
     # Moving Averages
     for win in [5, 10, 20, 50, 100]:
-        df[f'MA_{win}'] = df['Close'].rolling(win).mean()
-        df[f'MA_Ratio_{win}'] = df['Close'] / df[f'MA_{win}']
+        if need(f'MA_{win}', f'MA_Ratio_{win}'):
+            out[f'MA_{win}'] = close.rolling(win).mean()
+            out[f'MA_Ratio_{win}'] = close / out[f'MA_{win}']
 
     # EMA
-    df['EMA_12'] = df['Close'].ewm(span=12).mean()
-    df['EMA_26'] = df['Close'].ewm(span=26).mean()
+    if need('EMA_12'):
+        out['EMA_12'] = close.ewm(span=12).mean()
+    if need('EMA_26'):
+        out['EMA_26'] = close.ewm(span=26).mean()
 
     # Volatility
-    df['Vol_5'] = df['Close'].pct_change().rolling(5).std()
-    df['Vol_20'] = df['Close'].pct_change().rolling(20).std()
-    df['Vol_50'] = df['Close'].pct_change().rolling(50).std()
+    for win in [5, 20, 50]:
+        if need(f'Vol_{win}'):
+            out[f'Vol_{win}'] = close.pct_change().rolling(win).std()
 
     # Support / Resistance
-    df['Resistance_20'] = df['High'].rolling(20).max()
-    df['Support_20'] = df['Low'].rolling(20).min()
-    df['Price_vs_Resistance'] = df['Close'] / df['Resistance_20']
-    df['Price_vs_Support'] = df['Close'] / df['Support_20']
+    if need('Resistance_20', 'Support_20', 'Price_vs_Resistance', 'Price_vs_Support'):
+        out['Resistance_20'] = df['High'].rolling(20).max()
+        out['Support_20'] = df['Low'].rolling(20).min()
+        out['Price_vs_Resistance'] = close / out['Resistance_20']
+        out['Price_vs_Support'] = close / out['Support_20']
 
     # Volume
-    df['Vol_MA_5'] = df['Volume'].rolling(5).mean()
-    df['Vol_MA_20'] = df['Volume'].rolling(20).mean()
-    df['Volume_Ratio'] = df['Volume'] / df['Vol_MA_20']
+    if need('Vol_MA_5'):
+        out['Vol_MA_5'] = df['Volume'].rolling(5).mean()
+    if need('Vol_MA_20', 'Volume_Ratio'):
+        out['Vol_MA_20'] = df['Volume'].rolling(20).mean()
+        out['Volume_Ratio'] = df['Volume'] / out['Vol_MA_20']
 
     # RSI (7,14,21)
     for win in [7, 14, 21]:
-        delta = df['Close'].diff()
+        if not need(f'RSI_{win}'):
+            continue
+        delta = close.diff()
         gain = delta.clip(lower=0).rolling(win).mean()
         loss = (-delta.clip(upper=0)).rolling(win).mean()
         rs = gain / loss
-        df[f'RSI_{win}'] = 100 - (100 / (1 + rs))
+        out[f'RSI_{win}'] = 100 - (100 / (1 + rs))
 
     # MACD
-    exp1 = df['Close'].ewm(span=12).mean()
-    exp2 = df['Close'].ewm(span=26).mean()
-    df['MACD'] = exp1 - exp2
-    df['MACD_Signal'] = df['MACD'].ewm(span=9).mean()
-    df['MACD_Hist'] = df['MACD'] - df['MACD_Signal']
+    if need('MACD', 'MACD_Signal', 'MACD_Hist'):
+        exp1 = close.ewm(span=12).mean()
+        exp2 = close.ewm(span=26).mean()
+        out['MACD'] = exp1 - exp2
+        out['MACD_Signal'] = out['MACD'].ewm(span=9).mean()
+        out['MACD_Hist'] = out['MACD'] - out['MACD_Signal']
 
     # Bollinger Bands
-    mid = df['Close'].rolling(20).mean()
-    std = df['Close'].rolling(20).std()
-    df['BB_Mid'] = mid
-    df['BB_Upper'] = mid + std * 2
-    df['BB_Lower'] = mid - std * 2
-    df['BB_Width'] = (df['BB_Upper'] - df['BB_Lower']) / df['BB_Mid']
-    df['BB_Pos'] = (df['Close'] - df['BB_Lower']) / (df['BB_Upper'] - df['BB_Lower'])
-
-    # Trend
-    df['Trend_5'] = df['Close'].rolling(5).apply(lambda x: 1 if x[-1] > x[0] else -1)
-    df['Trend_20'] = df['Close'].rolling(20).apply(lambda x: 1 if x[-1] > x[0] else -1)
+    if need('BB_Mid', 'BB_Upper', 'BB_Lower', 'BB_Width', 'BB_Pos'):
+        mid = close.rolling(20).mean()
+        std = close.rolling(20).std()
+        out['BB_Mid'] = mid
+        out['BB_Upper'] = mid + std * 2
+        out['BB_Lower'] = mid - std * 2
+        out['BB_Width'] = (out['BB_Upper'] - out['BB_Lower']) / out['BB_Mid']
+        out['BB_Pos'] = (close - out['BB_Lower']) / (out['BB_Upper'] - out['BB_Lower'])
 
-    # Tambahkan Fundamental (konstan)
-    if fundamental_data:
-        df['Fundamental_Score'] = fundamental_score
-        df['PE'] = fundamental_data.get('trailingPE', 0)
-        df['PB'] = fundamental_data.get('priceToBook', 0)
-        df['ProfitMargin'] = fundamental_data.get('profitMargins', 0)
-        df['ROE'] = fundamental_data.get('returnOnEquity', 0)
+    # Trend (bandingkan ujung window, tanpa callback Python per baris)
+    if need('Trend_5'):
+        out['Trend_5'] = trend(close, 5)
+    if need('Trend_20'):
+        out['Trend_20'] = trend(close, 20)
 
-    return df.dropna()
+    return pd.concat([df, pd.DataFrame(out, index=df.index)], axis=1) if out else df
+
+
+# ==================================================
+# 2b. DATASET (X, TARGET) UNTUK TRAINING
+# ==================================================
+BASIC_FEATURE_COLS = [
+    'Open','High','Low','Close','Volume',
+    'Price_Lag_1','Price_Lag_2','Price_Lag_3',
+    'MA_5','MA_10','MA_20','Volatility','RSI','MACD'
+]
+
+
+def _with_targets(df, feature_cols, days_to_predict):
+    X = df[feature_cols]
+    y_open = df['Open'].shift(-days_to_predict)
+    y_close = df['Close'].shift(-days_to_predict)
+
+    valid = ~y_open.isna()
+    return X[valid], y_open[valid], y_close[valid]
+
+
+def build_basic_dataset(data, days_to_predict=1):
+    """Return (X, y_open, y_close) untuk model basic."""
+    df = create_basic_features(data)
+    feature_cols = [c for c in BASIC_FEATURE_COLS if c in df.columns]
+    return _with_targets(df, feature_cols, days_to_predict)
+
+
+def build_advanced_dataset(data, fundamental=None, fund_score=50, days_to_predict=1, columns=None,
+                           symbol=None, interval='1d'):
+    """
+    Return (X, y_open, y_close) untuk model advanced (opsional hanya `columns`).
+    Dengan `symbol`, fitur teknikal diambil dari feature_store (hanya bar baru dihitung).
+    Catatan: jika window `data` bergeser (bar tertua hilang, mis. period '3y' keesokan
+    harinya), fitur store dihitung atas histori yang lebih panjang dari `data`: baris awal
+    tidak punya warm-up NaN dan EMA/MACD sedikit berbeda dari build tanpa `symbol`.
+    """
+    technical = None
+    if symbol is not None:
+        from feature_store import load_features
+        technical = load_features(symbol, data, interval)
+    df = create_comprehensive_features(data, fundamental, fund_score, columns, technical=technical)
+    feature_cols = [c for c in df.columns if c not in OHLCV_COLS]
+    return _with_targets(df, feature_cols, days_to_predict)
 
 
 # ==================================
@@ -155,10 +294,11 @@ def calculate_fundamental_score(f):
 # ==================================
 def get_last_3_days_data(df):
     tail = df.tail(3)
+    fmt = "%Y-%m-%d %H:%M" if is_intraday(df.index) else "%Y-%m-%d"
     out = []
     for idx, row in tail.iterrows():
         out.append({
-            "date": idx.strftime("%Y-%m-%d"),
+            "date": idx.strftime(fmt),
             "open": float(row["Open"]),
             "high": float(row["High"]),
             "low": float(row["Low"]),
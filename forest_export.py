@@ -0,0 +1,198 @@
+import os
+
+import numpy as np
+
+import cache_manifest
+from utils import atomic_write
+
+DATA_DIR = "stock_data"
+MODEL_DIR = os.path.join(DATA_DIR, "models")
+
+ROW_CHUNK = 4096
+
+
+# ============================================================
+#   COMPACT FOREST (ARRAY-BACKED)
+# ============================================================
+class CompactForest:
+    """
+    Random forest regressor flattened into node arrays.
+    Semua tree disimpan berurutan; `roots[t]` = index node akar tree t.
+    Leaf menunjuk ke dirinya sendiri (left == right == index node).
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, n_features):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.is_leaf = left == np.arange(len(left))
+        # children[2*i] = kiri, children[2*i + 1] = kanan → satu gather per level
+        self.children = np.stack([left, right], axis=1).ravel()
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.left,
+                                      self.right, self.value, self.roots))
+
+    def _leaves(self, X):
+        # Sama seperti sklearn: input di-cast ke float32 sebelum dibandingkan
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_cols = X.shape
+        x_flat = X.ravel()
+        row_base = np.tile(np.arange(n_rows, dtype=np.int32) * n_cols, self.n_trees)
+
+        node = np.repeat(self.roots, n_rows)
+        active = np.flatnonzero(~self.is_leaf[node])
+        # Hanya (tree, row) yang belum sampai leaf yang ikut iterasi berikutnya
+        while active.size:
+            nd = node[active]
+            xv = x_flat.take(row_base.take(active) + self.feature.take(nd))
+            nxt = self.children.take(2 * nd + (xv > self.threshold.take(nd)))
+            node[active] = nxt
+            active = active[~self.is_leaf.take(nxt)]
+        return node.reshape(self.n_trees, n_rows)
+
+    def predict_per_tree(self, X):
+        """Prediksi setiap tree, shape (n_trees, n_rows) — untuk band ketidakpastian."""
+        X = np.asarray(X)
+        out = np.empty((self.n_trees, len(X)), dtype=np.float64)
+        for start in range(0, len(X), ROW_CHUNK):
+            stop = start + ROW_CHUNK
+            out[:, start:stop] = self.value[self._leaves(X[start:stop])]
+        return out
+
+    def predict(self, X):
+        # Penjumlahan berurutan per tree (axis 0), sama dengan akumulasi sklearn
+        return self.predict_per_tree(X).sum(axis=0) / self.n_trees
+
+    def to_arrays(self):
+        return {
+            "feature": self.feature, "threshold": self.threshold,
+            "left": self.left, "right": self.right, "value": self.value,
+            "roots": self.roots,
+            "meta": np.array([self.max_depth, self.n_features], dtype=np.int64),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix=""):
+        meta = arrays[prefix + "meta"]
+        return cls(
+            arrays[prefix + "feature"], arrays[prefix + "threshold"],
+            arrays[prefix + "left"], arrays[prefix + "right"],
+            arrays[prefix + "value"], arrays[prefix + "roots"],
+            meta[0], meta[1]
+        )
+
+
+def _floor_float32(x):
+    """Float32 terbesar yang <= x. Untuk input float32, `v <= floor32(t)` identik dengan `v <= t`."""
+    x32 = x.astype(np.float32)
+    up = x32.astype(np.float64) > x
+    x32[up] = np.nextafter(x32[up], np.float32(-np.inf))
+    return x32
+
+
+def export_forest(model, compact=False):
+    """
+    Flatten RandomForestRegressor (single output) menjadi CompactForest.
+    Threshold disimpan float32 tanpa mengubah hasil; `compact=True` juga
+    menyimpan nilai leaf sebagai float32 (hasil dalam toleransi, tidak bit-identik).
+    """
+    trees = [est.tree_ for est in model.estimators_]
+    counts = np.array([t.node_count for t in trees])
+    roots = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int32)
+    n_features = model.n_features_in_
+
+    feature, threshold, left, right, value = [], [], [], [], []
+    for t, offset in zip(trees, roots):
+        idx = np.arange(t.node_count, dtype=np.int32) + offset
+        is_leaf = t.children_left == -1
+        feature.append(np.where(is_leaf, 0, t.feature))
+        threshold.append(np.where(is_leaf, 0.0, t.threshold))
+        left.append(np.where(is_leaf, idx, t.children_left + offset))
+        right.append(np.where(is_leaf, idx, t.children_right + offset))
+        value.append(t.value[:, 0, 0])
+
+    feat_dtype = np.int16 if n_features < np.iinfo(np.int16).max else np.int32
+    return CompactForest(
+        feature=np.concatenate(feature).astype(feat_dtype),
+        threshold=_floor_float32(np.concatenate(threshold)),
+        left=np.concatenate(left).astype(np.int32),
+        right=np.concatenate(right).astype(np.int32),
+        value=np.concatenate(value).astype(np.float32 if compact else np.float64),
+        roots=roots,
+        max_depth=max(t.max_depth for t in trees),
+        n_features=n_features,
+    )
+
+
+# ============================================================
+#   PERSISTENSI MODEL BUNDLE (SCALER + FITUR + FOREST)
+# ============================================================
+def _bundle_path(symbol, model_type):
+    return os.path.join(MODEL_DIR, f"{symbol.replace('.', '_')}_{model_type}.npz")
+
+
+def save_model_bundle(symbol, model_type, scaler, columns, forests, fingerprint=""):
+    """
+    Simpan scaler (center/scale), nama kolom dan forest {nama: CompactForest}.
+    `fingerprint` = penanda data/parameter training, untuk memutuskan perlu retrain atau tidak.
+    """
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    arrays = {
+        "columns": np.array(list(columns)),
+        "scaler_center": getattr(scaler, "center_", getattr(scaler, "mean_", None)),
+        "scaler_scale": scaler.scale_,
+        "fingerprint": np.array(fingerprint),
+    }
+    for name, forest in forests.items():
+        arrays.update({f"{name}__{k}": v for k, v in forest.to_arrays().items()})
+
+    path = _bundle_path(symbol, model_type)
+    atomic_write(path, lambda f: np.savez(f, **arrays), mode="wb")
+    cache_manifest.record(symbol, "model", path)
+    return path
+
+
+# Bundle yang sudah di-load per proses, key (path, mtime)
+_BUNDLE_MEMO = {}
+
+
+def load_model_bundle(symbol, model_type="advanced"):
+    path = _bundle_path(symbol, model_type)
+    if not os.path.exists(path):
+        return None
+    key = (path, os.path.getmtime(path))
+    if key in _BUNDLE_MEMO:
+        return _BUNDLE_MEMO[key]
+    with np.load(path) as arrays:
+        names = {k.split("__")[0] for k in arrays.files if "__" in k}
+        bundle = {
+            "columns": [str(c) for c in arrays["columns"]],
+            "center": arrays["scaler_center"],
+            "scale": arrays["scaler_scale"],
+            "forests": {n: CompactForest.from_arrays(arrays, f"{n}__") for n in names},
+            "fingerprint": str(arrays["fingerprint"]) if "fingerprint" in arrays.files else "",
+        }
+    cache_manifest.touch(symbol, "model")
+    for old in [k for k in _BUNDLE_MEMO if k[0] == path]:
+        del _BUNDLE_MEMO[old]
+    _BUNDLE_MEMO[key] = bundle
+    return bundle
+
+
+def score_bundle(bundle, X, per_tree=False):
+    """Skor banyak baris DataFrame fitur sekaligus dengan semua forest di bundle."""
+    X_scaled = (X[bundle["columns"]].to_numpy(dtype=np.float64) - bundle["center"]) / bundle["scale"]
+    if per_tree:
+        return {n: f.predict_per_tree(X_scaled) for n, f in bundle["forests"].items()}
+    return {n: f.predict(X_scaled) for n, f in bundle["forests"].items()}
@@ -0,0 +1,436 @@
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from datetime import datetime
+
+DATA_DIR = "stock_data"
+JOBS_FILE = os.path.join(DATA_DIR, "jobs.sqlite")
+
+SHARD_SIZE = 25
+LEASE_SECONDS = 600     # shard tanpa heartbeat selama ini boleh diambil runner lain
+MAX_WORKERS = 4
+STAGES = ["refresh", "predict", "score"]
+
+os.makedirs(DATA_DIR, exist_ok=True)
+
+# Queue SQLite sebagai pengganti lokal queue terdistribusi. Beberapa runner (proses
+# atau host dengan DATA_DIR bersama) mengambil shard lewat lease; setiap simbol yang
+# selesai di-checkpoint sehingga run yang terputus dilanjutkan, bukan diulang.
+# Journal mode DELETE, bukan WAL: WAL memakai shared memory (-shm) yang hanya valid di
+# satu host. Antar host, DATA_DIR harus di filesystem dengan POSIX lock yang benar
+# (mis. NFSv4 dengan lock aktif); tanpa itu jalankan semua runner di satu host.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      TEXT PRIMARY KEY,
+    created_at  REAL NOT NULL,
+    model       TEXT NOT NULL,
+    stages      TEXT NOT NULL,
+    n_symbols   INTEGER NOT NULL,
+    n_shards    INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shards (
+    run_id      TEXT NOT NULL,
+    shard       INTEGER NOT NULL,
+    symbols     TEXT NOT NULL,
+    status      TEXT NOT NULL,          -- pending | leased | done
+    owner       TEXT,
+    lease_until REAL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    started_at  REAL,
+    finished_at REAL,
+    PRIMARY KEY (run_id, shard)
+);
+CREATE TABLE IF NOT EXISTS symbol_tasks (
+    run_id      TEXT NOT NULL,
+    symbol      TEXT NOT NULL,
+    shard       INTEGER NOT NULL,
+    status      TEXT NOT NULL,          -- done | failed
+    owner       TEXT,
+    timings     TEXT,                   -- {stage: detik}
+    result      TEXT,
+    error       TEXT,
+    finished_at REAL NOT NULL,
+    PRIMARY KEY (run_id, symbol)
+);
+CREATE INDEX IF NOT EXISTS idx_shards_status ON shards(run_id, status);
+"""
+
+
+def _connect():
+    conn = sqlite3.connect(JOBS_FILE, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+# ============================================================
+#   SUBMIT RUN
+# ============================================================
+def submit(symbols, model="advanced", stages=STAGES, shard_size=SHARD_SIZE, run_id=None):
+    """Bagi universe menjadi shard berurutan dan masukkan ke queue; return run_id."""
+    symbols = sorted(set(symbols))
+    stages = [s for s in STAGES if s in stages]
+    run_id = run_id or f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+    shards = [symbols[i:i + shard_size] for i in range(0, len(symbols), shard_size)]
+
+    with closing(_connect()) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+                     (run_id, time.time(), model, json.dumps(stages), len(symbols), len(shards)))
+        conn.executemany(
+            "INSERT INTO shards (run_id, shard, symbols, status) VALUES (?, ?, ?, 'pending')",
+            [(run_id, i, json.dumps(chunk)) for i, chunk in enumerate(shards)]
+        )
+        conn.execute("COMMIT")
+    return run_id
+
+
+def retry_failed(run_id):
+    """Hapus checkpoint simbol yang gagal dan buka kembali shard-nya."""
+    with closing(_connect()) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        shards = [r[0] for r in conn.execute(
+            "SELECT DISTINCT shard FROM symbol_tasks WHERE run_id = ? AND status = 'failed'", (run_id,))]
+        conn.execute("DELETE FROM symbol_tasks WHERE run_id = ? AND status = 'failed'", (run_id,))
+        conn.executemany(
+            "UPDATE shards SET status = 'pending', owner = NULL, lease_until = NULL "
+            "WHERE run_id = ? AND shard = ?", [(run_id, s) for s in shards]
+        )
+        conn.execute("COMMIT")
+    return len(shards)
+
+
+# ============================================================
+#   LEASE SHARD
+# ============================================================
+def claim_shard(run_id, owner, lease_seconds=LEASE_SECONDS):
+    """Ambil satu shard pending (atau yang lease-nya kedaluwarsa); None jika habis."""
+    now = time.time()
+    with closing(_connect()) as conn:
+        # BEGIN IMMEDIATE: hanya satu runner yang bisa memilih+mengunci shard sekaligus
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT shard, symbols FROM shards WHERE run_id = ? AND "
+            "(status = 'pending' OR (status = 'leased' AND lease_until < ?)) "
+            "ORDER BY shard LIMIT 1", (run_id, now)
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute(
+            "UPDATE shards SET status = 'leased', owner = ?, lease_until = ?, "
+            "attempts = attempts + 1, started_at = COALESCE(started_at, ?) "
+            "WHERE run_id = ? AND shard = ?",
+            (owner, now + lease_seconds, now, run_id, row[0])
+        )
+        conn.execute("COMMIT")
+    return row[0], json.loads(row[1])
+
+
+def renew_lease(run_id, shard, owner, lease_seconds=LEASE_SECONDS):
+    """Heartbeat; False jika lease sudah diambil alih runner lain."""
+    with closing(_connect()) as conn:
+        cur = conn.execute(
+            "UPDATE shards SET lease_until = ? WHERE run_id = ? AND shard = ? "
+            "AND owner = ? AND status = 'leased'",
+            (time.time() + lease_seconds, run_id, shard, owner)
+        )
+        return cur.rowcount == 1
+
+
+def finish_shard(run_id, shard, owner):
+    """False jika lease sudah diambil alih runner lain (shard tidak ditandai selesai)."""
+    with closing(_connect()) as conn:
+        cur = conn.execute(
+            "UPDATE shards SET status = 'done', lease_until = NULL, finished_at = ? "
+            "WHERE run_id = ? AND shard = ? AND owner = ? AND status = 'leased'",
+            (time.time(), run_id, shard, owner)
+        )
+        return cur.rowcount == 1
+
+
+# ============================================================
+#   CHECKPOINT PER SIMBOL
+# ============================================================
+def completed_symbols(run_id, shard=None):
+    with closing(_connect()) as conn:
+        sql = "SELECT symbol FROM symbol_tasks WHERE run_id = ?"
+        args = [run_id]
+        if shard is not None:
+            sql += " AND shard = ?"
+            args.append(shard)
+        return {r[0] for r in conn.execute(sql, args)}
+
+
+def _checkpoint(run_id, symbol, shard, owner, timings, result=None, error=None,
+                lease_seconds=LEASE_SECONDS):
+    """
+    Catat hasil simbol sekaligus perpanjang lease, dalam satu transaksi. False (tanpa
+    menulis apa pun) jika shard sudah bukan milik `owner`.
+    """
+    now = time.time()
+    with closing(_connect()) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        cur = conn.execute(
+            "UPDATE shards SET lease_until = ? WHERE run_id = ? AND shard = ? "
+            "AND owner = ? AND status = 'leased'",
+            (now + lease_seconds, run_id, shard, owner)
+        )
+        if cur.rowcount == 0:
+            conn.execute("ROLLBACK")
+            return False
+        conn.execute(
+            "INSERT OR REPLACE INTO symbol_tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (run_id, symbol, shard, "failed" if error else "done", owner, json.dumps(timings),
+             json.dumps(result) if result is not None else None, error, now)
+        )
+        conn.execute("COMMIT")
+    return True
+
+
+def _run_info(run_id):
+    with closing(_connect()) as conn:
+        row = conn.execute("SELECT model, stages FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+    if row is None:
+        raise ValueError(f"Run tidak dikenal: {run_id}")
+    return row[0], json.loads(row[1])
+
+
+# ============================================================
+#   STAGE PER SIMBOL
+# ============================================================
+def _process_symbol(symbol, model, stages, timings, heartbeat=None):
+    """
+    Jalankan stage untuk satu simbol, isi `timings` per stage; Exception = gagal.
+    `heartbeat()` dipanggil sebelum tiap stage (perpanjang lease); jika False, lease
+    hilang → berhenti dan return None.
+    """
+    from data_loader import get_cached_stock_data, get_cached_fundamental_data
+    from utils import to_serializable, write_prediction_log
+
+    result = {}
+    prediction = None
+
+    def lease_lost(stage):
+        return stage in stages and heartbeat is not None and not heartbeat()
+
+    if lease_lost("refresh"):
+        return None
+    if "refresh" in stages:
+        start = time.perf_counter()
+        df = get_cached_stock_data(symbol, '3y', force_update=True)
+        if df is None or df.empty:
+            raise ValueError("Data harga kosong")
+        if model == "advanced":
+            get_cached_fundamental_data(symbol)
+        timings["refresh"] = time.perf_counter() - start
+
+    if lease_lost("predict"):
+        return None
+    if "predict" in stages:
+        from prediction import advanced_predict_stock_price, basic_predict_stock_price
+
+        start = time.perf_counter()
+        fundamental = None
+        if model == "advanced":
+            prediction, hist3, fundamental, _ = advanced_predict_stock_price(symbol)
+        else:
+            prediction, hist3, _ = basic_predict_stock_price(symbol)
+        if prediction is None:
+            raise ValueError("Data tidak cukup untuk prediksi")
+        # write_prediction_log sudah memegang lock "prediction_log" sendiri
+        write_prediction_log(symbol, prediction, hist3, fundamental)
+        result["predicted_close"] = float(prediction["predicted_close"])
+        timings["predict"] = time.perf_counter() - start
+
+    if lease_lost("score"):
+        return None
+    if "score" in stages:
+        from technical_analysis import analyze_technical
+
+        start = time.perf_counter()
+        ta = to_serializable(analyze_technical(symbol, get_cached_stock_data(symbol, '2y')))
+        result["technical_score"] = ta["technical_score"]
+        result["recommendation"] = ta["recommendation"]
+        timings["score"] = time.perf_counter() - start
+
+    return result
+
+
+def run_shard(run_id, shard, symbols, owner, model, stages, lease_seconds=LEASE_SECONDS):
+    """Proses satu shard, lewati simbol yang sudah di-checkpoint. False jika lease hilang."""
+    done = completed_symbols(run_id, shard)
+
+    def heartbeat():
+        return renew_lease(run_id, shard, owner, lease_seconds)
+
+    for symbol in symbols:
+        if symbol in done:
+            continue
+        start = time.perf_counter()
+        timings = {}   # stage yang sempat selesai tetap tercatat walau simbol gagal
+        try:
+            result = _process_symbol(symbol, model, stages, timings, heartbeat)
+            if result is None:
+                return False
+            timings["total"] = time.perf_counter() - start
+            owned = _checkpoint(run_id, symbol, shard, owner, timings, result,
+                                lease_seconds=lease_seconds)
+        except Exception as e:
+            timings["total"] = time.perf_counter() - start
+            owned = _checkpoint(run_id, symbol, shard, owner, timings, error=f"{type(e).__name__}: {e}",
+                                lease_seconds=lease_seconds)
+        if not owned:
+            return False
+    return finish_shard(run_id, shard, owner)
+
+
+# ============================================================
+#   WORKER LOOP & POOL LOKAL
+# ============================================================
+def work(run_id, lease_seconds=LEASE_SECONDS, max_shards=None):
+    """Satu runner: ambil shard sampai queue habis. Return jumlah shard yang diproses."""
+    model, stages = _run_info(run_id)
+    owner = _owner()
+    n = 0
+    while max_shards is None or n < max_shards:
+        claimed = claim_shard(run_id, owner, lease_seconds)
+        if claimed is None:
+            break
+        shard, symbols = claimed
+        ok = run_shard(run_id, shard, symbols, owner, model, stages, lease_seconds)
+        print(f"[{owner}] shard {shard} {'selesai' if ok else 'lease hilang'} ({len(symbols)} simbol)")
+        n += 1
+    return n
+
+
+def work_pool(run_id, max_workers=MAX_WORKERS, lease_seconds=LEASE_SECONDS):
+    """Jalankan `max_workers` runner di process pool lokal (host lain cukup menjalankan `work`)."""
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers) as pool:
+        futures = [pool.submit(work, run_id, lease_seconds) for _ in range(max_workers)]
+        n_shards = sum(f.result() for f in futures)
+    print(f"{n_shards} shard diproses dalam {time.perf_counter() - start:.1f}s")
+    return n_shards
+
+
+# ============================================================
+#   STATUS
+# ============================================================
+def status(run_id):
+    """Progress run: shard per status, simbol selesai/gagal, dan timing per stage."""
+    import numpy as np
+
+    with closing(_connect()) as conn:
+        run = conn.execute("SELECT n_symbols, n_shards, model, stages FROM runs WHERE run_id = ?",
+                           (run_id,)).fetchone()
+        if run is None:
+            raise ValueError(f"Run tidak dikenal: {run_id}")
+        shards = dict(conn.execute(
+            "SELECT status, COUNT(*) FROM shards WHERE run_id = ? GROUP BY status", (run_id,)).fetchall())
+        tasks = conn.execute(
+            "SELECT symbol, status, owner, timings, error FROM symbol_tasks WHERE run_id = ?", (run_id,)
+        ).fetchall()
+        expired = conn.execute(
+            "SELECT COUNT(*) FROM shards WHERE run_id = ? AND status = 'leased' AND lease_until < ?",
+            (run_id, time.time())).fetchone()[0]
+
+    per_stage = {}
+    for _, _, _, timings, _ in tasks:
+        for stage, seconds in json.loads(timings or "{}").items():
+            per_stage.setdefault(stage, []).append(seconds)
+
+    return {
+        "run_id": run_id,
+        "model": run[2],
+        "stages": json.loads(run[3]),
+        "symbols": run[0],
+        "done": sum(t[1] == "done" for t in tasks),
+        "failed": {t[0]: t[4] for t in tasks if t[1] == "failed"},
+        "shards": {"total": run[1], **shards, "expired_leases": expired},
+        "runners": sorted({t[2] for t in tasks if t[2]}),
+        "stage_seconds": {
+            stage: {"n": len(v), "mean": float(np.mean(v)), "p95": float(np.percentile(v, 95)),
+                    "sum": float(np.sum(v))}
+            for stage, v in per_stage.items()
+        },
+    }
+
+
+def symbol_timings(run_id):
+    """Timing per stage per simbol sebagai DataFrame (index = simbol)."""
+    import pandas as pd
+
+    with closing(_connect()) as conn:
+        rows = conn.execute("SELECT symbol, status, timings FROM symbol_tasks WHERE run_id = ?",
+                            (run_id,)).fetchall()
+    return pd.DataFrame([{"symbol": s, "status": st, **json.loads(t or "{}")} for s, st, t in rows]
+                        ).set_index("symbol").sort_index() if rows else pd.DataFrame()
+
+
+# ============================================================
+#   CLI
+# ============================================================
+def _read_symbols(args):
+    symbols = [s.upper() for s in args.symbols]
+    if args.file:
+        with open(args.file) as f:
+            symbols += [line.strip().upper() for line in f if line.strip() and not line.startswith("#")]
+    if args.from_cache:
+        from utils import list_cached_symbols
+        symbols += list_cached_symbols()
+    return symbols
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch job runner bershard dengan checkpoint (queue SQLite)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("submit", help="buat run baru dari daftar simbol")
+    p.add_argument("symbols", nargs="*")
+    p.add_argument("--file", help="file berisi satu simbol per baris")
+    p.add_argument("--from-cache", action="store_true", help="semua simbol di cache harga")
+    p.add_argument("--model", choices=["basic", "advanced"], default="advanced")
+    p.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    p.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    p.add_argument("--work", type=int, default=0, metavar="N", help="langsung jalankan N runner lokal")
+
+    p = sub.add_parser("work", help="ambil dan proses shard (banyak host: lihat catatan lock di atas)")
+    p.add_argument("run_id")
+    p.add_argument("--jobs", type=int, default=MAX_WORKERS)
+    p.add_argument("--lease", type=float, default=LEASE_SECONDS)
+
+    p = sub.add_parser("status", help="progress dan timing per stage")
+    p.add_argument("run_id")
+    p.add_argument("--symbols", action="store_true", help="tampilkan timing per simbol")
+
+    p = sub.add_parser("retry", help="buka kembali simbol yang gagal")
+    p.add_argument("run_id")
+
+    args = parser.parse_args()
+    if args.command == "submit":
+        symbols = _read_symbols(args)
+        if not symbols:
+            parser.error("tidak ada simbol")
+        run_id = submit(symbols, args.model, args.stages, args.shard_size)
+        print(run_id)
+        if args.work:
+            work_pool(run_id, args.work)
+    elif args.command == "work":
+        work_pool(args.run_id, args.jobs, args.lease)
+    elif args.command == "status":
+        print(json.dumps(status(args.run_id), indent=2))
+        if args.symbols:
+            print(symbol_timings(args.run_id).round(3).to_string())
+    else:
+        print(f"{retry_failed(args.run_id)} shard dibuka kembali")
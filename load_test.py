@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import time
+
+import numpy as np
+from aiohttp import ClientSession, ClientTimeout
+
+
+# ============================================================
+#   LOAD TEST UNTUK service.py
+# ============================================================
+async def _worker(session, base_url, paths, latencies, statuses, deadline):
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            async with session.get(base_url + path) as resp:
+                await resp.read()
+                statuses[resp.status] = statuses.get(resp.status, 0) + 1
+        except Exception:
+            statuses["error"] = statuses.get("error", 0) + 1
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_load_test(base_url, symbols, model="basic", endpoint="predict",
+                        concurrency=32, duration=30.0):
+    if endpoint == "predict":
+        paths = [f"/predict/{s}?model={model}" for s in symbols]
+    elif endpoint == "technical":
+        paths = [f"/technical/{s}" for s in symbols]
+    else:
+        paths = ["/logs?limit=50"]
+
+    latencies, statuses = [], {}
+    timeout = ClientTimeout(total=None)
+
+    async with ClientSession(timeout=timeout) as session:
+        start = time.perf_counter()
+        deadline = start + duration
+        # offset tiap worker supaya request tersebar ke semua simbol
+        await asyncio.gather(*[
+            _worker(session, base_url, paths[i % len(paths):] + paths[:i % len(paths)],
+                    latencies, statuses, deadline)
+            for i in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+
+    lat_ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "elapsed_s": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": float(np.percentile(lat_ms, 50)) if len(lat_ms) else None,
+        "p99_ms": float(np.percentile(lat_ms, 99)) if len(lat_ms) else None,
+        "max_ms": float(lat_ms.max()) if len(lat_ms) else None,
+        "statuses": statuses,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the prediction service")
+    parser.add_argument("symbols", nargs="*", default=["BBRI.JK", "AAPL", "TSLA"])
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--endpoint", choices=["predict", "technical", "logs"], default="predict")
+    parser.add_argument("--model", choices=["basic", "advanced"], default="basic")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    args = parser.parse_args()
+
+    stats = asyncio.run(run_load_test(
+        args.url, [s.upper() for s in args.symbols], args.model,
+        args.endpoint, args.concurrency, args.duration
+    ))
+
+    print(f"requests   : {stats['requests']} in {stats['elapsed_s']:.1f}s")
+    print(f"throughput : {stats['throughput_rps']:.1f} req/s")
+    print(f"p50        : {stats['p50_ms']} ms")
+    print(f"p99        : {stats['p99_ms']} ms")
+    print(f"max        : {stats['max_ms']} ms")
+    print(f"statuses   : {stats['statuses']}")
@@ -0,0 +1,202 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import cache_manifest
+from features import OHLCV_COLS, naive_index
+from utils import atomic_write
+
+DATA_DIR = "stock_data"
+PYRAMID_DIR = os.path.join(DATA_DIR, "pyramid")
+
+# Level per resolusi dasar, urut dari halus ke kasar: (nama, aturan resample pandas)
+PYRAMID_LEVELS = {
+    "1d": [("W", "W-FRI"), ("M", "ME")],
+    "60m": [("1d", "D")],
+    "15m": [("60m", "60min"), ("1d", "D")],
+    "5m": [("60m", "60min"), ("1d", "D")],
+    "1m": [("60m", "60min"), ("1d", "D")],
+}
+
+# Chart: level paling kasar yang masih memberi minimal sekian candle di rentang terlihat
+MIN_CANDLES = 120
+
+_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+def _naive(df):
+    """Index datetime tanpa timezone (waktu lokal bursa), apa pun format CSV-nya."""
+    return df.set_axis(naive_index(df.index))
+
+
+def resample_ohlcv(df, rule):
+    out = df[OHLCV_COLS].resample(rule).agg(_AGG)
+    # Bucket tanpa bar (libur) dibuang, bukan diisi NaN
+    return out[out["Close"].notna()]
+
+
+# ============================================================
+#   PENYIMPANAN (DI SAMPING CACHE HARGA)
+# ============================================================
+def _level_path(symbol, base, level):
+    return os.path.join(PYRAMID_DIR, symbol.replace('.', '_'), f"{base}_{level}.csv")
+
+
+def _meta_path(symbol, base):
+    return os.path.join(PYRAMID_DIR, symbol.replace('.', '_'), f"_meta_{base}.json")
+
+
+def _read_level(path):
+    try:
+        return pd.read_csv(path, index_col=0, parse_dates=True)
+    except:
+        return None
+
+
+def _write_level(symbol, base, level, df):
+    path = _level_path(symbol, base, level)
+    atomic_write(path, df.to_csv)
+    cache_manifest.record(symbol, f"pyramid_{base}_{level}", path, df, evict_after=False)
+
+
+def load_pyramid(symbol, base="1d"):
+    """{level: DataFrame OHLCV} untuk level agregat yang tersimpan (tanpa level dasar)."""
+    out = {}
+    for level, _ in PYRAMID_LEVELS[base]:
+        df = _read_level(_level_path(symbol, base, level))
+        if df is not None:
+            out[level] = df
+    return out
+
+
+# ============================================================
+#   UPDATE INKREMENTAL
+# ============================================================
+def _merge_tail(stored, fresh):
+    """Gabungkan bucket terakhir yang tersimpan (bisa parsial) dengan bucket pertama bar baru."""
+    if stored is None or stored.empty:
+        return fresh
+    if fresh.empty:
+        return stored
+    if fresh.index[0] == stored.index[-1]:
+        old, new = stored.iloc[-1], fresh.iloc[0]
+        merged = pd.DataFrame([{
+            "Open": old["Open"], "High": max(old["High"], new["High"]),
+            "Low": min(old["Low"], new["Low"]), "Close": new["Close"],
+            "Volume": old["Volume"] + new["Volume"],
+        }], index=fresh.index[:1])
+        fresh = pd.concat([merged, fresh.iloc[1:]])
+        stored = stored.iloc[:-1]
+    return pd.concat([stored, fresh])
+
+
+def _first_bucket_partial(df, rule, base):
+    """True jika bucket pertama `df` bisa berisi bar lebih awal yang tidak ikut di `df`."""
+    if base != "1d":
+        # Bar intraday dikirim per partisi sesi utuh: tidak ada bar lebih awal di jam/hari itu
+        return False
+    first = df.index[0]
+    label = resample_ohlcv(df.iloc[:1], rule).index[0]
+    bucket_start = label - pd.tseries.frequencies.to_offset(rule) + pd.Timedelta(days=1)
+    return len(pd.bdate_range(bucket_start, first - pd.Timedelta(days=1))) > 0
+
+
+def _splice(stored, fresh, keep_first):
+    """
+    Revisi: bucket tersimpan sebelum `fresh` dipertahankan, sisanya diganti `fresh`.
+    `keep_first` → bucket pertama `fresh` tidak lengkap, versi tersimpan yang dipakai.
+    """
+    if stored is None or stored.empty or fresh.empty:
+        return fresh if stored is None or stored.empty else stored
+    first = fresh.index[0]
+    if keep_first and first in stored.index and len(fresh) > 1:
+        return pd.concat([stored[stored.index <= first], fresh.iloc[1:]])
+    return pd.concat([stored[stored.index < first], fresh])
+
+
+def update_pyramid(symbol, df, base="1d", rebuild=False):
+    """
+    Perbarui semua level dari bar dasar `df` (boleh seluruh histori atau hanya bar terbaru).
+    Hanya bar setelah bar terakhir yang sudah teragregasi yang diproses; bucket terakhir
+    yang parsial digabung. Jika bar tersimpan berubah (bar terakhir direvisi, harga
+    adjusted setelah dividen/split), bucket yang tercakup `df` dihitung ulang dan histori
+    sebelum `df` (mis. hasil backfill_pyramid) dipertahankan. Untuk base intraday `df`
+    harus mulai di awal sesi. Rebuild penuh hanya jika ada level yang hilang dari cache
+    atau `rebuild=True`.
+    """
+    if df is None or df.empty:
+        return {}
+    df = _naive(df[OHLCV_COLS]).sort_index()
+    os.makedirs(os.path.dirname(_meta_path(symbol, base)), exist_ok=True)
+
+    meta = None
+    try:
+        with open(_meta_path(symbol, base)) as f:
+            meta = json.load(f)
+    except:
+        pass
+    levels = load_pyramid(symbol, base)
+
+    new_rows, incremental, revised = df, False, False
+    if not rebuild and meta is not None and len(levels) == len(PYRAMID_LEVELS[base]):
+        last = pd.Timestamp(meta["base_last"])
+        if df.index[0] > last:
+            incremental = True
+        elif last in df.index and np.isclose(df.at[last, "Close"], meta["base_last_close"]):
+            new_rows, incremental = df[df.index > last], True
+        else:
+            revised = True
+
+    if incremental and new_rows.empty:
+        return levels
+
+    out = {}
+    for level, rule in PYRAMID_LEVELS[base]:
+        fresh = resample_ohlcv(new_rows, rule)
+        if incremental:
+            out[level] = _merge_tail(levels.get(level), fresh)
+        elif revised:
+            out[level] = _splice(levels.get(level), fresh, _first_bucket_partial(df, rule, base))
+        else:
+            out[level] = fresh
+        _write_level(symbol, base, level, out[level])
+
+    meta = {"base_last": str(df.index[-1]), "base_last_close": float(df["Close"].iloc[-1])}
+    atomic_write(_meta_path(symbol, base), lambda f: json.dump(meta, f))
+    cache_manifest.evict()
+    return out
+
+
+# ============================================================
+#   PILIH LEVEL UNTUK RENTANG TERLIHAT
+# ============================================================
+def pyramid_levels(df, pyramid, base="1d"):
+    """[(nama_level, DataFrame)] dari halus ke kasar, termasuk level dasar."""
+    return [(base, _naive(df))] + [(lvl, pyramid[lvl]) for lvl, _ in PYRAMID_LEVELS[base] if lvl in pyramid]
+
+
+def choose_level(levels, start=None, end=None, min_candles=MIN_CANDLES):
+    """
+    Level paling kasar yang masih punya >= `min_candles` candle di [start, end]
+    dan mencakup awal rentang; jika tidak ada, level paling halus.
+    """
+    chosen = levels[0]
+    for name, df in levels:
+        if df.empty:
+            continue
+        lo = start if start is not None else df.index[0]
+        hi = end if end is not None else df.index[-1]
+        visible = df.loc[lo:hi]
+        # Label bucket (mis. akhir minggu) boleh lewat dari awal rentang maksimal satu bucket
+        bucket = df.index[1] - df.index[0] if len(df) > 1 else pd.Timedelta(0)
+        if len(visible) >= min_candles and df.index[0] <= pd.Timestamp(lo) + bucket:
+            chosen = (name, df)
+    return chosen
+
+
+def backfill_pyramid(symbol, period="max"):
+    """Bangun ulang pyramid dari histori panjang tanpa mengganti cache harga 2 tahun."""
+    from data_loader import _fetch_history
+    return update_pyramid(symbol, _fetch_history(symbol, period), rebuild=True)
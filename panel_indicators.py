@@ -0,0 +1,265 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from features import OHLCV_COLS, naive_index
+
+# ============================================================
+#   PANEL INDICATORS (TIME × SYMBOL, SATU PASS VEKTORISASI)
+# ============================================================
+# Semua array berbentuk (T, S): baris = tanggal (urut naik), kolom = simbol.
+# NaN = bar tidak ada (sebelum listing / libur khusus simbol). Definisi indikator
+# sama dengan versi per-simbol di technical_analysis.py dan features.py, dihitung atas
+# bar milik simbol itu sendiri (bukan kalender gabungan semua simbol):
+#   - rolling(w): NaN jika ada NaN di dalam window (min_periods = w)
+#   - ewm(span): sama dengan pandas ewm(adjust=True, ignore_na=False)
+
+
+def _as_panel(x):
+    return np.asarray(x, dtype=np.float64)
+
+
+def rolling_mean(x, window):
+    """Sama dengan DataFrame.rolling(window).mean(), lewat cumsum + hitungan NaN."""
+    x = _as_panel(x)
+    out = np.full(x.shape, np.nan)
+    if len(x) < window:
+        return out
+    nan = np.isnan(x)
+    zero = np.concatenate([np.zeros((1, x.shape[1])), np.cumsum(np.where(nan, 0.0, x), axis=0)])
+    n_nan = np.concatenate([np.zeros((1, x.shape[1]), dtype=np.int64), np.cumsum(nan, axis=0)])
+    sums = zero[window:] - zero[:-window]
+    full = (n_nan[window:] - n_nan[:-window]) == 0
+    out[window - 1:] = np.where(full, sums / window, np.nan)
+    return out
+
+
+SYMBOL_BLOCK = 64  # window view diproses per blok simbol supaya memori sementara kecil
+
+
+def _rolling_reduce(x, window, reduce):
+    x = _as_panel(x)
+    out = np.full(x.shape, np.nan)
+    if len(x) >= window:
+        # NaN di window ikut ter-propagasi oleh reduce (max/min/std)
+        for j in range(0, x.shape[1], SYMBOL_BLOCK):
+            view = sliding_window_view(x[:, j:j + SYMBOL_BLOCK], window, axis=0)
+            out[window - 1:, j:j + SYMBOL_BLOCK] = reduce(view)
+    return out
+
+
+def _std(view):
+    # Dua pass (mean lalu deviasi): window harga konstan → std tepat 0 seperti pandas
+    dev = view - view.mean(axis=-1, keepdims=True)
+    return np.sqrt((dev * dev).sum(axis=-1) / (view.shape[-1] - 1))
+
+
+def rolling_std(x, window):
+    """Sama dengan rolling(window).std() (ddof=1)."""
+    return _rolling_reduce(x, window, _std)
+
+
+def rolling_max(x, window):
+    return _rolling_reduce(x, window, lambda view: view.max(axis=-1))
+
+
+def rolling_min(x, window):
+    return _rolling_reduce(x, window, lambda view: view.min(axis=-1))
+
+
+def ewm_mean(x, span):
+    """
+    Sama dengan pandas ewm(span=span).mean() per kolom (adjust=True, ignore_na=False):
+    bar NaN tidak meng-update rata-rata tapi tetap meluruhkan bobot lama.
+    Loop hanya di sumbu waktu; tiap langkah vektor untuk semua simbol.
+    """
+    return ewm_mean_state(x, span)[0]
+
+
+def ewm_mean_state(x, span, state=None):
+    """
+    ewm_mean yang bisa dilanjutkan: return (out, state) dengan state = (weighted, old_wt)
+    setelah bar terakhir. Memberi `state` dari panggilan sebelumnya menghasilkan nilai
+    yang sama persis dengan menghitung ulang dari awal histori.
+    """
+    x = _as_panel(x)
+    decay = 1.0 - 2.0 / (span + 1.0)
+    out = np.empty(x.shape)
+    if state is None:
+        weighted = x[0].copy()
+        old_wt = np.ones(x.shape[1])
+        out[0] = weighted
+        begin = 1
+    else:
+        weighted, old_wt = (np.array(s, dtype=np.float64).reshape(x.shape[1]) for s in state)
+        begin = 0
+    for t in range(begin, len(x)):
+        cur = x[t]
+        obs = ~np.isnan(cur)
+        started = ~np.isnan(weighted)
+
+        wt = np.where(started, old_wt * decay, old_wt)
+        upd = started & obs
+        blended = (wt * weighted + cur) / (wt + 1.0)
+        weighted = np.where(upd & (weighted != cur), blended, weighted)
+        old_wt = np.where(upd, wt + 1.0, wt)
+        # Simbol yang baru listing: nilai pertama langsung jadi rata-rata
+        weighted = np.where(~started & obs, cur, weighted)
+        out[t] = weighted
+    return out, (weighted, old_wt)
+
+
+def diff(x, periods=1):
+    x = _as_panel(x)
+    out = np.full(x.shape, np.nan)
+    out[periods:] = x[periods:] - x[:-periods]
+    return out
+
+
+def pct_change(x, periods=1):
+    x = _as_panel(x)
+    out = np.full(x.shape, np.nan)
+    out[periods:] = x[periods:] / x[:-periods] - 1
+    return out
+
+
+def rsi(close, window=14):
+    delta = diff(close)
+    gain = rolling_mean(np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0)), window)
+    loss = rolling_mean(np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0)), window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 - (100 / (1 + gain / loss))
+
+
+# ============================================================
+#   BAR MILIK SIMBOL SENDIRI (KALENDER BURSA BERBEDA)
+# ============================================================
+# Panel gabungan US + JK: tiap simbol punya lubang NaN di hari libur bursa lain.
+# Window rolling di kalender gabungan akan ikut NaN → indikator dihitung di layout
+# "packed": bar milik tiap simbol digeser ke bawah berurutan (rata kanan), baris atas
+# yang kosong = NaN seperti simbol yang baru listing. Baris T-1 = bar terakhir tiap simbol.
+def own_bars(*arrays):
+    """
+    Layout packed untuk panel (T, S): return (order, n_missing), atau None jika semua
+    simbol punya bar di semua baris. Bar ada = salah satu array tidak NaN di baris itu.
+    """
+    present = np.zeros(np.shape(arrays[0]), dtype=bool)
+    for x in arrays:
+        present |= ~np.isnan(_as_panel(x))
+    if present.all():
+        return None
+    # Stable: baris kosong (False) di atas, bar milik simbol tetap urut waktu di bawah
+    order = np.argsort(present, axis=0, kind="stable")
+    return order, len(present) - present.sum(axis=0)
+
+
+def pack(x, layout):
+    """Panel sejajar tanggal → layout packed (lihat own_bars)."""
+    if layout is None:
+        return _as_panel(x)
+    order, n_missing = layout
+    out = np.take_along_axis(_as_panel(x), order, axis=0)
+    out[np.arange(len(out))[:, None] < n_missing] = np.nan
+    return out
+
+
+def unpack(x, layout):
+    """Kebalikan `pack`: kembali sejajar tanggal, NaN di baris tanpa bar milik simbol."""
+    if layout is None:
+        return x
+    out = np.empty(np.shape(x))
+    np.put_along_axis(out, layout[0], x, axis=0)
+    return out
+
+
+# ============================================================
+#   SEMUA INDIKATOR SEKALIGUS
+# ============================================================
+def build_panel_indicators(open_=None, high=None, low=None, close=None, volume=None, aligned=True):
+    """
+    Versi panel dari `build_technical_indicators` (+ EMA dan volatilitas dari features.py).
+    Input array (T, S) per kolom OHLCV; return {nama_kolom: array (T, S)}.
+    Rolling/EWM dihitung atas bar milik tiap simbol: hasil per kolom sama dengan versi
+    per-simbol walau simbol lain punya hari libur berbeda. Tidak ada dropna: baris warm-up
+    dan baris tanpa bar tetap NaN supaya semua simbol tetap sejajar.
+    `aligned=False` → hasil dalam layout packed (baris terakhir = bar terakhir tiap simbol).
+    """
+    layout = own_bars(*[x for x in (open_, high, low, close, volume) if x is not None])
+    out = _indicators(*[None if x is None else pack(x, layout) for x in (open_, high, low, close, volume)])
+    if aligned:
+        out = {name: unpack(arr, layout) for name, arr in out.items()}
+    return out
+
+
+def _indicators(open_, high, low, close, volume):
+    close = _as_panel(close)
+    out = {}
+
+    for win in [5, 10, 20, 50, 100, 200]:
+        out[f'MA_{win}'] = rolling_mean(close, win)
+
+    out['RSI_14'] = rsi(close, 14)
+
+    ema_12 = ewm_mean(close, 12)
+    ema_26 = ewm_mean(close, 26)
+    out['EMA_12'] = ema_12
+    out['EMA_26'] = ema_26
+    out['MACD'] = ema_12 - ema_26
+    out['MACD_Signal'] = ewm_mean(out['MACD'], 9)
+    out['MACD_Histogram'] = out['MACD'] - out['MACD_Signal']
+
+    if volume is not None:
+        out['Volume_MA_20'] = rolling_mean(volume, 20)
+
+    std = rolling_std(close, 20)
+    out['BB_Middle'] = out['MA_20']
+    out['BB_Upper'] = out['MA_20'] + std * 2
+    out['BB_Lower'] = out['MA_20'] - std * 2
+
+    if high is not None:
+        out['Resistance_20'] = rolling_max(high, 20)
+    if low is not None:
+        out['Support_20'] = rolling_min(low, 20)
+
+    returns = pct_change(close)
+    for win in [5, 20, 50]:
+        out[f'Vol_{win}'] = rolling_std(returns, win)
+
+    return out
+
+
+# ============================================================
+#   KONVERSI FRAME ↔ PANEL
+# ============================================================
+def frames_to_panel(frames):
+    """
+    {symbol: DataFrame OHLCV} → (dates, symbols, {kolom: array (T, S)}) sejajar per tanggal.
+    Index dinormalisasi ke waktu lokal bursa tanpa timezone (tanggal sesi untuk bar harian),
+    supaya bar US dan JK di tanggal yang sama jatuh di baris yang sama.
+    """
+    symbols = sorted(s for s, df in frames.items() if df is not None and not df.empty)
+    local = []
+    for sym in symbols:
+        df = frames[sym]
+        index = naive_index(df.index)
+        keep = ~index.duplicated(keep="last")
+        local.append((index[keep].as_unit("ns").asi8, df[OHLCV_COLS].to_numpy(dtype=np.float64)[keep]))
+    dates = np.unique(np.concatenate([ts for ts, _ in local]))
+
+    panel = {col: np.full((len(dates), len(symbols)), np.nan) for col in OHLCV_COLS}
+    for j, (ts, values) in enumerate(local):
+        pos = np.searchsorted(dates, ts)
+        for k, col in enumerate(OHLCV_COLS):
+            panel[col][pos, j] = values[:, k]
+    return pd.DatetimeIndex(dates.view("datetime64[ns]")), symbols, panel
+
+
+def panel_from_store(store):
+    """Panel dari SharedPriceStore (view strided, tanpa copy)."""
+    return store.dates, store.symbols, {col: store.panel(col) for col in store.columns}
+
+
+def indicators_for_symbol(indicators, dates, symbols, symbol):
+    """Ambil satu simbol dari hasil panel sebagai DataFrame (mirip output per-simbol)."""
+    i = symbols.index(symbol)
+    return pd.DataFrame({name: arr[:, i] for name, arr in indicators.items()}, index=dates)
@@ -0,0 +1,279 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import cache_manifest
+from panel_indicators import frames_to_panel
+from utils import atomic_write
+
+DATA_DIR = "stock_data"
+PORTFOLIO_DIR = os.path.join(DATA_DIR, "portfolio")
+
+TRADING_DAYS = 252
+EW_HALFLIFE = 63   # ~3 bulan bursa
+
+
+# ============================================================
+#   RETURN PANEL DARI CACHE HARGA
+# ============================================================
+def load_prices(symbols, period='2y', cache_only=False):
+    """
+    Close sejajar per tanggal sesi tanpa timezone (T × S) dari cache harga; simbol tanpa
+    data dilewati. Hari libur khusus satu bursa = NaN di kolom simbol itu saja.
+    `cache_only=True` → hanya CSV yang tercatat di manifest, tanpa fetch walau kadaluarsa.
+    """
+    from data_loader import get_cached_stock_data, _read_csv
+    if cache_only:
+        entries = {s: cache_manifest.lookup(s, "price") for s in symbols}
+        frames = {s: _read_csv(e["path"]) if e else None for s, e in entries.items()}
+    else:
+        frames = {s: get_cached_stock_data(s, period) for s in symbols}
+    if all(df is None or df.empty for df in frames.values()):
+        return pd.DataFrame()
+    dates, syms, panel = frames_to_panel(frames)
+    return pd.DataFrame(panel["Close"], index=dates, columns=syms)
+
+
+def to_returns(prices):
+    """
+    Return sederhana per simbol atas bar miliknya sendiri (bar sebelumnya = bar terakhir
+    simbol itu, melewati libur bursa lain), lalu sejajar per tanggal. NaN jika hari ini
+    tidak ada bar untuk simbol tersebut.
+    """
+    return (prices / prices.ffill().shift(1) - 1).iloc[1:]
+
+
+def _check_overlap(returns):
+    """Kovarians butuh tanggal bersama; tanpa itu semua statistik jadi NaN diam-diam."""
+    if returns.shape[1] > 1 and not returns.notna().all(axis=1).any():
+        raise ValueError(f"Tidak ada tanggal bersama untuk {list(returns.columns)} di cache harga")
+
+
+# ============================================================
+#   KOVARIANS / KORELASI (PAIRWISE, FLOAT32 BATCHED)
+# ============================================================
+def _pairwise_moments(returns, dtype=np.float32):
+    """
+    Sum per pasangan (i, j) atas baris di mana KEDUANYA ada, lewat perkalian matriks:
+    n_ij, Σx_i, Σx_j, Σx_i², Σx_j², Σx_i x_j. Sama dengan pandas cov/corr pairwise.
+    """
+    x = np.asarray(returns, dtype=np.float64)
+    mask = ~np.isnan(x)
+    # Demean per kolom (float64) dulu supaya float32 tidak kehilangan presisi
+    x = x - np.nanmean(x, axis=0)
+    x0 = np.where(mask, x, 0.0).astype(dtype)
+    m = mask.astype(dtype)
+
+    n = m.T @ m
+    sx = x0.T @ m            # sx[i, j] = Σ x_i di baris di mana j juga ada
+    sxx = (x0 * x0).T @ m
+    sxy = x0.T @ x0
+    return n, sx, sxx, sxy
+
+
+def covariance_matrix(returns, min_periods=20, dtype=np.float32):
+    """Kovarians pairwise (ddof=1), NaN jika pasangan punya < `min_periods` bar bersama."""
+    n, sx, _, sxy = _pairwise_moments(returns, dtype)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = (sxy - sx * sx.T / n) / (n - 1)
+    cov[n < min_periods] = np.nan
+    return _frame(cov, returns)
+
+
+def correlation_matrix(returns, min_periods=20, dtype=np.float32):
+    n, sx, sxx, sxy = _pairwise_moments(returns, dtype)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sxy - sx * sx.T / n
+        var_i = sxx - sx * sx / n
+        corr = cov / np.sqrt(var_i * var_i.T)
+    corr = np.clip(corr, -1, 1)
+    corr[n < min_periods] = np.nan
+    return _frame(corr, returns)
+
+
+def _frame(matrix, returns):
+    cols = getattr(returns, "columns", None)
+    return pd.DataFrame(matrix, index=cols, columns=cols) if cols is not None else matrix
+
+
+# ============================================================
+#   RISIKO PORTOFOLIO
+# ============================================================
+def _weights(symbols, weights):
+    if weights is None:
+        return pd.Series(1.0 / len(symbols), index=symbols)
+    w = pd.Series(weights, dtype=float).reindex(symbols).fillna(0.0)
+    return w / w.sum()
+
+
+def portfolio_volatility(cov, weights=None, periods=TRADING_DAYS):
+    """Volatilitas tahunan sqrt(wᵀ Σ w · periods); pasangan tanpa data dianggap kovarians 0."""
+    w = _weights(cov.columns, weights).to_numpy(dtype=np.float64)
+    sigma = np.nan_to_num(np.asarray(cov, dtype=np.float64))
+    return float(np.sqrt(w @ sigma @ w * periods))
+
+
+def betas(returns, index_returns, min_periods=20):
+    """Beta setiap simbol terhadap index: cov(r_i, r_m) / var(r_m) di bar yang sama."""
+    r = returns.reindex(index_returns.index)
+    m = index_returns.to_numpy(dtype=np.float64)[:, None]
+    mask = ~np.isnan(r.to_numpy()) & ~np.isnan(m)
+    x = np.where(mask, r.to_numpy(), 0.0)
+    y = np.where(mask, m, 0.0)
+    n = mask.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mx, my = x.sum(axis=0) / n, y.sum(axis=0) / n
+        cov = (x * y).sum(axis=0) / n - mx * my
+        var = (y * y).sum(axis=0) / n - my * my
+        beta = cov / var
+    return pd.Series(np.where(n >= min_periods, beta, np.nan), index=returns.columns)
+
+
+def drawdowns(prices):
+    """Drawdown (≤ 0) terhadap puncak sebelumnya, untuk setiap kolom sekaligus."""
+    p = prices.to_numpy(dtype=np.float64)
+    peak = np.fmax.accumulate(np.where(np.isnan(p), -np.inf, p), axis=0)
+    with np.errstate(invalid="ignore"):
+        dd = p / peak - 1
+    return pd.DataFrame(dd, index=prices.index, columns=prices.columns)
+
+
+def portfolio_value(prices, weights=None):
+    """Nilai portofolio buy-and-hold (mulai 1.0) dengan bobot awal; harga hilang di-forward-fill."""
+    p = prices.ffill().bfill()
+    w = _weights(p.columns, weights)
+    return (p / p.iloc[0] * w).sum(axis=1).rename("portfolio")
+
+
+def portfolio_summary(symbols, weights=None, index_symbol=None, period='2y'):
+    """Ringkasan risiko untuk sekumpulan simbol yang ada di cache."""
+    prices = load_prices(symbols, period)
+    returns = to_returns(prices)
+    _check_overlap(returns)
+    cov = covariance_matrix(returns)
+    value = portfolio_value(prices, weights)
+
+    summary = {
+        "symbols": list(prices.columns),
+        "volatility": portfolio_volatility(cov, weights),
+        "max_drawdown": float(drawdowns(value.to_frame()).min().iloc[0]),
+        "symbol_volatility": (returns.std() * np.sqrt(TRADING_DAYS)).to_dict(),
+        "symbol_max_drawdown": drawdowns(prices).min().to_dict(),
+    }
+
+    # Index hanya dari cache: render halaman tidak boleh menunggu fetch; tanpa cache → tanpa beta
+    index_symbol = index_symbol or default_index(symbols)
+    try:
+        index_prices = load_prices([index_symbol], period, cache_only=True)
+    except:
+        index_prices = pd.DataFrame()
+    if not index_prices.empty:
+        index_returns = to_returns(index_prices).iloc[:, 0]
+        summary["index"] = index_symbol
+        summary["beta"] = betas(returns, index_returns).to_dict()
+        port_returns = value.pct_change().iloc[1:].to_frame()
+        summary["portfolio_beta"] = float(betas(port_returns, index_returns).iloc[0])
+    return summary, prices, returns, cov
+
+
+def default_index(symbols):
+    return "^JKSE" if symbols and all(s.endswith(".JK") for s in symbols) else "^GSPC"
+
+
+# ============================================================
+#   KOVARIANS EXPONENTIALLY WEIGHTED (UPDATE INKREMENTAL)
+# ============================================================
+class EWCovariance:
+    """
+    Kovarians EW yang di-update per bar baru, O(S²) per bar tanpa menghitung ulang histori:
+        d = r - mean;  mean += α d;  cov = (1 - α)(cov + α d dᵀ)
+    Return yang hilang (libur / belum listing) diisi mean → simbol itu tidak memberi
+    informasi bar tersebut, kovarians lamanya hanya meluruh.
+    """
+
+    def __init__(self, symbols, halflife=EW_HALFLIFE, dtype=np.float32):
+        self.symbols = list(symbols)
+        self.halflife = halflife
+        self.alpha = 1 - 0.5 ** (1 / halflife)
+        self.mean = np.zeros(len(self.symbols), dtype=dtype)
+        self.cov = np.zeros((len(self.symbols), len(self.symbols)), dtype=dtype)
+        self.n_obs = 0
+        self.last_date = None
+
+    def update(self, returns):
+        """Tambahkan bar baru (DataFrame T × S); bar <= last_date dilewati."""
+        r = returns.reindex(columns=self.symbols)
+        if self.last_date is not None:
+            r = r[r.index > self.last_date]
+        a = self.alpha
+        for row in r.to_numpy(dtype=self.cov.dtype):
+            if self.n_obs == 0:
+                # Bar pertama hanya menetapkan mean (sama dengan pandas ewm adjust=False)
+                self.mean = np.nan_to_num(row).astype(self.cov.dtype)
+                self.n_obs = 1
+                continue
+            row = np.where(np.isnan(row), self.mean, row)
+            d = row - self.mean
+            self.mean += a * d
+            self.cov += a * np.outer(d, d)
+            self.cov *= 1 - a
+            self.n_obs += 1
+        if len(r):
+            self.last_date = r.index[-1]
+        return self
+
+    def covariance(self):
+        return pd.DataFrame(self.cov, index=self.symbols, columns=self.symbols)
+
+    def correlation(self):
+        std = np.sqrt(np.diag(self.cov))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = self.cov / np.outer(std, std)
+        return pd.DataFrame(corr, index=self.symbols, columns=self.symbols)
+
+    # ---------- PERSISTENSI ----------
+    @staticmethod
+    def path(name):
+        return os.path.join(PORTFOLIO_DIR, f"ewcov_{name}.npz")
+
+    def save(self, name):
+        os.makedirs(PORTFOLIO_DIR, exist_ok=True)
+        path = self.path(name)
+        last_date = str(self.last_date) if self.last_date is not None else ""
+        atomic_write(path, lambda f: np.savez(f, symbols=np.array(self.symbols), mean=self.mean,
+                                              cov=self.cov, meta=np.array([self.halflife, self.n_obs]),
+                                              last_date=np.array(last_date)), mode="wb")
+        # State bisa dibangun ulang dari cache harga → boleh ikut di-evict
+        cache_manifest.record(f"portfolio:{name}", "ewcov", path, evict_after=False)
+        return path
+
+    @classmethod
+    def load(cls, name):
+        path = cls.path(name)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as f:
+            obj = cls([str(s) for s in f["symbols"]], halflife=float(f["meta"][0]), dtype=f["cov"].dtype)
+            obj.mean, obj.cov = f["mean"], f["cov"]
+            obj.n_obs = int(f["meta"][1])
+            last = str(f["last_date"])
+            obj.last_date = pd.Timestamp(last) if last else None
+        return obj
+
+
+def update_ew_covariance(name, symbols, period='2y', halflife=EW_HALFLIFE, returns=None):
+    """
+    Load state EW tersimpan, tambahkan hanya bar setelah `last_date`, simpan lagi.
+    Daftar simbol berubah → dibangun ulang dari histori cache. `returns` yang sudah
+    dihitung (mis. dari portfolio_summary) dipakai langsung tanpa load ulang.
+    """
+    state = EWCovariance.load(name)
+    if state is None or state.symbols != list(symbols) or state.halflife != halflife:
+        state = EWCovariance(symbols, halflife)
+    if returns is None:
+        returns = to_returns(load_prices(symbols, period))
+    _check_overlap(returns)
+    state.update(returns)
+    state.save(name)
+    return state
@@ -1,46 +1,78 @@
+import json
+
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler, RobustScaler
 from sklearn.metrics import mean_absolute_error
 
-from data_loader import get_cached_stock_data, get_cached_fundamental_data
+from data_loader import get_cached_stock_data, get_cached_intraday_data, get_cached_fundamental_data
 from features import (
-    create_basic_features,
-    create_comprehensive_features,
+    build_basic_dataset,
+    build_advanced_dataset,
     calculate_fundamental_score,
-    get_last_3_days_data
+    get_last_3_days_data,
+    annualization_factor
+)
+from feature_selection import get_selected_features, save_selected_features, select_features
+from forest_export import export_forest, load_model_bundle, save_model_bundle, score_bundle
+from tuning import get_tuned_params
+
+# Default hyperparameter; di-override oleh hasil tuning.py jika ada
+BASIC_MODEL_PARAMS = dict(n_estimators=60, random_state=42)
+ADVANCED_MODEL_PARAMS = dict(
+    n_estimators=200, max_depth=20, min_samples_split=8,
+    min_samples_leaf=4, max_features='sqrt', random_state=42
 )
 
+
+# Intraday: hanya window terbaru yang di-load (partisi per tanggal), dibatasi jumlah bar
+INTRADAY_TRAIN_PERIOD = {"1m": "7d", "5m": "60d", "15m": "60d", "60m": "730d"}
+MAX_INTRADAY_BARS = 20000
+
+
+def get_model_params(symbol, model_type):
+    defaults = BASIC_MODEL_PARAMS if model_type.startswith("basic") else ADVANCED_MODEL_PARAMS
+    params = dict(defaults)
+    params.update(get_tuned_params(symbol, model_type) or {})
+    return params
+
+
+def _model_key(model_type, interval):
+    """Key untuk tuning/seleksi fitur/model tersimpan: 'advanced' atau 'advanced_5m'."""
+    return model_type if interval == '1d' else f"{model_type}_{interval}"
+
+
+def _training_fingerprint(data, X, params):
+    """Berubah jika ada bar baru / bar terakhir direvisi, fitur terpilih atau hyperparameter berubah."""
+    return json.dumps([str(data.index[-1]), float(data['Close'].iloc[-1]), len(X), list(X.columns), params],
+                      sort_keys=True, default=str)
+
+
+def _load_training_data(symbol, period, force_update, interval):
+    if interval == '1d':
+        return get_cached_stock_data(symbol, period, force_update)
+    # Hanya partisi terbaru yang dibaca, sampai MAX_INTRADAY_BARS terkumpul
+    return get_cached_intraday_data(symbol, interval, INTRADAY_TRAIN_PERIOD[interval], force_update,
+                                    max_bars=MAX_INTRADAY_BARS)
+
+
 # ======================================================
 #                BASIC PREDICTION MODEL
 # ======================================================
-def basic_predict_stock_price(symbol, days_to_predict=1, force_update=False):
+def basic_predict_stock_price(symbol, days_to_predict=1, force_update=False, interval='1d'):
     """
     Prediksi dasar untuk saham stabil.
+    `interval` intraday ('5m', '60m', ...) memprediksi `days_to_predict` bar ke depan.
     """
     # Ambil data
-    data = get_cached_stock_data(symbol, '2y', force_update)
+    data = _load_training_data(symbol, '2y', force_update, interval)
     if data is None or len(data) < 100:
         return None, None, None
 
     # Buat fitur
-    df = create_basic_features(data)
+    X, y_open, y_close = build_basic_dataset(data, days_to_predict)
     hist_3 = get_last_3_days_data(data)
 
-    feature_cols = [
-        'Open','High','Low','Close','Volume',
-        'Price_Lag_1','Price_Lag_2','Price_Lag_3',
-        'MA_5','MA_10','MA_20','Volatility','RSI','MACD'
-    ]
-    feature_cols = [c for c in feature_cols if c in df.columns]
-
-    X = df[feature_cols]
-    y_open = df['Open'].shift(-days_to_predict)
-    y_close = df['Close'].shift(-days_to_predict)
-
-    valid = ~y_open.isna()
-    X, y_open, y_close = X[valid], y_open[valid], y_close[valid]
-
     if len(X) < 50:
         return None, None, None
 
@@ -56,8 +88,9 @@ def basic_predict_stock_price(symbol, days_to_predict=1, force_update=False):
     X_test_scaled = scaler.transform(X_test)
 
     # Train model
-    model_open = RandomForestRegressor(n_estimators=60, random_state=42)
-    model_close = RandomForestRegressor(n_estimators=60, random_state=42)
+    params = get_model_params(symbol, _model_key("basic", interval))
+    model_open = RandomForestRegressor(**params)
+    model_close = RandomForestRegressor(**params)
 
     model_open.fit(X_train_scaled, y_open_train)
     model_close.fit(X_train_scaled, y_close_train)
@@ -77,8 +110,9 @@ def basic_predict_stock_price(symbol, days_to_predict=1, force_update=False):
         "open_range": (pred_open - mae_open, pred_open + mae_open),
         "predicted_close": pred_close,
         "close_range": (pred_close - mae_close, pred_close + mae_close),
-        "volatility": data['Close'].pct_change().std() * np.sqrt(252),
-        "model_type": "basic"
+        "volatility": data['Close'].pct_change().std() * annualization_factor(data.index),
+        "model_type": "basic",
+        "interval": interval
     }
 
     return result, hist_3, data
@@ -88,12 +122,14 @@ def basic_predict_stock_price(symbol, days_to_predict=1, force_update=False):
 # ======================================================
 #              ADVANCED PREDICTION MODEL
 # ======================================================
-def advanced_predict_stock_price(symbol, days_to_predict=1, force_update=False):
+def advanced_predict_stock_price(symbol, days_to_predict=1, force_update=False, interval='1d'):
     """
     Prediksi advanced (teknikal + fundamental).
     """
+    model_key = _model_key("advanced", interval)
+
     # Load data teknikal
-    data = get_cached_stock_data(symbol, '3y', force_update)
+    data = _load_training_data(symbol, '3y', force_update, interval)
     if data is None or len(data) < 150:
         return None, None, None, None
 
@@ -103,46 +139,62 @@ def advanced_predict_stock_price(symbol, days_to_predict=1, force_update=False):
 
     hist_3 = get_last_3_days_data(data)
 
-    # Build features
-    df = create_comprehensive_features(data, fundamental, fund_score)
-
-    # Siapkan dataset
-    feature_cols = [c for c in df.columns if c not in ['Open','High','Low','Close','Volume']]
-    X = df[feature_cols]
-    y_open = df['Open'].shift(-days_to_predict)
-    y_close = df['Close'].shift(-days_to_predict)
+    # Build features & dataset (hanya fitur terpilih jika seleksi sudah di-cache)
+    selected = get_selected_features(symbol, model_key)
+    X, y_open, y_close = build_advanced_dataset(
+        data, fundamental, fund_score, days_to_predict, columns=selected,
+        symbol=symbol, interval=interval
+    )
 
-    valid = ~y_open.isna()
-    X, y_open, y_close = X[valid], y_open[valid], y_close[valid]
+    # Seleksi fitur pertama kali: buang kolom konstan / duplikat, simpan hasilnya
+    if selected is None and len(X) >= 100:
+        selected = select_features(X, y_close)
+        save_selected_features(symbol, selected, model_key, n_candidates=X.shape[1])
+        X = X[selected]
 
     if len(X) < 100:
         return None, None, None, None
 
-    # Scaling
-    scaler = RobustScaler()
-    X_scaled = scaler.fit_transform(X)
-
-    # Model advanced
-    model_open = RandomForestRegressor(
-        n_estimators=200, max_depth=20, min_samples_split=8,
-        min_samples_leaf=4, max_features='sqrt', random_state=42
-    )
-    model_close = RandomForestRegressor(
-        n_estimators=200, max_depth=20, min_samples_split=8,
-        min_samples_leaf=4, max_features='sqrt', random_state=42
-    )
-
-    model_open.fit(X_scaled, y_open)
-    model_close.fit(X_scaled, y_close)
-
-    # Predict
-    last_scaled = scaler.transform(X.iloc[[-1]])
-    pred_open = model_open.predict(last_scaled)[0]
-    pred_close = model_close.predict(last_scaled)[0]
+    params = get_model_params(symbol, model_key)
+    fingerprint = _training_fingerprint(data, X, params)
+    bundle = None if force_update else load_model_bundle(symbol, model_key)
+
+    if bundle is not None and bundle["fingerprint"] == fingerprint:
+        # Data & parameter sama dengan training terakhir → pakai bundle tersimpan
+        # (hasil identik dengan forest yang baru di-fit), tanpa training dan export ulang
+        per_tree = score_bundle(bundle, X.iloc[[-1]], per_tree=True)
+        open_trees, close_trees = per_tree["open"][:, 0], per_tree["close"][:, 0]
+    else:
+        # Scaling
+        scaler = RobustScaler()
+        X_scaled = scaler.fit_transform(X)
+
+        # Model advanced
+        model_open = RandomForestRegressor(**params)
+        model_close = RandomForestRegressor(**params)
+
+        model_open.fit(X_scaled, y_open)
+        model_close.fit(X_scaled, y_close)
+
+        # Semua tree dievaluasi sekaligus (prediksi + confidence interval)
+        last_scaled = scaler.transform(X.iloc[[-1]])
+        forest_open = export_forest(model_open)
+        forest_close = export_forest(model_close)
+        open_trees = forest_open.predict_per_tree(last_scaled)[:, 0]
+        close_trees = forest_close.predict_per_tree(last_scaled)[:, 0]
+
+        # Simpan model compact untuk batch scoring tanpa training ulang (hanya setelah retrain)
+        save_model_bundle(symbol, model_key, scaler, X.columns,
+                          {"open": forest_open, "close": forest_close}, fingerprint=fingerprint)
+
+    # Predict: rata-rata tree dijumlah berurutan (cumsum), bit-identik dengan
+    # RandomForestRegressor.predict; sum() 1-D memakai pairwise summation
+    pred_open = np.cumsum(open_trees)[-1] / len(open_trees)
+    pred_close = np.cumsum(close_trees)[-1] / len(close_trees)
 
     # Ensemble STD → Confidence interval
-    open_std = np.std([est.predict(last_scaled)[0] for est in model_open.estimators_])
-    close_std = np.std([est.predict(last_scaled)[0] for est in model_close.estimators_])
+    open_std = np.std(open_trees)
+    close_std = np.std(close_trees)
 
     confidence = 1.96 * (1 - (fund_score / 200))  # semakin bagus fundamental → CI mengecil
 
@@ -173,9 +225,10 @@ def advanced_predict_stock_price(symbol, days_to_predict=1, force_update=False):
         "open_range": open_range,
         "predicted_close": pred_close,
         "close_range": close_range,
-        "volatility": data['Close'].pct_change().std() * np.sqrt(252),
+        "volatility": data['Close'].pct_change().std() * annualization_factor(data.index),
         "fundamental_score": fund_score,
-        "model_type": "advanced"
+        "model_type": "advanced",
+        "interval": interval
     }
 
     return result, hist_3, fundamental, data
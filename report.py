@@ -0,0 +1,219 @@
+import argparse
+import html
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from utils import atomic_write, to_serializable, read_full_prediction_log, write_prediction_log
+
+REPORT_DIR = "reports"
+PLOTLY_JS = "plotly.min.js"
+MAX_WORKERS = 4
+
+CHART_ORDER = ["candlestick", "rsi", "macd", "volume", "bollinger", "technical_score"]
+
+_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<script src="{plotly_js}"></script>
+<style>
+body {{ font-family: sans-serif; margin: 24px; color: #222; }}
+table {{ border-collapse: collapse; margin-bottom: 16px; }}
+td, th {{ border: 1px solid #ddd; padding: 4px 10px; text-align: left; }}
+th {{ background: #f4f4f4; }}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+def _table(rows, header=None):
+    out = ["<table>"]
+    if header:
+        out.append("<tr>" + "".join(f"<th>{html.escape(str(h))}</th>" for h in header) + "</tr>")
+    for row in rows:
+        out.append("<tr>" + "".join(f"<td>{c}</td>" for c in row) + "</tr>")
+    out.append("</table>")
+    return "\n".join(out)
+
+
+def _fmt(value):
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return html.escape(str(value))
+
+
+def _latest_prediction(symbol):
+    for entry in reversed(read_full_prediction_log()):
+        if entry.get("symbol") == symbol:
+            return entry
+    return None
+
+
+def ensure_plotly_js(out_dir):
+    """Satu salinan plotly.js per folder report, dipakai bersama oleh semua file HTML."""
+    from plotly.offline import get_plotlyjs
+
+    path = os.path.join(out_dir, PLOTLY_JS)
+    if not os.path.exists(path):
+        js = get_plotlyjs()
+        atomic_write(path, lambda f: f.write(js))
+    return path
+
+
+# ============================================================
+#   WORKER: RENDER SATU SIMBOL (JALAN DI PROCESS POOL)
+# ============================================================
+def _render_report(symbol, out_dir, model=None, images=False):
+    from data_loader import get_cached_stock_data
+    from technical_analysis import analyze_technical, build_technical_indicators, technical_score_series
+    from ohlc_pyramid import load_pyramid
+    from visualization import build_full_chart, pyramid_relayout_js
+
+    start = time.perf_counter()
+    df = get_cached_stock_data(symbol, '2y')
+    if df is None or len(df) < 100:
+        return {"symbol": symbol, "error": "Data tidak cukup untuk report."}
+
+    # Prediksi: jalankan model jika diminta, kalau tidak pakai prediksi terakhir di log
+    fresh = None
+    if model == "advanced":
+        from prediction import advanced_predict_stock_price
+        result, hist3, fundamental, _ = advanced_predict_stock_price(symbol)
+        fresh = {"prediction": result, "last_3_days": hist3, "fundamental": fundamental}
+    elif model == "basic":
+        from prediction import basic_predict_stock_price
+        result, hist3, _ = basic_predict_stock_price(symbol)
+        fresh = {"prediction": result, "last_3_days": hist3, "fundamental": None}
+    if fresh is not None and fresh["prediction"] is not None:
+        fresh = to_serializable(fresh)
+        prediction, predicted_at = fresh["prediction"], "baru"
+    else:
+        fresh = None
+        logged = _latest_prediction(symbol)
+        prediction = logged["prediction"] if logged else None
+        predicted_at = logged["timestamp"] if logged else None
+
+    ta = to_serializable(analyze_technical(symbol, df))
+    # Candlestick memakai semua level pyramid; level diganti di browser saat zoom
+    pyramid = load_pyramid(symbol)
+    charts = build_full_chart(build_technical_indicators(df.copy()), symbol, technical_score_series(df),
+                              pyramid=pyramid)
+
+    body = [f"<h1>{html.escape(symbol)}</h1>",
+            f"<p>Data sampai {df.index[-1]:%Y-%m-%d} — dibuat {datetime.now():%Y-%m-%d %H:%M}</p>",
+            "<h2>Analisis Teknikal</h2>",
+            _table([(html.escape(k), _fmt(v)) for k, v in ta.items() if not isinstance(v, dict)])]
+    body.append(f"<h2>Prediksi Terakhir{f' ({html.escape(predicted_at)})' if predicted_at else ''}</h2>")
+    body.append(_table([(html.escape(k), _fmt(v)) for k, v in prediction.items()])
+                if prediction else "<p>Belum ada prediksi untuk simbol ini.</p>")
+
+    key = symbol.replace('.', '_')
+    image_files = []
+    for name in CHART_ORDER:
+        if name not in charts:
+            continue
+        post_script = pyramid_relayout_js() if name == "candlestick" and pyramid else None
+        body.append(charts[name].to_html(full_html=False, include_plotlyjs=False,
+                                         div_id=f"{key}_{name}", post_script=post_script))
+        if images:
+            image_file = f"{key}_{name}.png"
+            charts[name].write_image(os.path.join(out_dir, image_file))
+            image_files.append(image_file)
+
+    page = _PAGE.format(title=f"{symbol} — Report", plotly_js=PLOTLY_JS, body="\n".join(body))
+    report_file = f"{key}.html"
+    path = os.path.join(out_dir, report_file)
+    atomic_write(path, lambda f: f.write(page))
+
+    return {
+        "symbol": symbol,
+        "file": report_file,
+        "images": image_files,
+        "bytes": os.path.getsize(path),
+        "seconds": time.perf_counter() - start,
+        "close": float(df["Close"].iloc[-1]),
+        "technical_score": ta["technical_score"],
+        "recommendation": ta["recommendation"],
+        "predicted_close": prediction.get("predicted_close") if prediction else None,
+        "fresh": fresh,
+    }
+
+
+# ============================================================
+#   INDEX PAGE
+# ============================================================
+def write_index(out_dir, results):
+    rows = []
+    for r in sorted(results, key=lambda r: r["symbol"]):
+        if "error" in r:
+            rows.append((html.escape(r["symbol"]), "", "", "", "", html.escape(r["error"])))
+            continue
+        pred = r["predicted_close"]
+        rows.append((
+            f'<a href="{r["file"]}">{html.escape(r["symbol"])}</a>',
+            _fmt(r["close"]), r["technical_score"], html.escape(r["recommendation"]),
+            _fmt(pred) if pred is not None else "-", f'{r["seconds"]:.2f}s',
+        ))
+    body = (f"<h1>Watchlist Report — {datetime.now():%Y-%m-%d}</h1>\n"
+            + _table(rows, ["Symbol", "Close", "Score", "Recommendation", "Pred. Close", "Render"]))
+    path = os.path.join(out_dir, "index.html")
+    page = _PAGE.format(title="Watchlist Report", plotly_js=PLOTLY_JS, body=body)
+    atomic_write(path, lambda f: f.write(page))
+    return path
+
+
+def generate_reports(symbols, out_dir=None, model=None, images=False, max_workers=MAX_WORKERS):
+    """Render report semua simbol paralel; cetak waktu per report dan total."""
+    out_dir = out_dir or os.path.join(REPORT_DIR, datetime.now().strftime("%Y-%m-%d"))
+    os.makedirs(out_dir, exist_ok=True)
+    if images:
+        try:
+            import kaleido  # noqa: F401  (dibutuhkan plotly untuk export PNG)
+        except ImportError:
+            print("kaleido tidak terpasang — export PNG dilewati.")
+            images = False
+
+    start = time.perf_counter()
+    ensure_plotly_js(out_dir)
+    results = []
+    with ProcessPoolExecutor(max_workers) as pool:
+        futures = {pool.submit(_render_report, s, out_dir, model, images): s for s in symbols}
+        for fut in as_completed(futures):
+            try:
+                r = fut.result()
+            except Exception as e:
+                r = {"symbol": futures[fut], "error": str(e)}
+            results.append(r)
+            if "error" in r:
+                print(f"{r['symbol']:<12} GAGAL: {r['error']}")
+                continue
+            # Log prediksi baru ditulis di proses induk (satu penulis)
+            if r["fresh"]:
+                write_prediction_log(r["symbol"], r["fresh"]["prediction"],
+                                     r["fresh"]["last_3_days"], r["fresh"]["fundamental"])
+            print(f"{r['symbol']:<12} {r['seconds']:6.2f}s  {r['bytes'] / 1024:7.0f} KB  {r['file']}")
+
+    index = write_index(out_dir, results)
+    total = time.perf_counter() - start
+    ok = sum("error" not in r for r in results)
+    print(f"\n{ok}/{len(symbols)} report dalam {total:.2f}s → {index}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch HTML/PNG report untuk watchlist")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--out", default=None, help="folder output (default reports/YYYY-MM-DD)")
+    parser.add_argument("--predict", choices=["basic", "advanced"], default=None,
+                        help="jalankan prediksi baru (default: pakai prediksi terakhir di log)")
+    parser.add_argument("--png", action="store_true", help="export PNG per chart (butuh kaleido)")
+    parser.add_argument("--jobs", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+    generate_reports([s.upper() for s in args.symbols], args.out, args.predict, args.png, args.jobs)
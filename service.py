@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from aiohttp import web
+
+from utils import to_serializable, write_prediction_log, read_prediction_log, read_full_prediction_log
+
+MAX_WORKERS = 4
+
+
+# ============================================================
+#   WORKER FUNCTIONS (JALAN DI PROCESS POOL)
+# ============================================================
+# Heavy imports (sklearn, yfinance) hanya terjadi di worker process.
+def _run_prediction(symbol, model, interval='1d'):
+    if model == "advanced":
+        from prediction import advanced_predict_stock_price
+        result, hist3, fundamental, _ = advanced_predict_stock_price(symbol, interval=interval)
+    else:
+        from prediction import basic_predict_stock_price
+        result, hist3, _ = basic_predict_stock_price(symbol, interval=interval)
+        fundamental = None
+
+    if result is None:
+        return None
+
+    return {
+        "prediction": to_serializable(result),
+        "last_3_days": to_serializable(hist3),
+        "fundamental": to_serializable(fundamental),
+    }
+
+
+def _run_technical(symbol):
+    from data_loader import get_cached_stock_data
+    from technical_analysis import analyze_technical
+
+    data = get_cached_stock_data(symbol, '2y')
+    if data is None or len(data) < 100:
+        return None
+    return to_serializable(analyze_technical(symbol, data))
+
+
+# ============================================================
+#   SINGLE-FLIGHT (COALESCING REQUEST YANG SAMA)
+# ============================================================
+class SingleFlight:
+    """Share one in-flight computation between concurrent callers of the same key."""
+
+    def __init__(self):
+        self._inflight = {}
+
+    async def do(self, key, factory):
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(factory())
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda f: self._forget(key, f))
+        # shield: client yang disconnect tidak membatalkan request lain
+        return await asyncio.shield(fut)
+
+    def _forget(self, key, fut):
+        if self._inflight.get(key) is fut:
+            del self._inflight[key]
+
+    def __len__(self):
+        return len(self._inflight)
+
+
+INTERVALS = {"1d": None, "1m": 1, "5m": 5, "15m": 15, "60m": 60}
+
+
+def _data_date(interval='1d'):
+    # Cache harga di-refresh harian, jadi tanggal hari ini mewakili versi data;
+    # untuk intraday versinya adalah bar yang sedang berjalan
+    now = datetime.now()
+    minutes = INTERVALS.get(interval)
+    if not minutes:
+        return now.strftime("%Y-%m-%d")
+    bucket = (now.hour * 60 + now.minute) // minutes * minutes
+    return f"{now:%Y-%m-%d} {bucket // 60:02d}:{bucket % 60:02d}"
+
+
+async def _submit(request, func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(request.app["pool"], func, *args)
+
+
+async def _blocking_io(func, *args):
+    """
+    File I/O yang bisa blocking (flock log prediksi, baca/tulis JSON utuh + fsync) di
+    thread pool default, supaya event loop tidak ikut berhenti. Bukan process pool:
+    kerja ringan, dan pool proses disisakan untuk prediksi.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, func, *args)
+
+
+# ============================================================
+#   HANDLERS
+# ============================================================
+async def handle_predict(request):
+    symbol = request.match_info["symbol"].upper()
+    model = request.query.get("model", "basic").lower()
+    if model not in ("basic", "advanced"):
+        raise web.HTTPBadRequest(text="model harus 'basic' atau 'advanced'")
+    interval = request.query.get("interval", "1d").lower()
+    if interval not in INTERVALS:
+        raise web.HTTPBadRequest(text=f"interval harus salah satu dari {', '.join(INTERVALS)}")
+
+    async def compute():
+        out = await _submit(request, _run_prediction, symbol, model, interval)
+        if out is not None:
+            await _blocking_io(write_prediction_log, symbol, out["prediction"],
+                               out["last_3_days"], out["fundamental"])
+        return out
+
+    key = ("predict", symbol, model, interval, _data_date(interval))
+    out = await request.app["flights"].do(key, compute)
+    if out is None:
+        return web.json_response(
+            {"symbol": symbol, "error": f"Data tidak cukup untuk prediksi model {model}."},
+            status=422
+        )
+    return web.json_response({"symbol": symbol, "model": model, "interval": interval, **out})
+
+
+async def handle_technical(request):
+    symbol = request.match_info["symbol"].upper()
+
+    key = ("technical", symbol, _data_date())
+    out = await request.app["flights"].do(key, lambda: _submit(request, _run_technical, symbol))
+    if out is None:
+        return web.json_response(
+            {"symbol": symbol, "error": "Data tidak cukup untuk analisis teknikal."},
+            status=422
+        )
+    return web.json_response(out)
+
+
+async def handle_logs(request):
+    try:
+        limit = int(request.query.get("limit", 50))
+    except ValueError:
+        raise web.HTTPBadRequest(text="limit harus integer")
+
+    symbol = request.query.get("symbol")
+    if symbol:
+        logs = await _blocking_io(read_full_prediction_log)
+        logs = [l for l in logs if l.get("symbol") == symbol.upper()][-limit:]
+    else:
+        logs = await _blocking_io(read_prediction_log, limit)
+    return web.json_response(logs)
+
+
+async def handle_health(request):
+    return web.json_response({"status": "ok", "inflight": len(request.app["flights"])})
+
+
+# ============================================================
+#   APP FACTORY
+# ============================================================
+def create_app(max_workers=MAX_WORKERS):
+    app = web.Application()
+    app["flights"] = SingleFlight()
+
+    async def start_pool(app):
+        app["pool"] = ProcessPoolExecutor(max_workers=max_workers)
+
+    async def stop_pool(app):
+        app["pool"].shutdown(wait=True, cancel_futures=True)
+
+    app.on_startup.append(start_pool)
+    app.on_cleanup.append(stop_pool)
+
+    app.router.add_get("/health", handle_health)
+    app.router.add_get("/predict/{symbol}", handle_predict)
+    app.router.add_get("/technical/{symbol}", handle_technical)
+    app.router.add_get("/logs", handle_logs)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JSON prediction service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
+    web.run_app(create_app(args.workers), host=args.host, port=args.port)
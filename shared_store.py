@@ -0,0 +1,197 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from features import OHLCV_COLS, naive_index
+from utils import atomic_write
+
+META_FILE = "meta.json"
+
+
+def _default_base_dir():
+    # /dev/shm = RAM-backed di Linux; fallback ke temp dir biasa
+    shm = "/dev/shm"
+    return shm if os.path.isdir(shm) and os.access(shm, os.W_OK) else tempfile.gettempdir()
+
+
+# ============================================================
+#   SHARED PRICE STORE (MEMMAP, ZERO-COPY ANTAR PROSES)
+# ============================================================
+class SharedPriceStore:
+    """
+    Panel OHLCV satu universe simbol dalam satu file .npy ber-memmap, shape (S, T, 5).
+    Semua simbol disejajarkan ke gabungan tanggal; bar yang tidak ada = NaN,
+    view per simbol dimulai dari bar pertamanya (`starts`).
+
+    Lifecycle:
+        store = SharedPriceStore.create(frames)       # proses induk, sekali
+        worker = SharedPriceStore.attach(store.path)  # tiap worker, tanpa copy
+        store.refresh(frames)                         # generasi baru; worker panggil sync()
+        store.unlink()                                # hapus file setelah pool selesai
+    """
+
+    def __init__(self, path, meta, prices, dates):
+        self.path = path
+        self.generation = meta["generation"]
+        self.symbols = meta["symbols"]
+        self.columns = meta["columns"]
+        self.starts = meta["starts"]
+        self.dates = dates
+        self.prices = prices
+        self._pos = {s: i for i, s in enumerate(self.symbols)}
+
+    # ---------- CREATE / ATTACH ----------
+    @staticmethod
+    def _write_generation(path, frames, generation):
+        frames = {s: df for s, df in frames.items() if df is not None and not df.empty}
+        # Tanggal disimpan tanpa timezone (waktu lokal bursa), sama seperti cache intraday;
+        # CSV ticker US yang melewati DST terbaca sebagai index str dengan offset campuran
+        frames = {s: df.set_axis(naive_index(df.index)) for s, df in frames.items()}
+        frames = {s: df[~df.index.duplicated(keep="last")].sort_index() for s, df in frames.items()}
+        symbols = sorted(frames)
+        stamps = {s: pd.DatetimeIndex(frames[s].index).as_unit("ns").asi8 for s in symbols}
+        dates = np.unique(np.concatenate(list(stamps.values())))
+
+        prices = np.lib.format.open_memmap(
+            os.path.join(path, f"prices_{generation}.npy"), mode="w+",
+            dtype=np.float64, shape=(len(symbols), len(dates), len(OHLCV_COLS))
+        )
+        prices[:] = np.nan
+        starts = []
+        for i, sym in enumerate(symbols):
+            pos = np.searchsorted(dates, stamps[sym])
+            prices[i, pos] = frames[sym][OHLCV_COLS].to_numpy(dtype=np.float64)
+            starts.append(int(pos.min()))
+        prices.flush()
+        del prices
+        np.save(os.path.join(path, f"dates_{generation}.npy"), dates)
+
+        meta = {"generation": generation, "symbols": symbols, "columns": OHLCV_COLS,
+                "starts": starts}
+        # meta.json ditulis terakhir: worker tidak pernah melihat generasi setengah jadi
+        atomic_write(os.path.join(path, META_FILE), lambda f: json.dump(meta, f))
+
+    @classmethod
+    def create(cls, frames, path=None):
+        """Tulis {symbol: DataFrame OHLCV} ke store baru dan kembalikan handle pemiliknya."""
+        path = path or tempfile.mkdtemp(prefix="price_store_", dir=_default_base_dir())
+        os.makedirs(path, exist_ok=True)
+        cls._write_generation(path, frames, generation=1)
+        return cls.attach(path)
+
+    @classmethod
+    def from_cache(cls, symbols, period='5y', path=None):
+        """Load harga dari cache lokal (fetch jika perlu) sekali, lalu buat store."""
+        from data_loader import get_cached_stock_data
+        return cls.create({s: get_cached_stock_data(s, period) for s in symbols}, path)
+
+    @classmethod
+    def attach(cls, path, retries=3):
+        """
+        Buka store yang sudah ada secara read-only (memmap, tidak ada data yang disalin).
+        Generasi yang dibaca dari meta bisa sudah dihapus oleh refresh berikutnya →
+        baca ulang meta dan coba lagi.
+        """
+        for attempt in range(retries):
+            with open(os.path.join(path, META_FILE)) as f:
+                meta = json.load(f)
+            gen = meta["generation"]
+            try:
+                prices = np.load(os.path.join(path, f"prices_{gen}.npy"), mmap_mode="r")
+                dates = pd.DatetimeIndex(np.load(os.path.join(path, f"dates_{gen}.npy")).view("datetime64[ns]"))
+            except FileNotFoundError:
+                if attempt == retries - 1:
+                    raise
+                continue
+            return cls(path, meta, prices, dates)
+
+    # ---------- REFRESH ----------
+    def refresh(self, frames):
+        """
+        Tulis generasi baru (mis. setelah cache harga di-update) lalu hapus generasi N-2.
+        Generasi sebelumnya (N-1) dipertahankan: reader yang baru saja membaca meta lama
+        masih bisa membuka file-nya. Worker yang memetakan generasi lama tetap aman
+        sampai memanggil sync().
+        """
+        old = self.generation
+        self._write_generation(self.path, frames, generation=old + 1)
+        self._swap(SharedPriceStore.attach(self.path))
+        for name in (f"prices_{old - 1}.npy", f"dates_{old - 1}.npy"):
+            try:
+                os.remove(os.path.join(self.path, name))
+            except FileNotFoundError:
+                pass
+
+    def sync(self):
+        """Dipanggil worker: pindah ke generasi terbaru jika ada. True jika berubah."""
+        with open(os.path.join(self.path, META_FILE)) as f:
+            if json.load(f)["generation"] == self.generation:
+                return False
+        self._swap(SharedPriceStore.attach(self.path))
+        return True
+
+    def _swap(self, other):
+        self.__dict__.update(other.__dict__)
+
+    # ---------- UNLINK ----------
+    def close(self):
+        self.prices = None
+
+    def unlink(self):
+        self.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.unlink()
+
+    # ---------- VIEWS ----------
+    def __contains__(self, symbol):
+        return symbol in self._pos
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @property
+    def nbytes(self):
+        return self.prices.nbytes
+
+    def values(self, symbol):
+        """View numpy read-only (T_symbol, 5), mulai dari bar pertama simbol tersebut."""
+        i = self._pos[symbol]
+        return self.prices[i, self.starts[i]:]
+
+    def frame(self, symbol):
+        """
+        DataFrame OHLCV satu simbol di atas memmap (tanpa copy).
+        Tanggal libur khusus simbol ini (ada di simbol lain) berisi NaN.
+        """
+        i = self._pos[symbol]
+        return pd.DataFrame(self.values(symbol), index=self.dates[self.starts[i]:],
+                            columns=self.columns, copy=False)
+
+    def panel(self, column="Close"):
+        """View (T, S) satu kolom untuk semua simbol (strided, tanpa copy)."""
+        return self.prices[:, :, self.columns.index(column)].T
+
+
+# ============================================================
+#   HELPER UNTUK PROCESS POOL
+# ============================================================
+_STORE = None
+
+
+def init_worker(path):
+    """`initializer` untuk ProcessPoolExecutor/Pool: attach sekali per worker."""
+    global _STORE
+    _STORE = SharedPriceStore.attach(path)
+
+
+def worker_store():
+    return _STORE
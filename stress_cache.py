@@ -0,0 +1,109 @@
+import argparse
+import multiprocessing as mp
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+FETCH_LOG = "fetch_count.log"
+
+
+# ============================================================
+#   STRESS TEST CACHE: BANYAK PROSES, SIMBOL YANG SAMA
+# ============================================================
+def _fake_history(symbol, period):
+    # Simulasi latency jaringan supaya proses lain sempat berebut
+    time.sleep(0.5)
+    idx = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=500)
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, len(idx)))
+    return pd.DataFrame({
+        "Open": close, "High": close + 1, "Low": close - 1,
+        "Close": close, "Volume": np.full(len(idx), 1e6)
+    }, index=idx)
+
+
+def _fake_info(symbol):
+    time.sleep(0.5)
+    return {"trailingPE": 10.0, "priceToBook": 1.5}
+
+
+def _init_worker(live):
+    import data_loader
+
+    real_history, real_info = data_loader._fetch_history, data_loader._fetch_info
+    history = real_history if live else _fake_history
+    info = real_info if live else _fake_info
+
+    def counted(kind, fn):
+        def wrapper(symbol, *args):
+            # O_APPEND: satu baris per fetch, aman dari banyak proses
+            with open(FETCH_LOG, "a") as f:
+                f.write(f"{kind}\t{symbol}\n")
+            return fn(symbol, *args)
+        return wrapper
+
+    data_loader._fetch_history = counted("history", history)
+    data_loader._fetch_info = counted("info", info)
+
+
+def _hammer(args):
+    symbols, rounds = args
+    from data_loader import get_cached_stock_data, get_cached_fundamental_data
+
+    bad = 0
+    for _ in range(rounds):
+        for sym in symbols:
+            df = get_cached_stock_data(sym)
+            fund = get_cached_fundamental_data(sym)
+            if df is None or df.empty or not fund:
+                bad += 1
+    return bad
+
+
+def run_stress(symbols, processes=16, rounds=20, live=False):
+    workdir = tempfile.mkdtemp(prefix="stress_cache_")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        ctx = mp.get_context("spawn")
+        start = time.perf_counter()
+        with ctx.Pool(processes, initializer=_init_worker, initargs=(live,)) as pool:
+            # tiap proses mengakses simbol dengan urutan berbeda
+            jobs = [(symbols[i % len(symbols):] + symbols[:i % len(symbols)], rounds)
+                    for i in range(processes)]
+            bad = sum(pool.map(_hammer, jobs))
+        elapsed = time.perf_counter() - start
+
+        counts = {}
+        with open(FETCH_LOG) as f:
+            for line in f:
+                kind, sym = line.rstrip("\n").split("\t")
+                counts[(kind, sym)] = counts.get((kind, sym), 0) + 1
+    finally:
+        os.chdir(cwd)
+
+    return {"workdir": workdir, "elapsed_s": elapsed, "bad_reads": bad, "fetches": counts}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent cache stress test")
+    parser.add_argument("symbols", nargs="*", default=["BBRI.JK", "BBCA.JK", "AAPL", "TSLA"])
+    parser.add_argument("--processes", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--live", action="store_true", help="fetch dari yfinance sungguhan")
+    args = parser.parse_args()
+
+    res = run_stress([s.upper() for s in args.symbols], args.processes, args.rounds, args.live)
+
+    print(f"workdir   : {res['workdir']}")
+    print(f"elapsed   : {res['elapsed_s']:.2f}s")
+    print(f"bad reads : {res['bad_reads']}")
+    ok = True
+    for sym in args.symbols:
+        for kind in ("history", "info"):
+            n = res["fetches"].get((kind, sym.upper()), 0)
+            ok &= n == 1
+            print(f"{sym.upper():10s} {kind:8s} fetches={n}")
+    print("RESULT    :", "OK (1 fetch per symbol)" if ok and res["bad_reads"] == 0 else "FAIL")
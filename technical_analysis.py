@@ -1,5 +1,8 @@
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from features import is_intraday, add_session_features
 
 # ============================================================
 #                HELPER — RSI & MACD
@@ -54,6 +57,14 @@ def build_technical_indicators(df):
     df['Resistance_20'] = df['High'].rolling(20).max()
     df['Support_20'] = df['Low'].rolling(20).min()
 
+    # Intraday: VWAP di-reset tiap sesi (tidak menyeberangi gap overnight)
+    if is_intraday(df.index):
+        df = add_session_features(df)
+        session = df.index.normalize()
+        pv = (df['Close'] * df['Volume']).groupby(session).cumsum()
+        vol = df['Volume'].groupby(session).cumsum()
+        df['Session_VWAP'] = (pv / vol.replace(0, np.nan)).fillna(df['Close'])
+
     return df.dropna()
 
 
@@ -206,3 +217,99 @@ def analyze_technical(symbol, df):
         "ma_signal": ma_signal,
         "triangle_target": float(triangle_target) if triangle_target else None
     }
+
+
+# ============================================================
+#   VERSI VEKTOR — SKOR TEKNIKAL UNTUK SETIAP BAR
+# ============================================================
+def _score_arrays(close, ma, rsi, volume, volume_ma20, macd, macd_signal):
+    """Same scoring rules as analyze_technical, applied elementwise to arrays."""
+    bullish = sum((close > m).astype(int) for m in ma)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vol_ratio = np.where(volume_ma20 > 0, volume / volume_ma20, 1.0)
+
+    rsi_score = np.select([(rsi >= 30) & (rsi <= 70), rsi > 70], [10, -5], 5)
+    volume_score = np.select([vol_ratio > 1.5, vol_ratio < 0.8], [10, -5], 0)
+    macd_score = np.where(macd > macd_signal, 10, -5)
+
+    score = np.clip(50 + bullish * 5 + rsi_score + volume_score + macd_score, 0, 100)
+
+    return {
+        "technical_score": score,
+        "ma_bullish_count": bullish,
+        "rsi_score": rsi_score,
+        "volume_score": volume_score,
+        "macd_score": macd_score,
+        "volume_ratio": vol_ratio,
+    }
+
+
+def _recommendation_arrays(score, bullish):
+    rec = np.select(
+        [score >= 70, score >= 60, score >= 50, score >= 40],
+        ["STRONG BUY", "BUY", "NEUTRAL", "CAUTION"],
+        "STRONG SELL"
+    )
+    ma_signal = np.select([bullish >= 3, bullish >= 2], ["STRONG BUY", "NEUTRAL"], "BEARISH")
+    return rec, ma_signal
+
+
+def detect_ascending_triangle_series(df, lookback=90):
+    """
+    detect_ascending_triangle untuk setiap bar (window `lookback` terakhir).
+    Slope dihitung closed-form (least squares) untuk semua window sekaligus.
+    """
+    n = len(df)
+    out = pd.DataFrame(index=df.index, columns=[
+        "triangle_detected", "triangle_resistance", "triangle_slope", "triangle_target"
+    ], dtype=float)
+    out["triangle_detected"] = False
+
+    w = min(lookback, n)
+    if w < 10:
+        return out
+
+    highs = sliding_window_view(df["High"].to_numpy(dtype=float), w)
+    lows = sliding_window_view(df["Low"].to_numpy(dtype=float), w)
+
+    # slope = sum((x - x_mean) * y) / sum((x - x_mean)^2)
+    xc = np.arange(w) - (w - 1) / 2
+    slope = lows @ xc / (xc @ xc)
+
+    resistance = highs.max(axis=1)
+    target = resistance + (resistance - lows.min(axis=1))
+    detected = slope > 0
+
+    pos = np.arange(w - 1, n)
+    out.iloc[pos, out.columns.get_loc("triangle_detected")] = detected
+    out.iloc[pos, out.columns.get_loc("triangle_resistance")] = resistance
+    out.iloc[pos, out.columns.get_loc("triangle_slope")] = slope
+    out.iloc[pos, out.columns.get_loc("triangle_target")] = np.where(detected, target, np.nan)
+    out["triangle_detected"] = out["triangle_detected"].astype(bool)
+    return out
+
+
+def technical_score_series(df, with_triangle=True):
+    """
+    Riwayat skor teknikal 0–100 + rekomendasi untuk setiap bar (satu pass NumPy).
+    Baris terakhir sama dengan hasil analyze_technical.
+    """
+    df_ta = build_technical_indicators(df.copy())
+
+    ma = [df_ta[f"MA_{w}"].to_numpy() for w in [5, 10, 20, 50]]
+    parts = _score_arrays(
+        df_ta["Close"].to_numpy(), ma, df_ta["RSI_14"].to_numpy(),
+        df_ta["Volume"].to_numpy(), df_ta["Volume_MA_20"].to_numpy(),
+        df_ta["MACD"].to_numpy(), df_ta["MACD_Signal"].to_numpy()
+    )
+    rec, ma_signal = _recommendation_arrays(parts["technical_score"], parts["ma_bullish_count"])
+
+    out = pd.DataFrame(parts, index=df_ta.index)
+    out["rsi"] = df_ta["RSI_14"]
+    out["recommendation"] = rec
+    out["ma_signal"] = ma_signal
+
+    if with_triangle:
+        out = out.join(detect_ascending_triangle_series(df))
+    return out
@@ -0,0 +1,75 @@
+import json
+
+import accuracy
+
+
+def _log_entry(symbol, base_date):
+    return {
+        "timestamp": f"{base_date} 16:00:00",
+        "symbol": symbol,
+        "prediction": {
+            "model_type": "basic", "current_price": 100.0,
+            "predicted_open": 101.0, "predicted_close": 102.0,
+            "open_range": [99.0, 103.0], "close_range": [100.0, 104.0],
+        },
+        "last_3_days": [{"date": base_date, "close": 100.0}],
+    }
+
+
+def test_update_accuracy_without_cached_prices(tmp_path, monkeypatch):
+    # Tidak ada simbol di log yang punya entry harga di manifest → semua prediksi pending
+    # Lock file (stock_data/.locks) relatif ke cwd → jangan tulis ke folder repo
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(accuracy, "ACCURACY_STATE_FILE", str(tmp_path / "accuracy_state.json"))
+    monkeypatch.setattr(accuracy.cache_manifest, "lookup", lambda symbol, kind: None)
+    log_file = tmp_path / "prediction_log.json"
+    log_file.write_text(json.dumps([_log_entry("AAPL", "2025-01-02"), _log_entry("BBRI.JK", "2025-01-03")]))
+
+    state = accuracy.update_accuracy(str(log_file))
+
+    assert state["pending"] == [0, 1]
+    assert state["aggregates"] == {}
+    assert accuracy.accuracy_summary(state).empty
+
+
+def test_update_accuracy_resolves_next_bar(tmp_path, monkeypatch):
+    # Lock file (stock_data/.locks) relatif ke cwd → jangan tulis ke folder repo
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(accuracy, "ACCURACY_STATE_FILE", str(tmp_path / "accuracy_state.json"))
+    prices = tmp_path / "AAPL.csv"
+    prices.write_text("Date,Open,Close\n"
+                      "2025-01-02 00:00:00-05:00,100.0,100.0\n"
+                      "2025-01-03 00:00:00-05:00,101.5,103.0\n")
+    monkeypatch.setattr(accuracy.cache_manifest, "lookup",
+                        lambda symbol, kind: {"path": str(prices)} if symbol == "AAPL" else None)
+    log_file = tmp_path / "prediction_log.json"
+    log_file.write_text(json.dumps([_log_entry("AAPL", "2025-01-02"), _log_entry("BBRI.JK", "2025-01-03")]))
+
+    state = accuracy.update_accuracy(str(log_file))
+
+    assert state["pending"] == [1]
+    agg = state["aggregates"]["AAPL|basic|all"]
+    assert agg["n"] == 1
+    assert agg["abs_err_close"] == 1.0
+    assert agg["hits"] == 1
+
+
+def test_update_accuracy_keeps_todays_bar_pending(tmp_path, monkeypatch):
+    # Bar hari ini belum close → prediksi belum dinilai, dievaluasi ulang di update berikutnya
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(accuracy, "ACCURACY_STATE_FILE", str(tmp_path / "accuracy_state.json"))
+    today = accuracy.pd.Timestamp.today()
+    yesterday = (today - accuracy.pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    prices = tmp_path / "AAPL.csv"
+    prices.write_text("Date,Open,Close\n"
+                      f"{yesterday} 00:00:00-05:00,100.0,100.0\n"
+                      f"{today:%Y-%m-%d} 00:00:00-05:00,101.5,103.0\n")
+    monkeypatch.setattr(accuracy.cache_manifest, "lookup",
+                        lambda symbol, kind: {"path": str(prices)} if symbol == "AAPL" else None)
+    log_file = tmp_path / "prediction_log.json"
+    log_file.write_text(json.dumps([_log_entry("AAPL", yesterday)]))
+
+    state = accuracy.update_accuracy(str(log_file))
+
+    assert state["pending"] == [0]
+    assert state["aggregates"] == {}
@@ -0,0 +1,255 @@
+import argparse
+import json
+import math
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import TimeSeriesSplit
+
+from data_loader import get_cached_stock_data, get_cached_fundamental_data
+from feature_selection import get_selected_features
+from features import build_basic_dataset, build_advanced_dataset, calculate_fundamental_score
+from utils import atomic_write, file_lock
+
+DATA_DIR = "stock_data"
+TUNED_PARAMS_FILE = os.path.join(DATA_DIR, "tuned_params.json")
+
+N_SPLITS = 5
+ETA = 3                   # successive halving: simpan 1/ETA terbaik tiap rung
+EARLY_STOP_MARGIN = 0.10  # random search: hentikan config yang >10% lebih buruk dari best
+
+SEARCH_SPACE = {
+    "n_estimators": [60, 100, 200, 300],
+    "max_depth": [None, 8, 12, 20, 30],
+    "min_samples_split": [2, 4, 8, 16],
+    "min_samples_leaf": [1, 2, 4, 8],
+    "max_features": ["sqrt", 0.3, 0.5, 1.0],
+}
+
+
+# ============================================================
+#   PENYIMPANAN PARAMETER HASIL TUNING
+# ============================================================
+def load_tuned_params():
+    if not os.path.exists(TUNED_PARAMS_FILE):
+        return {"symbols": {}, "groups": {}}
+    try:
+        with open(TUNED_PARAMS_FILE) as f:
+            return json.load(f)
+    except:
+        return {"symbols": {}, "groups": {}}
+
+
+def save_tuned_params(model_type, params, score, symbol=None, group=None, members=None):
+    entry = {
+        "params": params,
+        "score": score,
+        "tuned_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    with file_lock("tuned_params"):
+        store = load_tuned_params()
+        if group:
+            g = store["groups"].setdefault(group, {"members": []})
+            g["members"] = sorted(set(g["members"]) | set(members or []))
+            g[model_type] = entry
+        else:
+            store["symbols"].setdefault(symbol, {})[model_type] = entry
+        atomic_write(TUNED_PARAMS_FILE, lambda f: json.dump(store, f, indent=2))
+
+
+def get_tuned_params(symbol, model_type):
+    """Parameter terbaik untuk simbol: per-simbol dulu, lalu grup; None jika belum di-tune."""
+    store = load_tuned_params()
+    entry = store["symbols"].get(symbol, {}).get(model_type)
+    if entry:
+        return entry["params"]
+    for group in store["groups"].values():
+        if symbol in group.get("members", []) and model_type in group:
+            return group[model_type]["params"]
+    return None
+
+
+# ============================================================
+#   WORKER: FEATURE MATRIX DIBAGI READ-ONLY (MEMMAP)
+# ============================================================
+_X = _Y = _SEGMENTS = _BEST = None
+
+
+def _init_worker(feature_dir, segments, best):
+    global _X, _Y, _SEGMENTS, _BEST
+    _X = np.load(os.path.join(feature_dir, "X.npy"), mmap_mode="r")
+    _Y = np.load(os.path.join(feature_dir, "y.npy"), mmap_mode="r")
+    _SEGMENTS = segments
+    _BEST = best
+
+
+def _cv_splits(n_rows):
+    return list(TimeSeriesSplit(n_splits=N_SPLITS).split(np.arange(n_rows)))
+
+
+def _evaluate(params, early_stop=False):
+    """
+    Mean relative MAE over time-series CV folds of every symbol segment.
+    Random forest tidak butuh scaling (invarian terhadap transformasi monoton).
+    """
+    errors = []
+    for start, stop in _SEGMENTS:
+        X, y = _X[start:stop], _Y[start:stop]
+        scale = float(np.mean(np.abs(y))) or 1.0
+        for train_idx, test_idx in _cv_splits(len(y)):
+            model = RandomForestRegressor(random_state=42, n_jobs=1, **params)
+            model.fit(X[train_idx], y[train_idx])
+            errors.append(np.mean(np.abs(model.predict(X[test_idx]) - y[test_idx])) / scale)
+
+            # Early stopping: config jelas kalah dari best saat ini
+            if early_stop and len(errors) >= 2:
+                if np.mean(errors) > _BEST.value * (1 + EARLY_STOP_MARGIN):
+                    return float(np.mean(errors)), True
+
+    score = float(np.mean(errors))
+    if early_stop:
+        with _BEST.get_lock():
+            _BEST.value = min(_BEST.value, score)
+    return score, False
+
+
+# ============================================================
+#   SEARCH
+# ============================================================
+def sample_configs(n_configs, seed=42):
+    rng = np.random.default_rng(seed)
+    seen, configs = set(), []
+    for _ in range(n_configs * 20):
+        cfg = {k: v[rng.integers(len(v))] for k, v in SEARCH_SPACE.items()}
+        key = json.dumps(cfg, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            configs.append(cfg)
+        if len(configs) == n_configs:
+            break
+    return configs
+
+
+def _load_dataset(symbol, model_type, days_to_predict=1, use_selection=True):
+    if model_type == "advanced":
+        data = get_cached_stock_data(symbol, '3y')
+        if data is None or len(data) < 150:
+            return None
+        fundamental = get_cached_fundamental_data(symbol)
+        X, _, y_close = build_advanced_dataset(
+            data, fundamental, calculate_fundamental_score(fundamental), days_to_predict,
+            columns=get_selected_features(symbol) if use_selection else None, symbol=symbol)
+    else:
+        data = get_cached_stock_data(symbol, '2y')
+        if data is None or len(data) < 100:
+            return None
+        X, _, y_close = build_basic_dataset(data, days_to_predict)
+    if len(X) < 100:
+        return None
+    return X.to_numpy(dtype=np.float64), y_close.to_numpy(dtype=np.float64)
+
+
+def tune(symbols, model_type="advanced", n_configs=30, method="halving", n_jobs=None, seed=42):
+    """
+    Cari hyperparameter forest terbaik untuk satu simbol atau satu grup simbol.
+    Return (best_params, best_score, n_evaluations) atau None jika data tidak cukup.
+    """
+    # Feature matrix dihitung sekali, lalu dibagi ke worker via memmap.
+    # Grup memakai semua fitur supaya kolom antar simbol sejajar.
+    use_selection = len(symbols) == 1
+    datasets = [_load_dataset(s, model_type, use_selection=use_selection) for s in symbols]
+    datasets = [d for d in datasets if d is not None]
+    if not datasets:
+        return None
+
+    feature_dir = tempfile.mkdtemp(prefix="tuning_")
+    segments, offset = [], 0
+    for X, _ in datasets:
+        segments.append((offset, offset + len(X)))
+        offset += len(X)
+    np.save(os.path.join(feature_dir, "X.npy"), np.concatenate([X for X, _ in datasets]))
+    np.save(os.path.join(feature_dir, "y.npy"), np.concatenate([y for _, y in datasets]))
+
+    configs = sample_configs(n_configs, seed)
+    best = mp.Value("d", math.inf)
+    n_eval = 0
+
+    try:
+        with ProcessPoolExecutor(n_jobs, initializer=_init_worker,
+                                 initargs=(feature_dir, segments, best)) as pool:
+            if method == "random":
+                results = list(pool.map(_evaluate, configs, [True] * len(configs)))
+                n_eval = len(configs)
+                scored = [(score, cfg) for (score, pruned), cfg in zip(results, configs) if not pruned]
+            else:
+                # Successive halving: resource = jumlah tree
+                n_rungs = max(1, math.floor(math.log(len(configs), ETA)))
+                candidates = configs
+                for rung in range(n_rungs + 1):
+                    frac = ETA ** (rung - n_rungs)
+                    trial = [dict(c, n_estimators=max(10, int(c["n_estimators"] * frac)))
+                             for c in candidates]
+                    scores = [s for s, _ in pool.map(_evaluate, trial)]
+                    n_eval += len(trial)
+                    ranked = sorted(zip(scores, range(len(candidates))), key=lambda t: t[0])
+                    if rung == n_rungs:
+                        scored = [(s, candidates[i]) for s, i in ranked]
+                        break
+                    keep = max(1, math.ceil(len(candidates) / ETA))
+                    candidates = [candidates[i] for _, i in ranked[:keep]]
+    finally:
+        shutil.rmtree(feature_dir, ignore_errors=True)
+
+    best_score, best_cfg = min(scored, key=lambda t: t[0])
+    return best_cfg, best_score, n_eval
+
+
+def tune_and_store(symbols, model_type="advanced", group=None, **kwargs):
+    out = tune(symbols, model_type, **kwargs)
+    if out is None:
+        return None
+    params, score, _ = out
+    if group:
+        save_tuned_params(model_type, params, score, group=group, members=symbols)
+    else:
+        save_tuned_params(model_type, params, score, symbol=symbols[0])
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time-series CV hyperparameter search")
+    parser.add_argument("symbols", nargs="*")
+    parser.add_argument("--universe", help="file berisi satu simbol per baris")
+    parser.add_argument("--group", help="tune satu config bersama untuk semua simbol")
+    parser.add_argument("--model", choices=["basic", "advanced"], default="advanced")
+    parser.add_argument("--method", choices=["halving", "random"], default="halving")
+    parser.add_argument("--configs", type=int, default=30)
+    parser.add_argument("--jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    symbols = [s.upper() for s in args.symbols]
+    if args.universe:
+        with open(args.universe) as f:
+            symbols += [l.strip().upper() for l in f if l.strip()]
+
+    batch_start = time.perf_counter()
+    runs = [(args.group, symbols)] if args.group else [(None, [s]) for s in symbols]
+    for group, members in runs:
+        start = time.perf_counter()
+        out = tune_and_store(members, args.model, group=group, n_configs=args.configs,
+                             method=args.method, n_jobs=args.jobs)
+        label = group or members[0]
+        if out is None:
+            print(f"{label:12s} SKIP (data tidak cukup)")
+            continue
+        params, score, n_eval = out
+        print(f"{label:12s} rel_MAE={score:.4f} evals={n_eval} "
+              f"time={time.perf_counter() - start:.1f}s params={params}")
+    print(f"TOTAL {time.perf_counter() - batch_start:.1f}s")
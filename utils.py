@@ -1,14 +1,63 @@
 import os
 import json
+import tempfile
+from contextlib import contextmanager
 import numpy as np
 import pandas as pd
 from datetime import datetime
 
+import cache_manifest
+
+try:
+    import fcntl
+except ImportError:  # Windows: lock advisory tidak tersedia
+    fcntl = None
+
 DATA_DIR = "stock_data"
 LOG_FILE = "stock_prediction_log.json"
+LOCK_DIR = os.path.join(DATA_DIR, ".locks")
 
 os.makedirs(DATA_DIR, exist_ok=True)
 
+
+# ============================================================
+#   ATOMIC WRITE & FILE LOCK (AMAN ANTAR PROSES)
+# ============================================================
+def atomic_write(path, write_fn, mode="w"):
+    """Write via a temp file in the same directory, then rename over `path`."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, mode) as f:
+            write_fn(f)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp membuat file 0600: pertahankan permission file lama, 0644 untuk file baru
+        try:
+            file_mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            file_mode = 0o644
+        os.chmod(tmp_path, file_mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def file_lock(name):
+    """Exclusive advisory lock shared by every process using the same DATA_DIR."""
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    with open(os.path.join(LOCK_DIR, f"{name}.lock"), "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
 # ============================================================
 #   SERIALIZATION HELPER (SAFE UNTUK JSON)
 # ============================================================
@@ -45,18 +94,11 @@ def write_prediction_log(symbol, prediction, hist3, fundamental=None):
         "fundamental": to_serializable(fundamental)
     }
 
-    if os.path.exists(LOG_FILE):
-        try:
-            logs = json.load(open(LOG_FILE))
-        except:
-            logs = []
-    else:
-        logs = []
-
-    logs.append(log_entry)
-
-    with open(LOG_FILE, "w") as f:
-        json.dump(logs, f, indent=2)
+    # Log dibaca-tulis utuh → satu penulis sekaligus antar proses (app, service, jobs)
+    with file_lock("prediction_log"):
+        logs = _load_prediction_log()
+        logs.append(log_entry)
+        atomic_write(LOG_FILE, lambda f: json.dump(logs, f, indent=2))
 
     return True
 
@@ -64,35 +106,46 @@ def write_prediction_log(symbol, prediction, hist3, fundamental=None):
 # ============================================================
 #   READ LOG (DIGUNAKAN DI STREAMLIT)
 # ============================================================
-def read_prediction_log(limit=50):
+def _load_prediction_log():
     if not os.path.exists(LOG_FILE):
         return []
 
     try:
-        logs = json.load(open(LOG_FILE))
+        return json.load(open(LOG_FILE))
     except:
         return []
 
-    return logs[-limit:]
+
+def read_prediction_log(limit=50):
+    return _load_prediction_log()[-limit:]
+
+
+def read_full_prediction_log():
+    return _load_prediction_log()
 
 
 # ============================================================
 #   CACHE LIST & CLEAR
 # ============================================================
 def list_cached_symbols():
-    files = os.listdir(DATA_DIR)
-    symbols = []
-    for f in files:
-        if f.endswith(".csv"):
-            sym = f.replace(".csv", "").replace("_", ".")
-            symbols.append(sym)
-    return sorted(symbols)
+    return cache_manifest.list_symbols(kind="price")
+
+
+# File di DATA_DIR yang bukan cache (tidak bisa di-download ulang): hasil tuning,
+# seleksi fitur, state akurasi, queue job, dan aturan/riwayat alert. Prefix, supaya
+# file pendamping SQLite (-journal, -wal) ikut dipertahankan.
+STATE_FILES = (
+    "tuned_params.json", "feature_selection.json", "accuracy_state.json",
+    "jobs.sqlite", "alert_rules.json", "alerts.jsonl",
+)
 
 
 def clear_cache(symbol=None):
-    removed = []
+    # File yang tercatat di manifest
+    removed = cache_manifest.remove(symbol)
 
     if symbol:
+        # File lama yang belum tercatat di manifest
         targets = [
             f"{symbol.replace('.', '_')}.csv",
             f"{symbol.replace('.', '_')}_fundamental.json",
@@ -104,10 +157,11 @@ def clear_cache(symbol=None):
                 os.remove(path)
                 removed.append(path)
     else:
-        # delete all cache files
+        # delete all cache files (kecuali database manifest & file state, lihat STATE_FILES)
+        keep = STATE_FILES + (os.path.basename(cache_manifest.MANIFEST_FILE),)
         for f in os.listdir(DATA_DIR):
             path = os.path.join(DATA_DIR, f)
-            if os.path.isfile(path):
+            if os.path.isfile(path) and not f.startswith(keep):
                 os.remove(path)
                 removed.append(path)
 
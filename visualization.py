@@ -1,4 +1,5 @@
 import plotly.graph_objects as go
+import numpy as np
 import pandas as pd
 
 # ============================================================
@@ -40,6 +41,128 @@ def plot_candlestick(df, symbol, ma_windows=[5, 20, 50]):
     return fig
 
 
+# ============================================================
+#   CANDLESTICK MULTI-RESOLUSI (OHLC PYRAMID)
+# ============================================================
+# Dipasang sebagai `post_script` di fig.to_html(): saat zoom/pan, pilih level
+# paling kasar yang masih punya cukup candle di rentang terlihat.
+_PYRAMID_RELAYOUT_JS = """
+var gd = document.getElementById('{plot_id}');
+var minCandles = __MIN_CANDLES__;
+var levels = [];
+gd.data.forEach(function (t) {
+    if (t.type === 'candlestick') {
+        levels.push({group: t.legendgroup, x: t.x.map(function (d) {
+            return new Date(String(d).replace(' ', 'T')).getTime();
+        })});
+    }
+});
+var current = null;
+gd.data.forEach(function (t) { if (t.type === 'candlestick' && t.visible !== false) current = t.legendgroup; });
+
+function pick(lo, hi) {
+    var best = levels[0];
+    levels.forEach(function (lv) {
+        var n = 0;
+        for (var k = 0; k < lv.x.length; k++) { if (lv.x[k] >= lo && lv.x[k] <= hi) n++; }
+        // Label bucket (mis. akhir minggu) boleh lewat dari awal rentang maksimal satu bucket
+        var bucket = lv.x.length > 1 ? lv.x[1] - lv.x[0] : 0;
+        if (n >= minCandles && lv.x[0] <= lo + bucket) best = lv;
+    });
+    return best;
+}
+
+gd.on('plotly_relayout', function (ev) {
+    var range = ev['xaxis.range'] || [ev['xaxis.range[0]'], ev['xaxis.range[1]']];
+    var lo, hi;
+    if (range[0] !== undefined) {
+        lo = new Date(String(range[0]).replace(' ', 'T')).getTime();
+        hi = new Date(String(range[1]).replace(' ', 'T')).getTime();
+    } else if (ev['xaxis.autorange']) {
+        lo = Math.min.apply(null, levels.map(function (lv) { return lv.x[0]; }));
+        hi = Infinity;
+    } else {
+        return;
+    }
+    var lv = pick(lo, hi);
+    if (lv.group === current) return;
+    current = lv.group;
+    Plotly.restyle(gd, {visible: gd.data.map(function (t) { return t.legendgroup === current; })});
+});
+"""
+
+
+def pyramid_relayout_js(min_candles=None):
+    from ohlc_pyramid import MIN_CANDLES
+    return _PYRAMID_RELAYOUT_JS.replace("__MIN_CANDLES__", str(min_candles or MIN_CANDLES))
+
+
+def plot_candlestick_pyramid(levels, symbol, start=None, end=None, ma_windows=[5, 20, 50],
+                             all_levels=True, max_points=2000):
+    """
+    Candlestick dari beberapa resolusi [(nama_level, df), ...] (halus → kasar).
+    Level yang tampil dipilih dengan `choose_level` untuk rentang [start, end].
+    `all_levels=False` hanya mengirim level terpilih (Streamlit, tanpa callback zoom);
+    `all_levels=True` mengirim semua level (maks `max_points` bar terakhir per level)
+    untuk dipakai `pyramid_relayout_js()` saat zoom.
+    """
+    from ohlc_pyramid import choose_level
+
+    chosen, _ = choose_level(levels, start, end)
+    fig = go.Figure()
+
+    for name, df in levels:
+        if not all_levels and name != chosen:
+            continue
+        if df.empty:
+            continue
+        # MA dihitung di resolusi level itu sendiri (MA 20 mingguan = 20 minggu),
+        # sebelum dipotong supaya awal rentang tidak kosong
+        mas = {w: df['Close'].rolling(w).mean() for w in ma_windows}
+        lo = start if not all_levels and start is not None else None
+        df = df.loc[lo:end].tail(max_points)
+        visible = name == chosen
+
+        fig.add_trace(go.Candlestick(
+            x=df.index,
+            open=df['Open'],
+            high=df['High'],
+            low=df['Low'],
+            close=df['Close'],
+            name=f"Candlestick ({name})",
+            legendgroup=name,
+            visible=visible
+        ))
+
+        for w in ma_windows:
+            fig.add_trace(go.Scatter(
+                x=df.index,
+                y=mas[w].loc[df.index],
+                mode="lines",
+                name=f"MA {w} ({name})",
+                legendgroup=name,
+                visible=visible,
+                line=dict(width=1.8)
+            ))
+
+    fig.update_layout(
+        title=f"{symbol} — Candlestick + Moving Averages",
+        xaxis_title="Date",
+        yaxis_title="Price",
+        height=600,
+        legend=dict(orientation="h"),
+        margin=dict(l=20, r=20, t=40, b=20),
+        # Range slider menggambar ulang semua bar; tidak dipakai di chart multi-resolusi
+        xaxis=dict(rangeslider=dict(visible=False))
+    )
+    if start is not None or end is not None:
+        # Range sebagai string: Timestamp di layout membuat plotly memakai encoder JSON
+        # yang lebih lambat dan menulis tanggal dengan mikrodetik (payload lebih besar)
+        fig.update_xaxes(range=[str(pd.Timestamp(t)) if t is not None else None for t in (start, end)])
+
+    return fig
+
+
 # ============================================================
 #   RSI CHART
 # ============================================================
@@ -190,16 +313,107 @@ def plot_bollinger(df):
     return fig
 
 
+# ============================================================
+#   TECHNICAL SCORE OVERLAY
+# ============================================================
+def plot_technical_score(df, score):
+    """Close price with the historical technical score (0–100) on a second axis."""
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=df.index,
+        y=df['Close'],
+        mode="lines",
+        name="Close Price",
+        line=dict(width=2)
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=score.index,
+        y=score['technical_score'],
+        mode="lines",
+        name="Technical Score",
+        line=dict(width=1.5, color="purple"),
+        yaxis="y2"
+    ))
+
+    # Zona STRONG BUY (>=70) / STRONG SELL (<40)
+    fig.add_hrect(y0=70, y1=100, fillcolor="green", opacity=0.08, line_width=0, yref="y2")
+    fig.add_hrect(y0=0, y1=40, fillcolor="red", opacity=0.08, line_width=0, yref="y2")
+
+    fig.update_layout(
+        title="Technical Score History",
+        xaxis_title="Date",
+        yaxis=dict(title="Price"),
+        yaxis2=dict(title="Score", overlaying="y", side="right", range=[0, 100]),
+        height=300,
+        legend=dict(orientation="h"),
+        margin=dict(l=20, r=20, t=40, b=20)
+    )
+
+    return fig
+
+
+# ============================================================
+#   CORRELATION HEATMAP (PORTOFOLIO)
+# ============================================================
+def plot_correlation_heatmap(corr, title="Return Correlation", max_symbols=150):
+    """
+    Heatmap korelasi return. Simbol diurutkan menurut vektor eigen utama supaya
+    kelompok yang bergerak bersama berdekatan; di atas `max_symbols` hanya simbol
+    dengan korelasi rata-rata tertinggi yang ditampilkan (payload browser tetap kecil).
+    """
+    values = corr.to_numpy(dtype=float)
+    filled = np.nan_to_num(values)
+    if len(corr) > max_symbols:
+        keep = np.argsort(-np.abs(filled).mean(axis=0))[:max_symbols]
+        filled, corr = filled[np.ix_(keep, keep)], corr.iloc[keep, keep]
+        title = f"{title} (top {max_symbols})"
+    order = np.argsort(np.linalg.eigh(filled)[1][:, -1])
+    corr = corr.iloc[order, order]
+
+    fig = go.Figure(go.Heatmap(
+        z=np.round(corr.to_numpy(dtype=float), 3),
+        x=list(corr.columns),
+        y=list(corr.index),
+        zmin=-1, zmax=1,
+        colorscale="RdBu_r",
+        colorbar=dict(title="ρ")
+    ))
+
+    fig.update_layout(
+        title=title,
+        height=max(400, min(900, 18 * len(corr))),
+        yaxis=dict(autorange="reversed"),
+        margin=dict(l=20, r=20, t=40, b=20)
+    )
+
+    return fig
+
+
 # ============================================================
 #   MASTER PLOT (1 CALL)
 # ============================================================
-def build_full_chart(df, symbol):
-    """Generate all charts needed in a Streamlit page."""
+def build_full_chart(df, symbol, score=None, pyramid=None, start=None, end=None, all_levels=True,
+                     interval='1d'):
+    """
+    Generate all charts needed in a Streamlit page.
+    `pyramid` ({level: df} dari ohlc_pyramid untuk base `interval`) → candlestick multi-resolusi.
+    """
+    if pyramid:
+        from ohlc_pyramid import pyramid_levels
+        candlestick = plot_candlestick_pyramid(pyramid_levels(df, pyramid, base=interval), symbol,
+                                               start, end, all_levels=all_levels)
+    else:
+        candlestick = plot_candlestick(df, symbol)
+
     components = {
-        "candlestick": plot_candlestick(df, symbol),
+        "candlestick": candlestick,
         "rsi": plot_rsi(df),
         "macd": plot_macd(df),
         "volume": plot_volume(df),
         "bollinger": plot_bollinger(df)
     }
+    if score is not None:
+        components["technical_score"] = plot_technical_score(df, score)
     return components
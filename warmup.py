@@ -0,0 +1,69 @@
+import importlib
+import os
+import threading
+import time
+
+import cache_manifest
+
+# Library berat yang di-load di background setelah halaman tampil
+WARMUP_MODULES = [
+    "sklearn.ensemble",
+    "plotly.graph_objects",
+    "yfinance",
+    "prediction",
+    "technical_analysis",
+    "visualization",
+]
+WARMUP_RECENT_SYMBOLS = 10
+
+_started = False
+_lock = threading.Lock()
+_status = {"done": False, "timings": {}}
+
+
+def _timed(name, fn):
+    start = time.perf_counter()
+    try:
+        fn()
+    except Exception:
+        pass
+    _status["timings"][name] = time.perf_counter() - start
+
+
+def _recent_symbols(limit):
+    entries = sorted(cache_manifest.entries(kind="price"),
+                     key=lambda e: e["last_access"], reverse=True)
+    return [e["symbol"] for e in entries[:limit]]
+
+
+def _run(n_symbols):
+    for mod in WARMUP_MODULES:
+        _timed(f"import {mod}", lambda mod=mod: importlib.import_module(mod))
+
+    # Cache harga & model dari simbol yang terakhir dipakai → memo per proses. Bundle model
+    # dibaca advanced_predict_stock_price lewat memo yang sama: jika bar terakhir belum
+    # berubah, prediksi langsung dari bundle tanpa training ulang
+    from data_loader import DATA_DIR, _read_csv
+    from forest_export import load_model_bundle
+
+    for sym in _recent_symbols(n_symbols):
+        path = os.path.join(DATA_DIR, f"{sym.replace('.', '_')}.csv")
+        _timed(f"price {sym}", lambda path=path: _read_csv(path))
+        _timed(f"model {sym}", lambda sym=sym: load_model_bundle(sym))
+
+    _status["done"] = True
+
+
+def start_warmup(n_symbols=WARMUP_RECENT_SYMBOLS):
+    """Jalankan warm-up sekali per proses di thread background (non-blocking)."""
+    global _started
+    with _lock:
+        if _started:
+            return False
+        _started = True
+    threading.Thread(target=_run, args=(n_symbols,), name="warmup", daemon=True).start()
+    return True
+
+
+def warmup_status():
+    return dict(_status)